@@ -1,5 +1,7 @@
 // src/services/StakeWebSDK.ts
 
+import { BookBundleClient } from './bookBundle';
+
 interface BookEntryEvent {
   type: string;
   [key: string]: any; // Allow other properties
@@ -16,6 +18,11 @@ let serverBalance = 1000.00; // Keep a mock server balance for session start
 let mockBook: BookEntry[] = [];
 const SIMULATED_LATENCY_MS = 500;
 
+// Production-sized books are served as range-fetchable bundles (run.py with RUN_CONDITIONS["book_bundle"]
+// writes them to public/books); mock_book.jsonl is only downloaded when no bundle is available.
+const bookBundle = new BookBundleClient('/books');
+const bundleAvailable: Promise<boolean> = bookBundle.loadManifest().then(() => true, () => false);
+
 // Function to load the mock book (call once)
 async function loadMockBook() {
   if (mockBook.length === 0) {
@@ -53,9 +60,43 @@ async function loadMockBook() {
     }
   }
 }
+// Picks the book entry for a spin: a random bundle book of the mode, or a random mock book entry
+async function selectBookEntry(requestedMode?: string): Promise<BookEntry | null> {
+  if (await bundleAvailable) {
+    let mode = requestedMode || "base";
+    if (!(await bookBundle.hasMode(mode))) {
+      console.warn(`[StakeWebSDK Mock] No bundle for mode '${mode}'. Falling back to 'base' mode.`);
+      mode = "base";
+    }
+    return (await bookBundle.hasMode(mode)) ? bookBundle.randomBook(mode) : null;
+  }
+
+  let applicableEntries = mockBook;
+  if (requestedMode) {
+    applicableEntries = mockBook.filter(entry => entry.mode === requestedMode);
+    if (applicableEntries.length === 0) {
+      console.warn(`[StakeWebSDK Mock] No entries for mode '${requestedMode}'. Falling back to 'base' mode.`);
+      applicableEntries = mockBook.filter(entry => entry.mode === "base");
+    }
+  } else {
+    // Default to base game if no mode specified
+    applicableEntries = mockBook.filter(entry => entry.mode === "base");
+  }
+  if (applicableEntries.length === 0) {
+    return null;
+  }
+  return applicableEntries[Math.floor(Math.random() * applicableEntries.length)];
+}
+
 // Load on module initialization. Note: top-level await is not used here for broader compatibility.
 // The first call to requestSpin might be slightly delayed if fetch is slow.
-loadMockBook();
+bundleAvailable.then(available => {
+  if (available) {
+    console.log("[StakeWebSDK Mock] Using book bundles from /books.");
+  } else {
+    loadMockBook();
+  }
+});
 
 
 const mockStakeWebService = {
@@ -76,7 +117,7 @@ const mockStakeWebService = {
     console.log(`[StakeWebSDK Mock] Requesting spin with bet: ${betAmount}, mode: ${requestedMode || 'base'}`);
     return new Promise((resolve) => {
       setTimeout(async () => {
-        if (mockBook.length === 0) {
+        if (!(await bundleAvailable) && mockBook.length === 0) {
             console.log("[StakeWebSDK Mock] Mock book not loaded, attempting load...");
             await loadMockBook();
             if (mockBook.length === 0) {
@@ -92,19 +133,14 @@ const mockStakeWebService = {
           return;
         }
         
-        let applicableEntries = mockBook;
-        if (requestedMode) {
-          applicableEntries = mockBook.filter(entry => entry.mode === requestedMode);
-          if (applicableEntries.length === 0) {
-            console.warn(`[StakeWebSDK Mock] No entries for mode '${requestedMode}'. Falling back to 'base' mode.`);
-            applicableEntries = mockBook.filter(entry => entry.mode === "base");
-          }
-        } else {
-          // Default to base game if no mode specified
-          applicableEntries = mockBook.filter(entry => entry.mode === "base");
+        let selectedEntry: BookEntry | null;
+        try {
+          selectedEntry = await selectBookEntry(requestedMode);
+        } catch (error) {
+          console.error("[StakeWebSDK Mock] Failed to load a book entry:", error);
+          selectedEntry = null;
         }
-
-        if (applicableEntries.length === 0) {
+        if (!selectedEntry) {
           console.error("[StakeWebSDK Mock] No applicable entries in mock book for the request.");
           resolve({ success: false, error: "No suitable game entries in mock book."});
           return;
@@ -120,8 +156,6 @@ const mockStakeWebService = {
             console.log(`[StakeWebSDK Mock] Bet not deducted for feature spin mode: ${requestedMode}`);
         }
         
-        const selectedEntry = applicableEntries[Math.floor(Math.random() * applicableEntries.length)];
-        
         // Winnings are always calculated based on the original bet that initiated the round or feature.
         // For feature spins, the `betAmount` parameter to `requestSpin` might be the original triggering bet.
         const winnings = selectedEntry.payoutMultiplier * betAmount; 
@@ -0,0 +1,165 @@
+// src/services/bookBundle.ts
+// Client for the book bundles written by math_sdk_project/game_executables/book_bundle.py.
+// Each mode's books live in a gzip-block bundle with a small binary index, so a single book (or a sample of
+// books) is loaded with HTTP range requests of the blocks holding it instead of downloading the whole book file.
+
+import type { BookEntry } from './StakeWebSDK';
+
+interface BundleModeInfo {
+  bundle: string;
+  index: string;
+  books: number;
+  blocks: number;
+  bytes: number;
+}
+
+interface BundleManifest {
+  version: number;
+  compression: string;
+  block_books: number;
+  modes: Record<string, BundleModeInfo>;
+}
+
+interface ModeIndex {
+  blockOffsets: number[]; // Byte offset of every block, plus the bundle length
+  firstIds: number[];     // First book id of every block
+}
+
+const MAX_CACHED_BLOCKS = 32;
+
+export class BookBundleClient {
+  private baseUrl: string;
+  private manifest: BundleManifest | null = null;
+  private indexes = new Map<string, Promise<ModeIndex>>();
+  private blocks = new Map<string, Promise<BookEntry[]>>(); // `${mode}:${block}`, least recently used first
+
+  constructor(baseUrl: string) {
+    this.baseUrl = baseUrl.replace(/\/$/, '');
+  }
+
+  async loadManifest(): Promise<BundleManifest> {
+    if (!this.manifest) {
+      const response = await fetch(`${this.baseUrl}/manifest.json`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      this.manifest = await response.json() as BundleManifest;
+    }
+    return this.manifest;
+  }
+
+  async hasMode(mode: string): Promise<boolean> {
+    return mode in (await this.loadManifest()).modes;
+  }
+
+  async bookCount(mode: string): Promise<number> {
+    return (await this.modeInfo(mode)).books;
+  }
+
+  // The book at this position (0-based, in bundle order)
+  async getBook(mode: string, position: number): Promise<BookEntry> {
+    const manifest = await this.loadManifest();
+    const info = await this.modeInfo(mode);
+    if (position < 0 || position >= info.books) {
+      throw new RangeError(`Book ${position} is out of range for mode '${mode}' (${info.books} books).`);
+    }
+    const books = await this.getBlock(mode, Math.floor(position / manifest.block_books));
+    return books[position % manifest.block_books];
+  }
+
+  // The book with this id; ids increase through a bundle, so the block is found by binary search
+  async getBookById(mode: string, id: number): Promise<BookEntry | undefined> {
+    const { firstIds } = await this.loadIndex(mode);
+    let low = 0;
+    let high = firstIds.length;
+    while (high - low > 1) {
+      const middle = (low + high) >> 1;
+      if (firstIds[middle] <= id) {
+        low = middle;
+      } else {
+        high = middle;
+      }
+    }
+    return (await this.getBlock(mode, low)).find(entry => entry.id === id);
+  }
+
+  // A uniformly random book of the mode
+  async randomBook(mode: string): Promise<BookEntry> {
+    return this.getBook(mode, Math.floor(Math.random() * (await this.bookCount(mode))));
+  }
+
+  // `count` random books; books sharing a block cost one range request
+  async sampleBooks(mode: string, count: number): Promise<BookEntry[]> {
+    const total = await this.bookCount(mode);
+    const positions = Array.from({ length: count }, () => Math.floor(Math.random() * total));
+    return Promise.all(positions.map(position => this.getBook(mode, position)));
+  }
+
+  private async modeInfo(mode: string): Promise<BundleModeInfo> {
+    const info = (await this.loadManifest()).modes[mode];
+    if (!info) {
+      throw new Error(`Book bundle has no mode '${mode}'.`);
+    }
+    return info;
+  }
+
+  private loadIndex(mode: string): Promise<ModeIndex> {
+    let index = this.indexes.get(mode);
+    if (!index) {
+      index = (async () => {
+        const info = await this.modeInfo(mode);
+        const response = await fetch(`${this.baseUrl}/${info.index}`);
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        // Little-endian float64: (offset, first id) per block, then the bundle length
+        const view = new DataView(await response.arrayBuffer());
+        const blockOffsets: number[] = [];
+        const firstIds: number[] = [];
+        for (let block = 0; block < info.blocks; block++) {
+          blockOffsets.push(view.getFloat64(block * 16, true));
+          firstIds.push(view.getFloat64(block * 16 + 8, true));
+        }
+        blockOffsets.push(view.getFloat64(info.blocks * 16, true));
+        return { blockOffsets, firstIds };
+      })();
+      index.catch(() => this.indexes.delete(mode)); // Retry on the next call
+      this.indexes.set(mode, index);
+    }
+    return index;
+  }
+
+  private getBlock(mode: string, block: number): Promise<BookEntry[]> {
+    const key = `${mode}:${block}`;
+    let books = this.blocks.get(key);
+    if (books) {
+      this.blocks.delete(key); // Move to the most recently used end
+    } else {
+      books = this.fetchBlock(mode, block);
+      books.catch(() => this.blocks.delete(key));
+      if (this.blocks.size >= MAX_CACHED_BLOCKS) {
+        this.blocks.delete(this.blocks.keys().next().value as string);
+      }
+    }
+    this.blocks.set(key, books);
+    return books;
+  }
+
+  private async fetchBlock(mode: string, block: number): Promise<BookEntry[]> {
+    const info = await this.modeInfo(mode);
+    const { blockOffsets } = await this.loadIndex(mode);
+    const start = blockOffsets[block];
+    const end = blockOffsets[block + 1];
+    const response = await fetch(`${this.baseUrl}/${info.bundle}`, { headers: { Range: `bytes=${start}-${end - 1}` } });
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    let compressed = await response.arrayBuffer();
+    if (response.status !== 206) {
+      compressed = compressed.slice(start, end); // Server ignored the Range header and sent the whole bundle
+    }
+    const stream = new Blob([compressed]).stream().pipeThrough(new DecompressionStream('gzip'));
+    const text = await new Response(stream).text();
+    return text.trim().split('\n').map(line => JSON.parse(line) as BookEntry);
+  }
+}
@@ -1,6 +1,17 @@
 # BOMBAROAT_Tralalero_Fury/math/GameMath.py
 import hashlib
+import math
+import numbers
+import os
+import pickle
+import threading
+import time
 from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from statistics import NormalDist
+from types import MappingProxyType
 
 # --- Interface Definitions ---
 
@@ -25,7 +36,7 @@ class IGameMath(ABC):
         """
         Calculates a single spin result including grid, wins, and bonus events.
         'selections' could be used for player choices in bonus rounds or features.
-        Should return a dictionary containing at least:
+        Should return a mapping (GameMath returns a SpinOutcome record) containing at least:
         - grid: The symbol matrix
         - wins: A list of win details
         - total_win_multiplier: Total multiplier for the spin
@@ -72,6 +83,126 @@ class IMathAdapter(ABC):
         """Validates a given game configuration against the math logic."""
         pass
 
+# --- Spin Result Records ---
+# calculate_wins / calculate_spin_outcome results keep their fields in __slots__ rather than a dict per win and
+# per spin. They read like the dicts they replace (record["count"], .get, ==, iteration, dict(record));
+# to_dict() turns them into plain dicts, which is what StakeMathAdapter.spin() hands to the platform.
+# Existing fields can be reassigned (record[key] = value); other keys cannot be added.
+
+class _Unset:
+    """Optional field not present in the record's dict shape."""
+    __slots__ = ()
+
+    def __reduce__(self):
+        return "_UNSET" # Pickles and deep-copies as the module's single instance
+
+    def __repr__(self):
+        return "_UNSET"
+
+_UNSET = _Unset()
+
+class _SpinRecord(Mapping):
+    __slots__ = ()
+    _KEYS = () # Dict keys in order, each also a slot
+
+    def __getitem__(self, key):
+        if key in self._KEYS:
+            value = getattr(self, key)
+            if value is not _UNSET:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._KEYS:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (key for key in self._KEYS if getattr(self, key) is not _UNSET)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        result = {}
+        for key in self:
+            value = getattr(self, key)
+            if isinstance(value, list) and value and isinstance(value[0], _SpinRecord):
+                value = [item.to_dict() for item in value]
+            result[key] = value
+        return result
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+class LineWin(_SpinRecord):
+    __slots__ = _KEYS = ("line_index", "symbol", "count", "payout_multiplier")
+
+    def __init__(self, line_index, symbol, count, payout_multiplier):
+        self.line_index = line_index
+        self.symbol = symbol
+        self.count = count
+        self.payout_multiplier = payout_multiplier
+
+class ScatterWin(_SpinRecord):
+    __slots__ = _KEYS = ("type", "symbol", "count", "payout_multiplier")
+
+    def __init__(self, symbol, count, payout_multiplier):
+        self.type = "scatter_win"
+        self.symbol = symbol
+        self.count = count
+        self.payout_multiplier = payout_multiplier
+
+class SpinOutcome(_SpinRecord):
+    """calculate_spin_outcome() result; payout_amount is only present once the adapter sets it."""
+    __slots__ = _KEYS = ("grid", "wins", "total_win_multiplier", "bonus_events", "next_nonce",
+                         "bet_amount_for_this_spin", "selections_received", "payout_amount")
+
+    def __init__(self, grid, wins, total_win_multiplier, bonus_events, next_nonce, bet_amount_for_this_spin,
+                 selections_received, payout_amount=_UNSET):
+        self.grid = grid
+        self.wins = wins
+        self.total_win_multiplier = total_win_multiplier
+        self.bonus_events = bonus_events
+        self.next_nonce = next_nonce
+        self.bet_amount_for_this_spin = bet_amount_for_this_spin
+        self.selections_received = selections_received
+        self.payout_amount = payout_amount
+
+# --- Compiled Configuration ---
+# The tables a spin reads (paylines, paytable, symbol types, per-reel weight tables) frozen into tuples and
+# read-only mappings. GameMath publishes a new snapshot by swapping one attribute, so threads serving spins never
+# see a table half-edited; the public PAYLINES / PAYTABLE / SYMBOLS / SYMBOL_WEIGHTS stay editable for analysis.
+
+def _reel_table(reel_weights):
+    """((symbol, weight), ...) by symbol, and the reel's total weight: the draw table of one reel."""
+    sorted_symbols = tuple(sorted(reel_weights.items(), key=lambda item: item[0])) # Deterministic draw order
+    return sorted_symbols, sum(weight for _, weight in sorted_symbols)
+
+class CompiledConfig:
+    """Immutable snapshot of a GameMath configuration that spins read (see GameMath.compiled / compile)."""
+    __slots__ = ("paylines", "paytable", "symbol_types", "reel_tables", "_sources")
+
+    def __init__(self, game_math):
+        self.paylines = tuple(tuple(tuple(cell) for cell in line) for line in game_math.PAYLINES)
+        self.paytable = MappingProxyType({symbol: MappingProxyType(dict(payouts)) for symbol, payouts in game_math.PAYTABLE.items()})
+        self.symbol_types = MappingProxyType({symbol: data["type"] for symbol, data in game_math.SYMBOLS.items()})
+        self.reel_tables = tuple(_reel_table(reel_weights) for reel_weights in game_math.SYMBOL_WEIGHTS)
+        # The tables compiled from; holding them keeps "is" comparisons meaningful (see GameMath.compiled)
+        self._sources = (game_math.PAYLINES, game_math.PAYTABLE, game_math.SYMBOLS, game_math.SYMBOL_WEIGHTS)
+
+    def as_plain(self):
+        """The compiled tables as plain dicts and lists (picklable, e.g. for checkpoint headers)."""
+        return {"paytable": {symbol: dict(payouts) for symbol, payouts in self.paytable.items()},
+                "paylines": [list(line) for line in self.paylines],
+                "symbol_types": dict(self.symbol_types),
+                "symbol_weights": [dict(sorted_symbols) for sorted_symbols, _ in self.reel_tables]}
+
+    def compiled_from(self, game_math):
+        sources = self._sources
+        return (sources[0] is game_math.PAYLINES and sources[1] is game_math.PAYTABLE
+                and sources[2] is game_math.SYMBOLS and sources[3] is game_math.SYMBOL_WEIGHTS)
+
 # --- Core Game Logic ---
 
 class GameMath(IGameMath): # Inherit from IGameMath
@@ -82,6 +213,9 @@ class GameMath(IGameMath): # Inherit from IGameMath
     LARGE_WIN_THRESHOLD_MAX = 15 # Wins > 5x and <= 15x
     # MEGA_WIN is > 15x
 
+    # Importance sampling proposal: weight multipliers applied to every reel (see run_importance_sampling)
+    IMPORTANCE_BIAS_FACTORS = {"H1": 20, "WILD": 20}
+
     def __init__(self):
         self.RTP = 0.965  # Target RTP
         self.VOLATILITY = "Medium-High" # Target volatility
@@ -97,11 +231,57 @@ class GameMath(IGameMath): # Inherit from IGameMath
         self.FREE_SPINS_TRIGGER_COUNT = 3
         self.BONUS_ROUND_TRIGGER_SYMBOL = "Bombardino"
         self.BONUS_ROUND_TRIGGER_COUNT = 3
+        # Spins only read an immutable compiled snapshot of the configuration above; seeds, nonce and grid stay
+        # local to each call, so one instance can serve any number of threads at once (see serving.ThreadedSpinServer).
+        self._config_lock = threading.RLock() # Serialises publishing snapshots (compile / configure)
+        self.compile()
 
-        # Placeholder for clientSeed, serverSeed, nonce - will be used for PRNG
-        self.client_seed = None
-        self.server_seed = None
-        self.nonce = 0
+    @property
+    def compiled(self):
+        """
+        The CompiledConfig spins read. Reassigning PAYLINES, PAYTABLE, SYMBOLS or SYMBOL_WEIGHTS recompiles it on
+        the next spin; after editing one of them in place, call compile(), and to change several tables while
+        serving, configure(). A spin reads this once and hands the snapshot to each of its stages, so a
+        configuration published mid-spin only applies from the next spin.
+        """
+        compiled = getattr(self, "_compiled", None)
+        if compiled is None or not compiled.compiled_from(self):
+            with self._config_lock: # Waits out a configure() in progress instead of compiling its half-set tables
+                compiled = self._compiled
+                if compiled is None or not compiled.compiled_from(self):
+                    compiled = self.compile()
+        return compiled
+
+    def compile(self):
+        """Freezes the current tables into a new CompiledConfig and publishes it (one atomic attribute swap)."""
+        with self._config_lock:
+            self._compiled = CompiledConfig(self)
+            return self._compiled
+
+    def configure(self, **tables):
+        """
+        Replaces any of PAYLINES, PAYTABLE, SYMBOLS and SYMBOL_WEIGHTS (passed by those names) and publishes their
+        CompiledConfig in one step, so no spin ever combines old and new tables. Returns the new CompiledConfig.
+        """
+        unknown = set(tables) - {"PAYLINES", "PAYTABLE", "SYMBOLS", "SYMBOL_WEIGHTS"}
+        if unknown:
+            raise ValueError(f"configure() only replaces PAYLINES, PAYTABLE, SYMBOLS and SYMBOL_WEIGHTS, not {sorted(unknown)}.")
+        with self._config_lock:
+            for name, table in tables.items():
+                setattr(self, name, table)
+            return self.compile()
+
+    def __getstate__(self):
+        # The compiled snapshot (read-only mappings) and the lock do not pickle; both are rebuilt on load
+        state = self.__dict__.copy()
+        state.pop("_compiled", None)
+        state.pop("_config_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._config_lock = threading.RLock()
+        self.compile()
 
     def define_symbols(self):
         """Defines all symbols in the game."""
@@ -237,22 +417,18 @@ class GameMath(IGameMath): # Inherit from IGameMath
     
     # --- Core Game Logic Methods --- (these are called by calculate_spin_outcome)
 
-    def _generate_reels(self, client_seed, server_seed, nonce): # Renamed to indicate internal use
+    def _generate_reels(self, client_seed, server_seed, nonce, symbol_weights=None, compiled=None): # Renamed to indicate internal use
         """Generates the symbol matrix for a spin using PRNG based on seeds and nonce.
         Symbols for each cell are generated independently for this version.
+        symbol_weights overrides SYMBOL_WEIGHTS (same format), e.g. with an importance-sampling proposal.
+        compiled: the spin's CompiledConfig (default: the current one).
         """
-        self.client_seed = client_seed
-        self.server_seed = server_seed
-        self.nonce = nonce
-
         grid = [['' for _ in range(self.GRID_COLS)] for _ in range(self.GRID_ROWS)]
+        reel_tables = (compiled or self.compiled).reel_tables if not symbol_weights else None
 
         for c in range(self.GRID_COLS):  # For each column (reel)
-            reel_weights = self.SYMBOL_WEIGHTS[c]
-            # Sort items for deterministic iteration if weights are ever equal
-            # (though order of items in dict is stable in Python 3.7+)
-            sorted_symbols = sorted(reel_weights.items(), key=lambda item: item[0]) 
-            total_reel_weight = sum(w for _, w in sorted_symbols)
+            # Symbols sorted by id for deterministic iteration if weights are ever equal
+            sorted_symbols, total_reel_weight = reel_tables[c] if reel_tables else _reel_table(symbol_weights[c])
 
             if total_reel_weight == 0:
                 # Handle case with no weights or all zero weights for a reel
@@ -265,7 +441,7 @@ class GameMath(IGameMath): # Inherit from IGameMath
 
             for r in range(self.GRID_ROWS):  # For each row in the current column
                 # 1. Combine Seeds and Nonce (unique for each cell)
-                input_str = f"{self.server_seed}-{self.client_seed}-{self.nonce}-{c}-{r}"
+                input_str = f"{server_seed}-{client_seed}-{nonce}-{c}-{r}"
                 
                 # 2a. Use a cryptographic hash function (SHA256)
                 hash_obj = hashlib.sha256(input_str.encode('utf-8'))
@@ -294,13 +470,15 @@ class GameMath(IGameMath): # Inherit from IGameMath
         # print("Generated grid with PRNG:", grid) # Optional: for debugging
         return grid
 
-    def calculate_wins(self, grid):
-        """Calculates wins based on the grid and paylines."""
+    def calculate_wins(self, grid, compiled=None):
+        """Calculates wins based on the grid and paylines (of compiled, default: the current CompiledConfig)."""
         wins = []
         total_win_multiplier = 0
+        compiled = compiled or self.compiled
+        paytable, symbol_types = compiled.paytable, compiled.symbol_types
 
         # Line wins
-        for i, line in enumerate(self.PAYLINES):
+        for i, line in enumerate(compiled.paylines):
             line_symbols = []
             try:
                 for r, c in line:
@@ -315,11 +493,11 @@ class GameMath(IGameMath): # Inherit from IGameMath
             # For simplicity, let's find the first non-wild symbol to determine the line type.
             first_symbol = None
             for sym_code in line_symbols:
-                if self.SYMBOLS[sym_code]["type"] != "wild":
+                if symbol_types[sym_code] != "wild":
                     first_symbol = sym_code
                     break
             
-            if not first_symbol or first_symbol not in self.PAYTABLE:
+            if not first_symbol or first_symbol not in paytable:
                 continue # No win or not a paying symbol
 
             match_count = 0
@@ -329,14 +507,9 @@ class GameMath(IGameMath): # Inherit from IGameMath
                 else:
                     break # Streak broken
 
-            if match_count > 0 and match_count in self.PAYTABLE[first_symbol]:
-                payout = self.PAYTABLE[first_symbol][match_count]
-                wins.append({
-                    "line_index": i,
-                    "symbol": first_symbol,
-                    "count": match_count,
-                    "payout_multiplier": payout
-                })
+            if match_count > 0 and match_count in paytable[first_symbol]:
+                payout = paytable[first_symbol][match_count]
+                wins.append(LineWin(i, first_symbol, match_count, payout))
                 total_win_multiplier += payout
         
         # Scatter wins (Tralalero for Free Spins, Lirili Larila for Multiplier/Scatter Payout)
@@ -344,23 +517,46 @@ class GameMath(IGameMath): # Inherit from IGameMath
         for r in range(self.GRID_ROWS):
             for c in range(self.GRID_COLS):
                 symbol_code = grid[r][c]
-                if self.SYMBOLS[symbol_code]["type"].startswith("scatter"):
+                if symbol_types[symbol_code].startswith("scatter"):
                     scatter_counts[symbol_code] = scatter_counts.get(symbol_code, 0) + 1
         
         # Lirili Larila (SCATTER_MULT) scatter payout
         if "SCATTER_MULT" in scatter_counts and \
-            scatter_counts["SCATTER_MULT"] in self.PAYTABLE.get("SCATTER_MULT", {}):
-            payout = self.PAYTABLE["SCATTER_MULT"][scatter_counts["SCATTER_MULT"]]
-            wins.append({
-                "type": "scatter_win",
-                "symbol": "SCATTER_MULT",
-                "count": scatter_counts["SCATTER_MULT"],
-                "payout_multiplier": payout
-            })
+            scatter_counts["SCATTER_MULT"] in paytable.get("SCATTER_MULT", {}):
+            payout = paytable["SCATTER_MULT"][scatter_counts["SCATTER_MULT"]]
+            wins.append(ScatterWin("SCATTER_MULT", scatter_counts["SCATTER_MULT"], payout))
             total_win_multiplier += payout
 
         return {"wins": wins, "total_win_multiplier": total_win_multiplier}
 
+    def get_hit_signature(self, grid, compiled=None):
+        """Payout-independent view of calculate_wins for a grid: the (symbol, count) hit of every payline
+        with a paying-eligible symbol, and the SCATTER_MULT count. Payouts are looked up later by reprice()."""
+        compiled = compiled or self.compiled
+        symbol_types = compiled.symbol_types
+        line_hits = []
+        for i, line in enumerate(compiled.paylines):
+            try:
+                line_symbols = [grid[r][c] for r, c in line]
+            except IndexError:
+                continue
+            first_symbol = None
+            for sym_code in line_symbols:
+                if symbol_types[sym_code] != "wild":
+                    first_symbol = sym_code
+                    break
+            if not first_symbol:
+                continue
+            match_count = 0
+            for sym_code in line_symbols:
+                if sym_code == first_symbol or sym_code == "WILD":
+                    match_count += 1
+                else:
+                    break
+            line_hits.append((i, first_symbol, match_count))
+        scatter_mult_count = sum(row.count("SCATTER_MULT") for row in grid)
+        return line_hits, scatter_mult_count
+
     def check_bonus_triggers(self, grid):
         """Checks for bonus game triggers."""
         bonus_events = []
@@ -399,25 +595,31 @@ class GameMath(IGameMath): # Inherit from IGameMath
     # calculate_wins and check_bonus_triggers remain as previously defined internal methods
     # They are called by calculate_spin_outcome
 
-    def calculate_spin_outcome(self, client_seed: str, server_seed: str, nonce: int, bet_amount: float, selections: dict = None):
+    def calculate_spin_outcome(self, client_seed: str, server_seed: str, nonce: int, bet_amount: float, selections: dict = None,
+                               timings: dict = None, compiled: CompiledConfig = None):
         """
         Calculates a single spin result including grid, wins, and bonus events.
         'selections' could be used for player choices in bonus rounds or features.
+        timings: optional dict that receives the seconds spent in each stage (generate_reels, calculate_wins,
+        check_bonus_triggers), as StakeMathAdapter's metrics record them.
+        compiled: the CompiledConfig to spin (default: the current one, read once for the whole spin).
         """
-        grid = self._generate_reels(client_seed, server_seed, nonce) 
-        win_results = self.calculate_wins(grid) 
+        clock = time.perf_counter if timings is not None else None
+        start = clock() if clock else 0.0
+        compiled = compiled or self.compiled # One snapshot: reels and payouts always come from the same configuration
+        grid = self._generate_reels(client_seed, server_seed, nonce, compiled=compiled)
+        reels_done = clock() if clock else 0.0
+        win_results = self.calculate_wins(grid, compiled=compiled)
+        wins_done = clock() if clock else 0.0
         bonus_events = self.check_bonus_triggers(grid)
+        if clock:
+            timings["generate_reels"] = reels_done - start
+            timings["calculate_wins"] = wins_done - reels_done
+            timings["check_bonus_triggers"] = clock() - wins_done
         
-        return {
-            "grid": grid,
-            "wins": win_results["wins"],
-            "total_win_multiplier": win_results["total_win_multiplier"],
-            "bonus_events": bonus_events,
-            "next_nonce": nonce + 1,
-            # bet_amount is not used for core multiplier calculation but acknowledged
-            "bet_amount_for_this_spin": bet_amount, 
-            "selections_received": selections # Store received selections
-        }
+        # bet_amount is not used for core multiplier calculation but acknowledged; selections are stored as received
+        return SpinOutcome(grid, win_results["wins"], win_results["total_win_multiplier"], bonus_events,
+                           nonce + 1, bet_amount, selections)
 
     def _get_win_category(self, payout_multiplier: float) -> str:
         if payout_multiplier == self.NO_WIN_THRESHOLD:
@@ -431,8 +633,102 @@ class GameMath(IGameMath): # Inherit from IGameMath
         else:
             return "mega_win"
 
-    def run_simulation(self, num_spins: int, bet_amount: float = 1.0):
-        """Runs a simulation for a given number of spins to estimate RTP and win distribution."""
+    def find_max_win(self):
+        """Finds the exact maximum win multiplier of a spin and a witness grid.
+        Branch-and-bound over the cells reel by reel: each payline is bounded by the best payout it can still
+        reach given the fixed cells, and SCATTER_MULT is bounded net of the line value its cells must give up,
+        so only branches that can still beat the best grid found are expanded.
+        """
+        rows, cols = self.GRID_ROWS, self.GRID_COLS
+        num_cells = rows * cols
+        compiled = self.compiled # The configuration spins use, fixed for the whole search
+        paytable = compiled.paytable
+        # Symbols a cell can show: positive weight on its reel
+        domains = [{s for s, w in compiled.reel_tables[idx % cols][0] if w > 0} for idx in range(num_cells)]
+        lines = [[r * cols + c for r, c in line] for line in compiled.paylines
+                 if all(0 <= r < rows and 0 <= c < cols for r, c in line)]
+        cell_lines = [[i for i, line in enumerate(lines) if idx in line] for idx in range(num_cells)]
+        line_symbols = [s for s in paytable if compiled.symbol_types[s] != "wild"]
+        scatter_table = paytable.get("SCATTER_MULT", {})
+        symbol_order = sorted(compiled.symbol_types, key=lambda s: -max(paytable.get(s, {0: 0}).values()))
+        cell_order = sorted(range(num_cells), key=lambda idx: (idx % cols, idx // cols))
+
+        def line_bound(grid, line):
+            options = [(grid[idx],) if grid[idx] is not None else domains[idx] for idx in line]
+            best = 0
+            for symbol in line_symbols:
+                reach, seen = 0, False
+                for opts in options:
+                    if symbol in opts:
+                        seen = True
+                    elif "WILD" not in opts:
+                        break
+                    reach += 1
+                if seen:
+                    best = max([best] + [paytable[symbol].get(n, 0) for n in range(1, reach + 1)])
+            return best
+
+        def scatter_bound(grid, line_bounds):
+            fixed = grid.count("SCATTER_MULT")
+            open_cells = [idx for idx in range(num_cells) if grid[idx] is None and "SCATTER_MULT" in domains[idx]]
+            best, losses = scatter_table.get(fixed, 0), None
+            for m in range(1, len(open_cells) + 1):
+                value = scatter_table.get(fixed + m, 0)
+                if value <= best:
+                    continue
+                if losses is None: # Line value lost by pinning each open cell to SCATTER_MULT
+                    losses = []
+                    for idx in open_cells:
+                        grid[idx] = "SCATTER_MULT"
+                        losses.append(sum(line_bounds[i] - line_bound(grid, lines[i]) for i in cell_lines[idx]))
+                        grid[idx] = None
+                    losses.sort()
+                best = max(best, value - losses[m - 1])
+            return best
+
+        best = {"payout": -1, "grid": None}
+
+        def search(grid, depth, line_bounds):
+            if depth == num_cells:
+                payout = self.calculate_wins([grid[r * cols:(r + 1) * cols] for r in range(rows)], compiled)["total_win_multiplier"]
+                if payout > best["payout"]:
+                    best["payout"], best["grid"] = payout, grid[:]
+                return
+            idx = cell_order[depth]
+            children = []
+            for symbol in symbol_order:
+                if symbol not in domains[idx]:
+                    continue
+                grid[idx] = symbol
+                child_bounds = line_bounds[:]
+                for i in cell_lines[idx]:
+                    child_bounds[i] = line_bound(grid, lines[i])
+                bound = sum(child_bounds) + scatter_bound(grid, child_bounds)
+                if bound > best["payout"]:
+                    children.append((bound, symbol, child_bounds))
+            children.sort(key=lambda child: -child[0])
+            for bound, symbol, child_bounds in children:
+                if bound <= best["payout"]:
+                    break
+                grid[idx] = symbol
+                search(grid, depth + 1, child_bounds)
+            grid[idx] = None
+
+        empty_grid = [None] * num_cells
+        search(empty_grid, 0, [line_bound(empty_grid, line) for line in lines])
+        witness = [best["grid"][r * cols:(r + 1) * cols] for r in range(rows)]
+        return {"max_win_multiplier": best["payout"], "witness_grid": witness}
+
+    def run_simulation(self, num_spins: int, bet_amount: float = 1.0, record_hit_counts: bool = False,
+                       checkpoint_path: str = None, checkpoint_every: int = 100000):
+        """Runs a simulation for a given number of spins to estimate RTP and win distribution.
+        With record_hit_counts=True the result also carries a HitCountTable under "hit_counts",
+        whose reprice(paytable) re-evaluates the same spins under another paytable without re-simulating.
+        With checkpoint_path, the spin cursor and all accumulators are saved there every checkpoint_every spins,
+        and a later call with the same arguments resumes from the saved spin. Spin i is seeded from i alone,
+        so a resumed run returns exactly what an uninterrupted one would. The file is removed on completion.
+        """
+        hit_counts = HitCountTable(self, bet_amount) if record_hit_counts else None
         total_bet = 0
         total_payout = 0
         
@@ -448,13 +744,39 @@ class GameMath(IGameMath): # Inherit from IGameMath
         min_multiplier_seen = float('inf')
         max_multiplier_seen = float('-inf')
 
-        for i in range(num_spins):
+        compiled = self.compiled # Every spin of the run, and its checkpoint header, use this one configuration
+        run_key = {"num_spins": num_spins, "bet_amount": bet_amount, "record_hit_counts": record_hit_counts,
+                   "game": self.get_game_parameters(), **compiled.as_plain()}
+        first_spin = 0
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "rb") as f:
+                checkpoint = pickle.load(f)
+            if checkpoint["run_key"] != run_key:
+                raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different simulation (arguments or game definition differ).")
+            first_spin = checkpoint["next_spin"]
+            total_bet, total_payout = checkpoint["total_bet"], checkpoint["total_payout"]
+            win_distribution = checkpoint["win_distribution"]
+            min_multiplier_seen, max_multiplier_seen = checkpoint["min_multiplier_seen"], checkpoint["max_multiplier_seen"]
+            hit_counts = checkpoint["hit_counts"]
+            if hit_counts is not None:
+                hit_counts.game_math = self
+            print(f"Resuming simulation from {checkpoint_path} at spin {first_spin}.")
+
+        for i in range(first_spin, num_spins):
+            if checkpoint_path and i > first_spin and i % checkpoint_every == 0:
+                self._save_simulation_checkpoint(checkpoint_path, {
+                    "run_key": run_key, "next_spin": i, "total_bet": total_bet, "total_payout": total_payout,
+                    "win_distribution": win_distribution, "min_multiplier_seen": min_multiplier_seen,
+                    "max_multiplier_seen": max_multiplier_seen, "hit_counts": hit_counts,
+                })
             client_seed = f"sim_client_{i}"
             server_seed = f"sim_server_{i}"
             # Nonce should ideally be unique per seed pair, but for simulation using i is common
             nonce = i 
 
-            spin_result = self.calculate_spin_outcome(client_seed, server_seed, nonce, bet_amount)
+            spin_result = self.calculate_spin_outcome(client_seed, server_seed, nonce, bet_amount, compiled=compiled)
+            if hit_counts is not None:
+                hit_counts.record(spin_result["grid"], compiled)
             
             payout_multiplier = spin_result["total_win_multiplier"]
             current_payout = payout_multiplier * bet_amount
@@ -470,12 +792,15 @@ class GameMath(IGameMath): # Inherit from IGameMath
             if payout_multiplier > max_multiplier_seen:
                 max_multiplier_seen = payout_multiplier
 
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path) # Completed; the next call starts a fresh run
+
         actual_rtp = (total_payout / total_bet) * 100 if total_bet > 0 else 0
         
         # Prepare distribution percentages
         win_distribution_percent = {k: (v / num_spins) * 100 for k, v in win_distribution.items()}
 
-        return {
+        results = {
             "simulated_rtp": actual_rtp,
             "total_spins": num_spins,
             "total_bet": total_bet,
@@ -486,12 +811,330 @@ class GameMath(IGameMath): # Inherit from IGameMath
             "min_win_multiplier_seen": min_multiplier_seen if min_multiplier_seen != float('inf') else 0,
             "max_win_multiplier_seen": max_multiplier_seen if max_multiplier_seen != float('-inf') else 0,
         }
+        if hit_counts is not None:
+            results["hit_counts"] = hit_counts
+        return results
+
+    @staticmethod
+    def _save_simulation_checkpoint(path, state):
+        """Atomic write (temp file + rename), so a crash while saving keeps the previous checkpoint."""
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def run_importance_sampling(self, num_spins: int, tail_thresholds=None, bias_factors: dict = None,
+                                bet_amount: float = 1.0, confidence: float = 0.95):
+        """Estimates tail win probabilities with importance sampling.
+        Spins are generated from SYMBOL_WEIGHTS multiplied by bias_factors (default IMPORTANCE_BIAS_FACTORS),
+        so high-paying symbols land far more often, and each spin is weighted by its likelihood ratio
+        prod(p(cell) / q(cell)). The weighted estimates are unbiased for the real weights.
+        For every threshold t (default: the medium and large win thresholds) reports P(win > t x) and the RTP
+        contributed by those wins, with confidence intervals and the variance reduction versus plain simulation
+        (how many times fewer spins the same precision takes).
+        """
+        if bias_factors is None:
+            bias_factors = self.IMPORTANCE_BIAS_FACTORS
+        if tail_thresholds is None:
+            tail_thresholds = [self.MEDIUM_WIN_THRESHOLD_MAX, self.LARGE_WIN_THRESHOLD_MAX]
+        if any(factor <= 0 for factor in bias_factors.values()):
+            raise ValueError("bias_factors must be positive, otherwise some grids could never be generated")
+
+        # The proposal is built from the compiled reel tables the spins themselves use
+        compiled = self.compiled
+        reel_tables = compiled.reel_tables
+        proposal_weights = [{symbol: weight * bias_factors.get(symbol, 1) for symbol, weight in sorted_symbols}
+                            for sorted_symbols, _ in reel_tables]
+        log_ratios = [] # Per reel: {symbol: log(p / q)}
+        for (sorted_symbols, total), proposal in zip(reel_tables, proposal_weights):
+            proposal_total = sum(proposal.values())
+            log_ratios.append({symbol: math.log((weight / total) / (proposal[symbol] / proposal_total))
+                               for symbol, weight in sorted_symbols if weight > 0})
+
+        payouts = []
+        likelihood_ratios = []
+        for i in range(num_spins):
+            grid = self._generate_reels(f"is_client_{i}", f"is_server_{i}", i, symbol_weights=proposal_weights)
+            payouts.append(self.calculate_wins(grid, compiled)["total_win_multiplier"])
+            likelihood_ratios.append(math.exp(sum(log_ratios[c][grid[r][c]]
+                                                  for r in range(self.GRID_ROWS) for c in range(self.GRID_COLS))))
+
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        def weighted_estimate(values, scale):
+            if not num_spins: # Nothing sampled: zero estimates, as HitCountRecorder.reprice reports
+                return 0, (0, 0), None
+            weighted = [w * v for w, v in zip(likelihood_ratios, values)]
+            mean = sum(weighted) / num_spins
+            is_variance = max(sum(x * x for x in weighted) / num_spins - mean * mean, 0.0)
+            crude_variance = max(sum(w * v * v for w, v in zip(likelihood_ratios, values)) / num_spins - mean * mean, 0.0)
+            half_width = z * math.sqrt(is_variance / num_spins)
+            return (mean * scale, ((mean - half_width) * scale, (mean + half_width) * scale),
+                    crude_variance / is_variance if is_variance > 0 else None)
+
+        rtp, rtp_ci, _ = weighted_estimate(payouts, 100)
+        tails = {}
+        for threshold in tail_thresholds:
+            above = [payout > threshold for payout in payouts]
+            probability, probability_ci, variance_reduction = weighted_estimate([1.0 if a else 0.0 for a in above], 1)
+            contribution, contribution_ci, _ = weighted_estimate([p if a else 0.0 for p, a in zip(payouts, above)], 100)
+            tails[threshold] = {
+                "biased_hits": sum(above),
+                "probability": probability,
+                "probability_ci": probability_ci,
+                "variance_reduction": variance_reduction,
+                "rtp_contribution_percent": contribution,
+                "rtp_contribution_ci": contribution_ci,
+            }
+
+        ratio_sum = sum(likelihood_ratios)
+        return {
+            "estimated_rtp": rtp,
+            "rtp_ci": rtp_ci,
+            "total_spins": num_spins,
+            "total_bet": num_spins * bet_amount,
+            "confidence": confidence,
+            "effective_sample_size": ratio_sum * ratio_sum / sum(w * w for w in likelihood_ratios) if num_spins else 0,
+            "tails": tails,
+        }
+
+    def generate_grid_from_uniforms(self, uniforms):
+        """Maps one uniform in [0, 1) per cell (row-major) to a grid by inverse CDF over SYMBOL_WEIGHTS.
+        The mapping is monotone, so two weight sets fed the same uniforms produce mostly identical grids,
+        which is what run_paired_comparison relies on."""
+        grid = [['' for _ in range(self.GRID_COLS)] for _ in range(self.GRID_ROWS)]
+        reel_tables = self.compiled.reel_tables
+        for c in range(self.GRID_COLS):
+            sorted_symbols, total_reel_weight = reel_tables[c]
+            for r in range(self.GRID_ROWS):
+                value = uniforms[r * self.GRID_COLS + c] * total_reel_weight
+                chosen_symbol_id = sorted_symbols[-1][0] # Guards against float rounding at the top end
+                for symbol_id, weight in sorted_symbols:
+                    if value < weight:
+                        chosen_symbol_id = symbol_id
+                        break
+                    value -= weight
+                grid[r][c] = chosen_symbol_id
+        return grid
+
+    def run_paired_comparison(self, other, num_spins: int, bet_amount: float = 1.0, confidence: float = 0.95):
+        """Common-random-numbers A/B comparison of this configuration (A) against other (B), e.g. another weight set.
+        Spin i of both configurations is generated from the same SHA256-derived uniforms, so the per-spin payout
+        differences are strongly correlated and the RTP / hit frequency deltas (B - A) get paired confidence
+        intervals. variance_reduction is how many times fewer spins the paired estimate needs compared with
+        two independent simulations.
+        """
+        if num_spins < 2:
+            raise ValueError("run_paired_comparison needs at least 2 spins for a confidence interval.")
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        num_cells = self.GRID_ROWS * self.GRID_COLS
+        payouts_a, payouts_b = [], []
+        for i in range(num_spins):
+            uniforms = []
+            for cell in range(num_cells):
+                hex_hash = hashlib.sha256(f"crn-{i}-{cell}".encode('utf-8')).hexdigest()
+                uniforms.append(int(hex_hash[:8], 16) / 2 ** 32)
+            payouts_a.append(self.calculate_wins(self.generate_grid_from_uniforms(uniforms))["total_win_multiplier"])
+            payouts_b.append(other.calculate_wins(other.generate_grid_from_uniforms(uniforms))["total_win_multiplier"])
+
+        def paired_delta(values_a, values_b, scale):
+            n = len(values_a)
+            mean_a, mean_b = sum(values_a) / n, sum(values_b) / n
+            delta = mean_b - mean_a
+            var_a = sum((x - mean_a) ** 2 for x in values_a) / (n - 1)
+            var_b = sum((x - mean_b) ** 2 for x in values_b) / (n - 1)
+            var_d = sum((b - a - delta) ** 2 for a, b in zip(values_a, values_b)) / (n - 1)
+            half_width = z * math.sqrt(var_d / n)
+            return {
+                "a": mean_a * scale,
+                "b": mean_b * scale,
+                "delta": delta * scale,
+                "ci": ((delta - half_width) * scale, (delta + half_width) * scale),
+                "independent_ci_half_width": z * math.sqrt((var_a + var_b) / n) * scale,
+                "variance_reduction": (var_a + var_b) / var_d if var_d > 0 else None,
+            }
+
+        return {
+            "total_spins": num_spins,
+            "total_bet": num_spins * bet_amount,
+            "confidence": confidence,
+            "rtp_percent": paired_delta(payouts_a, payouts_b, 100),
+            "hit_frequency_percent": paired_delta([1.0 if p > 0 else 0.0 for p in payouts_a],
+                                                  [1.0 if p > 0 else 0.0 for p in payouts_b], 100),
+        }
+
+# --- Paytable What-If Support ---
+
+class HitCountTable:
+    """
+    Hit counts recorded by GameMath.run_simulation(record_hit_counts=True).
+    - line_hits: hit-count tensor {(line_index, symbol, count): spins}
+    - scatter_hits: {SCATTER_MULT count: spins}
+    Each spin is stored as an interned signature of its (symbol, count) hits, so reprice() only prices
+    the distinct signatures and then expands them back into per-spin lookup payouts.
+    """
+    def __init__(self, game_math, bet_amount: float = 1.0):
+        self.game_math = game_math
+        self.bet_amount = bet_amount
+        self.line_hits = Counter()
+        self.scatter_hits = Counter()
+        self._signature_index = {}
+        self._signatures = []
+        self._spin_signatures = array("I")
+
+    @property
+    def num_spins(self):
+        return len(self._spin_signatures)
+
+    def record(self, grid, compiled=None):
+        line_hits, scatter_mult_count = self.game_math.get_hit_signature(grid, compiled)
+        for hit in line_hits:
+            self.line_hits[hit] += 1
+        self.scatter_hits[scatter_mult_count] += 1
+        signature = (tuple(sorted(Counter((symbol, count) for _, symbol, count in line_hits).items())), scatter_mult_count)
+        signature_id = self._signature_index.get(signature)
+        if signature_id is None:
+            signature_id = len(self._signatures)
+            self._signature_index[signature] = signature_id
+            self._signatures.append(signature)
+        self._spin_signatures.append(signature_id)
+
+    def _signature_payout(self, signature, paytable):
+        line_part, scatter_mult_count = signature
+        payout = 0
+        for (symbol, count), hits in line_part:
+            payout += paytable.get(symbol, {}).get(count, 0) * hits
+        return payout + paytable.get("SCATTER_MULT", {}).get(scatter_mult_count, 0)
+
+    def reprice(self, paytable: dict):
+        """Re-evaluates every recorded spin under paytable ({symbol: {count: payout_multiplier}}).
+        Returns the same statistics as run_simulation plus the per-spin "lookup_payouts"."""
+        signature_payouts = [self._signature_payout(sig, paytable) for sig in self._signatures]
+        num_spins = self.num_spins
+        total_bet = self.bet_amount * num_spins
+        total_payout = 0
+        win_distribution = {"no_win": 0, "small_win": 0, "medium_win": 0, "large_win": 0, "mega_win": 0}
+        for signature_id, spins in Counter(self._spin_signatures).items():
+            payout_multiplier = signature_payouts[signature_id]
+            total_payout += payout_multiplier * self.bet_amount * spins
+            win_distribution[self.game_math._get_win_category(payout_multiplier)] += spins
+        lookup_payouts = [signature_payouts[sig_id] for sig_id in self._spin_signatures]
+
+        return {
+            "simulated_rtp": (total_payout / total_bet) * 100 if total_bet > 0 else 0,
+            "total_spins": num_spins,
+            "total_bet": total_bet,
+            "total_payout": total_payout,
+            "win_distribution_counts": win_distribution,
+            "win_distribution_percentage": {k: (v / num_spins) * 100 if num_spins else 0 for k, v in win_distribution.items()},
+            "hit_frequency_percent": (1 - (win_distribution["no_win"] / num_spins)) * 100 if num_spins > 0 else 0,
+            "min_win_multiplier_seen": min(lookup_payouts) if lookup_payouts else 0,
+            "max_win_multiplier_seen": max(lookup_payouts) if lookup_payouts else 0,
+            "lookup_payouts": lookup_payouts,
+        }
+
+    def rtp_by_line(self, paytable: dict):
+        """Per-payline RTP contribution (percent) under paytable, from the hit-count tensor."""
+        per_line = Counter()
+        for (line_index, symbol, count), spins in self.line_hits.items():
+            per_line[line_index] += paytable.get(symbol, {}).get(count, 0) * spins
+        return {i: total / self.num_spins * 100 for i, total in sorted(per_line.items())} if self.num_spins else {}
+
+def evaluate_round(math_logic, client_seed, server_seed, nonce, compiled=None):
+    """
+    (grid, calculate_wins result, bonus events) of one round through GameMath-style stage methods. Logic with a
+    CompiledConfig evaluates every stage against one snapshot (compiled, default its current one).
+    """
+    if compiled is None:
+        compiled = getattr(math_logic, "compiled", None)
+    if compiled is None:
+        grid = math_logic._generate_reels(client_seed, server_seed, nonce)
+        return grid, math_logic.calculate_wins(grid), math_logic.check_bonus_triggers(grid)
+    grid = math_logic._generate_reels(client_seed, server_seed, nonce, compiled=compiled)
+    return grid, math_logic.calculate_wins(grid, compiled=compiled), math_logic.check_bonus_triggers(grid)
+
+# --- Batch Spin Results ---
+
+class SpinBatch:
+    """
+    Columnar results of StakeMathAdapter.spin_many, one row per round:
+    - grids: array('B') of symbol codes, row-major, GRID_ROWS * GRID_COLS per round (symbols[code] is the symbol ID)
+    - total_win_multipliers / payout_amounts: array('d'); win_counts: array('H')
+    - free_spins_triggered / bonus_triggered: array('b') flags
+    batch[i] (or to_dicts()) builds the same dict spin() returns, only when asked for, from the CompiledConfig
+    the batch was spun with (compiled).
+    """
+    def __init__(self, adapter, symbols, client_seeds, server_seeds, nonces, bet_amounts, selections=None, compiled=None):
+        self.adapter = adapter
+        self.compiled = compiled
+        self.symbols = symbols
+        self.symbol_codes = {symbol: code for code, symbol in enumerate(symbols)}
+        self.grid_rows = adapter.math_logic.GRID_ROWS
+        self.grid_cols = adapter.math_logic.GRID_COLS
+        self.client_seeds = client_seeds
+        self.server_seeds = server_seeds
+        self.nonces = nonces
+        self.bet_amounts = bet_amounts
+        self.selections = selections
+        self.grids = array("B")
+        self.total_win_multipliers = array("d")
+        self.payout_amounts = array("d")
+        self.win_counts = array("H")
+        self.free_spins_triggered = array("b")
+        self.bonus_triggered = array("b")
+
+    def __len__(self):
+        return len(self.total_win_multipliers)
+
+    def append(self, grid, total_win_multiplier, win_count, bonus_events, bet_amount):
+        codes = self.symbol_codes
+        for row in grid:
+            for symbol in row:
+                code = codes.get(symbol)
+                if code is None: # Symbol the math logic did not declare up front
+                    code = codes[symbol] = len(self.symbols)
+                    self.symbols.append(symbol)
+                self.grids.append(code)
+        self.total_win_multipliers.append(total_win_multiplier)
+        self.payout_amounts.append(total_win_multiplier * bet_amount)
+        self.win_counts.append(win_count)
+        event_types = {event.get("type") for event in bonus_events}
+        self.free_spins_triggered.append("free_spins" in event_types)
+        self.bonus_triggered.append("bombardino_bonus" in event_types)
+
+    def grid(self, i):
+        """Symbol-ID grid (list of rows) of round i."""
+        size = self.grid_rows * self.grid_cols
+        flat = self.grids[i * size:(i + 1) * size]
+        return [[self.symbols[code] for code in flat[r * self.grid_cols:(r + 1) * self.grid_cols]] for r in range(self.grid_rows)]
+
+    def __getitem__(self, i):
+        """Dict view of round i in spin()'s format; wins and bonus events are re-derived from the stored grid."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("SpinBatch index out of range")
+        math_logic = self.adapter.math_logic
+        grid = self.grid(i)
+        win_results = math_logic.calculate_wins(grid, compiled=self.compiled) if self.compiled else math_logic.calculate_wins(grid)
+        return SpinOutcome(grid, win_results["wins"], self.total_win_multipliers[i], math_logic.check_bonus_triggers(grid),
+                           self.nonces[i] + 1, self.bet_amounts[i],
+                           self.selections[i] if self.selections is not None else None,
+                           self.payout_amounts[i]).to_dict()
+
+    def to_dicts(self):
+        return [self[i] for i in range(len(self))]
 
 # --- Adapter for Stake Platform ---
 
 class StakeMathAdapter(IMathAdapter):
     def __init__(self, math_logic: IGameMath, game_config: dict = None):
         super().__init__(math_logic, game_config) # Calls IMathAdapter.__init__
+        self._max_win_result = None # (compiled config, find_max_win() result), filled lazily by get_max_win()
+        self._precomputer = None # serving.SpinPrecomputer while enable_precompute() is on
+        self._metrics = None # serving.SpinMetrics while enable_metrics() is on
+        self._metrics_server = None
         # Optional: initial validation or setup based on game_config
         if not self.validate_configuration(self.game_config): # Using self.game_config from super
             # Depending on strictness, could raise error or just log
@@ -509,19 +1152,144 @@ class StakeMathAdapter(IMathAdapter):
         #    # Modify behavior or pass to math_logic if it supports feature buys
         #    pass
 
-        spin_outcome = self.math_logic.calculate_spin_outcome(
-            client_seed=client_seed,
-            server_seed=server_seed,
-            nonce=nonce,
-            bet_amount=bet_amount,
-            selections=selections
-        )
+        if self._metrics is not None:
+            return self._measured_spin(client_seed, server_seed, nonce, bet_amount, selections)
+        if self._precomputer is not None:
+            spin_outcome = self._precomputer.spin_outcome(client_seed, server_seed, nonce, bet_amount, selections)
+        else:
+            spin_outcome = self.math_logic.calculate_spin_outcome(
+                client_seed=client_seed,
+                server_seed=server_seed,
+                nonce=nonce,
+                bet_amount=bet_amount,
+                selections=selections
+            )
         
         # Adapter can transform or add data if needed for the platform
         # For example, calculating actual payout from multiplier and bet_amount
         spin_outcome['payout_amount'] = spin_outcome['total_win_multiplier'] * bet_amount
         
-        return spin_outcome
+        # Plain (JSON-ready) dict for the platform; other IGameMath implementations may already return one
+        return spin_outcome.to_dict() if isinstance(spin_outcome, _SpinRecord) else spin_outcome
+
+    def _measured_spin(self, client_seed, server_seed, nonce, bet_amount, selections):
+        """spin() with metrics: GameMath.calculate_spin_outcome fills in the time of each of its stages."""
+        math_logic, metrics, precomputer = self.math_logic, self._metrics, self._precomputer
+        clock = time.perf_counter
+        start = clock()
+        timings = {}
+        try:
+            if precomputer is not None: # Stages run on the precompute workers; only the whole spin is timed
+                spin_outcome = precomputer.spin_outcome(client_seed, server_seed, nonce, bet_amount, selections)
+            elif type(math_logic).calculate_spin_outcome is GameMath.calculate_spin_outcome:
+                spin_outcome = math_logic.calculate_spin_outcome(client_seed=client_seed, server_seed=server_seed, nonce=nonce,
+                                                                 bet_amount=bet_amount, selections=selections, timings=timings)
+            else: # Other IGameMath logic: no stage timings
+                spin_outcome = math_logic.calculate_spin_outcome(client_seed=client_seed, server_seed=server_seed,
+                                                                 nonce=nonce, bet_amount=bet_amount, selections=selections)
+        except Exception:
+            metrics.record_error(clock() - start)
+            raise
+        spin_outcome["payout_amount"] = spin_outcome["total_win_multiplier"] * bet_amount
+        result = spin_outcome.to_dict() if isinstance(spin_outcome, _SpinRecord) else spin_outcome
+        timings["spin"] = clock() - start
+        win_category = math_logic._get_win_category(result["total_win_multiplier"]) \
+            if hasattr(math_logic, "_get_win_category") else None
+        metrics.record(timings, result["total_win_multiplier"], bet_amount, result.get("bonus_events", ()), win_category)
+        return result
+
+    def enable_metrics(self, namespace: str = "bombaroat", buckets=None):
+        """
+        Starts collecting serving.SpinMetrics for every spin() (latency per stage, counters, precompute hit rate),
+        bucketed by buckets (default serving.LATENCY_BUCKETS).
+        While disabled, spin() pays one attribute check. Returns the SpinMetrics.
+        """
+        from serving import LATENCY_BUCKETS, SpinMetrics
+        self._metrics = SpinMetrics(namespace, LATENCY_BUCKETS if buckets is None else buckets,
+                                    precomputer_source=lambda: self._precomputer)
+        return self._metrics
+
+    def disable_metrics(self):
+        self.stop_metrics_server()
+        self._metrics = None
+
+    def metrics_text(self):
+        """Pull API: the current metrics in Prometheus text format ("" while metrics are disabled)."""
+        return self._metrics.render_prometheus() if self._metrics is not None else ""
+
+    def serve_metrics(self, host: str = "127.0.0.1", port: int = 9464):
+        """Exposes the metrics at http://host:port/metrics (enabling them if needed); returns the MetricsHTTPServer."""
+        from serving import MetricsHTTPServer
+        if self._metrics is None:
+            self.enable_metrics()
+        self.stop_metrics_server()
+        self._metrics_server = MetricsHTTPServer(self._metrics, host, port)
+        return self._metrics_server
+
+    def stop_metrics_server(self):
+        if self._metrics_server is not None:
+            self._metrics_server.close()
+            self._metrics_server = None
+
+    def enable_precompute(self, depth: int = 4, max_workers: int = 2, max_cached: int = 10000):
+        """
+        Makes spin() evaluate the next `depth` nonces of each active seed pair in the background (see
+        serving.SpinPrecomputer), so a player's following round is usually ready before it is requested.
+        Returns the SpinPrecomputer (its stats count hits, waits and misses).
+        """
+        if getattr(type(self.math_logic), "calculate_spin_outcome", None) is not GameMath.calculate_spin_outcome:
+            raise ValueError("Precompute needs math logic using GameMath.calculate_spin_outcome.")
+        from serving import SpinPrecomputer
+        self.disable_precompute()
+        self._precomputer = SpinPrecomputer(self.math_logic, depth, max_workers, max_cached)
+        return self._precomputer
+
+    def disable_precompute(self):
+        if self._precomputer is not None:
+            self._precomputer.close()
+            self._precomputer = None
+
+    def invalidate_seed_pair(self, client_seed: str, server_seed: str = None):
+        """Drops precomputed rounds of a seed pair, e.g. once its server seed has been revealed."""
+        if self._precomputer is not None:
+            self._precomputer.invalidate(client_seed, server_seed)
+
+    def spin_many(self, client_seeds, server_seeds, nonces, bet_amounts, selections=None):
+        """
+        Batch version of spin() for settling queued rounds or pre-generating outcomes.
+        Each argument is a sequence (list, tuple, array, ...) with one entry per round; a single str seed or
+        numbers.Real bet (int, float, numpy scalar, ...) is used for every round. selections, if given, is a
+        sequence of per-round dicts passed to the math logic like spin() does.
+        Returns a columnar SpinBatch; batch[i] gives the same dict as spin() for round i.
+        """
+        nonces = list(nonces)
+        num_rounds = len(nonces)
+        client_seeds = [client_seeds] * num_rounds if isinstance(client_seeds, str) else list(client_seeds)
+        server_seeds = [server_seeds] * num_rounds if isinstance(server_seeds, str) else list(server_seeds)
+        bet_amounts = [bet_amounts] * num_rounds if isinstance(bet_amounts, numbers.Real) else list(bet_amounts)
+        selections = list(selections) if selections is not None else None
+        if not (len(client_seeds) == len(server_seeds) == len(bet_amounts) == num_rounds) or \
+           (selections is not None and len(selections) != num_rounds):
+            raise ValueError("spin_many needs one client seed, server seed, nonce and bet amount per round.")
+
+        math_logic = self.math_logic
+        compiled = getattr(math_logic, "compiled", None) # One configuration for the whole batch
+        batch = SpinBatch(self, sorted(getattr(math_logic, "SYMBOLS", {})), client_seeds, server_seeds,
+                          nonces, bet_amounts, selections, compiled)
+        # GameMath-style logic: generate and evaluate directly, skipping the per-round result dict. Rounds with
+        # selections take that shortcut only when the outcome is GameMath's own, which just records them (as the
+        # batch does); any other calculate_spin_outcome receives each round's selections.
+        direct = all(hasattr(math_logic, name) for name in ("_generate_reels", "calculate_wins", "check_bonus_triggers")) and \
+                 (selections is None or type(math_logic).calculate_spin_outcome is GameMath.calculate_spin_outcome)
+        for i in range(num_rounds):
+            if direct:
+                grid, win_results, bonus_events = evaluate_round(math_logic, client_seeds[i], server_seeds[i], nonces[i], compiled)
+            else:
+                win_results = math_logic.calculate_spin_outcome(client_seeds[i], server_seeds[i], nonces[i], bet_amounts[i],
+                                                                selections[i] if selections is not None else None)
+                grid, bonus_events = win_results["grid"], win_results["bonus_events"]
+            batch.append(grid, win_results["total_win_multiplier"], len(win_results["wins"]), bonus_events, bet_amounts[i])
+        return batch
 
     def get_rtp(self):
         """Returns the theoretical Return to Player of the game."""
@@ -531,10 +1299,29 @@ class StakeMathAdapter(IMathAdapter):
         return "N/A" # Fallback if RTP attribute doesn't exist
 
     def get_max_win(self):
-        """Returns the maximum possible win multiplier for the game."""
-        # This is often a configured value or derived from paytable analysis
-        # Using a placeholder value from game_config or a default
-        return self.game_config.get("max_win_multiplier", 5000) # Example placeholder
+        """Returns the maximum possible win multiplier for the game.
+        Derived from the math logic's exact max-win search when it provides one (cached until the math logic's
+        compiled configuration changes); a configured "max_win_multiplier" acts as a cap on top of it (platform exposure limit).
+        """
+        configured_cap = self.game_config.get("max_win_multiplier")
+        if not hasattr(self.math_logic, "find_max_win"):
+            return configured_cap if configured_cap is not None else 5000 # Example placeholder
+        max_win = self._max_win()["max_win_multiplier"]
+        return min(max_win, configured_cap) if configured_cap is not None else max_win
+
+    def get_max_win_witness(self):
+        """Returns the grid achieving the uncapped maximum win (None if the math logic has no max-win search)."""
+        if not hasattr(self.math_logic, "find_max_win"):
+            return None
+        return self._max_win()["witness_grid"]
+
+    def _max_win(self):
+        """math_logic.find_max_win(), cached per CompiledConfig so a reconfigured game is searched again."""
+        compiled = getattr(self.math_logic, "compiled", None) # None for logic without one: cached once
+        cached = self._max_win_result
+        if cached is None or cached[0] is not compiled:
+            cached = self._max_win_result = (compiled, self.math_logic.find_max_win())
+        return cached[1]
 
     def get_game_info(self):
         """Returns a dictionary with general game information."""
@@ -638,10 +1425,17 @@ if __name__ == "__main__":
     print(f"  Selections Received: {spin_result['selections_received']}")
 
 
+    # Batch settlement: one call for many rounds, columnar results
+    print("\n--- Batch Spins (spin_many) ---")
+    batch = adapter.spin_many(client_seed, server_seed, range(1, 1001), bet_amount)
+    print(f"  Rounds: {len(batch)}, total payout: {sum(batch.payout_amounts):.2f}, "
+          f"winning rounds: {sum(1 for count in batch.win_counts if count)}")
+    print(f"  Round 0 matches spin(): {batch[0] == adapter.spin(client_seed, server_seed, 1, bet_amount)}")
+
     # Example of using the TestGameMath variant for guaranteed bonus, via adapter
     print("\n--- Simulating Spin with Guaranteed Bonus (via Adapter) ---")
     class TestGameMathForBonusAdapter(GameMath): # Inherits IGameMath through GameMath
-        def _generate_reels(self, client_seed, server_seed, nonce): # Override internal reel gen
+        def _generate_reels(self, client_seed, server_seed, nonce, symbol_weights=None, compiled=None): # Override internal reel gen
             # Grid designed to trigger bonuses using correct symbol keys
             return [
                 ["SCATTER_FS", "BONUS", "L1", "SCATTER_FS", "H1"],
@@ -693,7 +1487,7 @@ if __name__ == "__main__":
     # For more accurate RTP, 1,000,000+ spins would be better.
     num_simulation_spins = 100000 # Increased to 100,000 for RTP tuning
     
-    simulation_results = core_game_math.run_simulation(num_spins=num_simulation_spins, bet_amount=1.0)
+    simulation_results = core_game_math.run_simulation(num_spins=num_simulation_spins, bet_amount=1.0, record_hit_counts=True)
 
     print(f"  Simulation completed for {simulation_results['total_spins']} spins.")
     print(f"  Total Bet: {simulation_results['total_bet']}")
@@ -711,6 +1505,47 @@ if __name__ == "__main__":
     for category, percentage in simulation_results['win_distribution_percentage'].items():
         print(f"    {category}: {percentage:.2f}%")
 
+    # 7. Paytable what-if from the recorded hit counts (no re-simulation)
+    print("\n--- Paytable What-If (repriced from hit counts) ---")
+    what_if_paytable = {symbol: dict(payouts) for symbol, payouts in core_game_math.PAYTABLE.items()}
+    what_if_paytable["H1"] = {3: 2, 4: 4, 5: 10}
+    what_if_results = simulation_results["hit_counts"].reprice(what_if_paytable)
+    print(f"  Current paytable RTP: {simulation_results['simulated_rtp']:.4f}%")
+    print(f"  H1 payouts doubled RTP: {what_if_results['simulated_rtp']:.4f}%")
+    print(f"  H1 payouts doubled Hit Frequency: {what_if_results['hit_frequency_percent']:.2f}%")
+
+    # 8. Tail probabilities via importance sampling
+    print("\n--- Importance Sampling (tail win probabilities) ---")
+    tail_results = core_game_math.run_importance_sampling(num_spins=20000)
+    print(f"  Estimated RTP: {tail_results['estimated_rtp']:.4f}% "
+          f"(CI {tail_results['rtp_ci'][0]:.4f}% - {tail_results['rtp_ci'][1]:.4f}%)")
+    for threshold, tail in tail_results["tails"].items():
+        reduction = tail["variance_reduction"]
+        print(f"  P(win > {threshold}x): {tail['probability']:.3e} "
+              f"(CI {tail['probability_ci'][0]:.3e} - {tail['probability_ci'][1]:.3e}), "
+              f"RTP share {tail['rtp_contribution_percent']:.4f}%, "
+              f"variance reduction {'n/a' if reduction is None else f'{reduction:.1f}x'}")
+
+    # 9. Paired (common random numbers) comparison against a variant weight set
+    print("\n--- Paired A/B Comparison (H1 weight 1 -> 2 on reel 3) ---")
+    variant_game_math = GameMath()
+    variant_game_math.SYMBOL_WEIGHTS[2]["H1"] = 2
+    variant_game_math.compile() # In-place edit: publish a new compiled snapshot
+    comparison = core_game_math.run_paired_comparison(variant_game_math, num_spins=20000)
+    for metric in ("rtp_percent", "hit_frequency_percent"):
+        d = comparison[metric]
+        print(f"  {metric}: A {d['a']:.4f}  B {d['b']:.4f}  delta {d['delta']:+.4f} "
+              f"(CI {d['ci'][0]:+.4f} - {d['ci'][1]:+.4f}; independent runs +/-{d['independent_ci_half_width']:.4f})")
+
+    # 10. Exact max win (branch-and-bound) backing get_max_win
+    print("\n--- Exact Max Win ---")
+    max_win_result = core_game_math.find_max_win()
+    print(f"  Exact Max Win Multiplier: {max_win_result['max_win_multiplier']}")
+    print(f"  Adapter Max Win (capped by config): {adapter.get_max_win()}")
+    print("  Witness Grid:")
+    for row in max_win_result["witness_grid"]:
+        print(f"    {row}")
+
     # The old direct GameMath spin simulation tests are now superseded by adapter tests
     # and the new run_simulation method.
     # Keeping them commented out or removing them would be fine.
@@ -0,0 +1,313 @@
+# load_test.py
+# Asyncio load generator for capacity-testing StakeMathAdapter.spin().
+# Every simulated player is a coroutine playing rounds the way a real session does: a fixed client seed, a
+# server seed that is rotated (revealed and replaced) every few dozen to few hundred rounds, a nonce counting up
+# from 1 for each server seed, a bet from a small set, and an exponentially distributed think time between
+# rounds. Rounds go either straight to an adapter in this process (inline, or on a worker thread pool) or over
+# HTTP/1.1 keep-alive connections to a spin endpoint (SpinHTTPServer serves one locally for an adapter).
+# The report has throughput, p50/p99/p999 latency (exact, from every round) and process CPU time per spin, and
+# is saved as JSON so runs of different releases can be compared with compare_reports(). Inline in-process
+# spins block the event loop, so their latency is pure service time; the thread pool and HTTP targets also
+# include queueing, which is what grows as the offered load nears capacity.
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORT_VERSION = 1
+BET_AMOUNTS = (0.2, 0.5, 1.0, 2.0, 5.0)
+
+class InProcessTarget:
+    """Spins on an adapter in this process: inline on the event loop (max_workers=None) or on a thread pool."""
+    def __init__(self, adapter, max_workers: int = None):
+        self.adapter = adapter
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="load-spin") if max_workers else None
+
+    @property
+    def description(self):
+        return f"in-process ({self.max_workers} threads)" if self._executor else "in-process (inline)"
+
+    async def spin(self, client_seed, server_seed, nonce, bet_amount):
+        if self._executor is None:
+            return self.adapter.spin(client_seed, server_seed, nonce, bet_amount)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.adapter.spin, client_seed, server_seed, nonce, bet_amount)
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+class HTTPTarget:
+    """POSTs rounds as JSON to a spin endpoint over a pool of keep-alive connections (stdlib asyncio streams)."""
+    def __init__(self, host: str, port: int, path: str = "/spin", connections: int = 64):
+        if connections < 1:
+            raise ValueError("connections must be at least 1.")
+        self.host, self.port, self.path = host, port, path
+        self.connections = connections
+        self._pool = None # asyncio.Queue of (reader, writer); created on the running loop
+
+    @property
+    def description(self):
+        return f"http://{self.host}:{self.port}{self.path} ({self.connections} connections)"
+
+    async def _connection(self):
+        if self._pool is None:
+            self._pool = asyncio.Queue()
+            for _ in range(self.connections):
+                self._pool.put_nowait(None) # Connected lazily
+        connection = await self._pool.get()
+        if connection is None:
+            try:
+                connection = await asyncio.open_connection(self.host, self.port)
+            except Exception:
+                self._pool.put_nowait(None)
+                raise
+        return connection
+
+    async def spin(self, client_seed, server_seed, nonce, bet_amount):
+        body = json.dumps({"client_seed": client_seed, "server_seed": server_seed, "nonce": nonce,
+                           "bet_amount": bet_amount}).encode()
+        reader, writer = await self._connection()
+        try:
+            writer.write(b"POST %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                         % (self.path.encode(), self.host.encode(), len(body)) + body)
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            payload = await reader.readexactly(length)
+        except Exception:
+            writer.close()
+            self._pool.put_nowait(None) # Reconnect on next use
+            raise
+        self._pool.put_nowait((reader, writer))
+        status = int(status_line.split()[1]) if status_line else 0
+        if status != 200:
+            raise RuntimeError(f"Spin endpoint returned HTTP {status}: {payload[:200]!r}")
+        return json.loads(payload)
+
+    async def close(self):
+        if self._pool is None:
+            return
+        while not self._pool.empty():
+            connection = self._pool.get_nowait()
+            if connection is not None:
+                connection[1].close()
+
+class SpinHTTPServer:
+    """
+    Local spin endpoint for HTTP load tests: POST /spin with {"client_seed", "server_seed", "nonce",
+    "bet_amount"} returns adapter.spin(...) as JSON. HTTP/1.1 keep-alive, one thread per connection.
+    """
+    def __init__(self, adapter, host: str = "127.0.0.1", port: int = 0):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(handler):
+                if handler.path != "/spin":
+                    handler.send_error(404)
+                    return
+                try:
+                    request = json.loads(handler.rfile.read(int(handler.headers.get("Content-Length", 0))))
+                    result = adapter.spin(request["client_seed"], request["server_seed"], int(request["nonce"]),
+                                          float(request["bet_amount"]), request.get("selections"))
+                    body, status = json.dumps(result).encode(), 200
+                except (ValueError, KeyError, TypeError) as error:
+                    body, status = json.dumps({"error": str(error)}).encode(), 400
+                handler.send_response(status)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass # No per-request logging
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="spin-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending sequence."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+async def _player(target, player_index, deadline, rng, think_time, rotation_rounds, latencies, stats):
+    client_seed = f"load_client_{player_index}"
+    server_seed_index = 0
+    seed_rounds = rng.randint(*rotation_rounds)
+    nonce = rng.randint(1, seed_rounds) # Players join part-way through their current server seed
+    rounds_left = seed_rounds - nonce + 1
+    bet_amount = rng.choice(BET_AMOUNTS)
+    await asyncio.sleep(rng.uniform(0, min(think_time, deadline - time.perf_counter()))) # Arrivals spread out
+    while time.perf_counter() < deadline:
+        server_seed = f"load_server_{player_index}_{server_seed_index}"
+        start = time.perf_counter()
+        try:
+            result = await target.spin(client_seed, server_seed, nonce, bet_amount)
+        except Exception:
+            stats["errors"] += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+            stats["payout_multiplier"] += result["total_win_multiplier"]
+        nonce += 1
+        rounds_left -= 1
+        if rounds_left <= 0: # Server seed revealed and rotated: nonces start over
+            server_seed_index += 1
+            nonce = 1
+            rounds_left = rng.randint(*rotation_rounds)
+            stats["rotations"] += 1
+        if rng.random() < 0.05:
+            bet_amount = rng.choice(BET_AMOUNTS)
+        if think_time > 0: # Never sleep past the end of the run
+            await asyncio.sleep(max(0.0, min(rng.expovariate(1.0 / think_time), deadline - time.perf_counter())))
+
+async def run_load_test(target, num_players: int = 1000, duration: float = 10.0, think_time: float = 0.5,
+                        rotation_rounds=(50, 300), seed=0):
+    """
+    Plays num_players concurrent sessions against target for duration seconds; returns the report dict.
+    think_time: mean seconds between a player's rounds (0 for closed-loop maximum load).
+    rotation_rounds: (min, max) rounds per server seed.
+    """
+    if num_players < 1 or duration <= 0:
+        raise ValueError("num_players must be at least 1 and duration positive.")
+    latencies = array("d")
+    stats = {"errors": 0, "rotations": 0, "payout_multiplier": 0.0}
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    deadline = wall_start + duration
+    try:
+        await asyncio.gather(*(_player(target, i, deadline, random.Random(f"{seed}-{i}"), think_time, rotation_rounds,
+                                       latencies, stats) for i in range(num_players)))
+    finally:
+        await target.close()
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+    ordered = sorted(latencies)
+    spins = len(ordered)
+    return {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+                        "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "config": {"target": target.description, "num_players": num_players, "duration": duration,
+                   "think_time": think_time, "rotation_rounds": list(rotation_rounds), "seed": seed},
+        "results": {
+            "spins": spins,
+            "errors": stats["errors"],
+            "seed_rotations": stats["rotations"],
+            "wall_seconds": wall_seconds,
+            "throughput_spins_per_second": spins / wall_seconds if wall_seconds > 0 else 0.0,
+            "latency_seconds": {"mean": sum(ordered) / spins if spins else None, "p50": _percentile(ordered, 0.5),
+                                "p99": _percentile(ordered, 0.99), "p999": _percentile(ordered, 0.999),
+                                "max": ordered[-1] if spins else None},
+            # Whole process: includes the event loop and, for a local SpinHTTPServer, the server side
+            "cpu_seconds": cpu_seconds,
+            "cpu_seconds_per_spin": cpu_seconds / spins if spins else None,
+            "mean_payout_multiplier": stats["payout_multiplier"] / spins if spins else None,
+        },
+    }
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare_reports(baseline, candidate):
+    """{metric: (baseline, candidate, relative change)} for throughput, latency percentiles and CPU per spin."""
+    def metrics(report):
+        results = report["results"]
+        values = {"throughput_spins_per_second": results["throughput_spins_per_second"],
+                  "cpu_seconds_per_spin": results["cpu_seconds_per_spin"]}
+        values.update({f"latency_{name}": value for name, value in results["latency_seconds"].items()})
+        return values
+    base, new = metrics(baseline), metrics(candidate)
+    return {name: (base[name], new[name], (new[name] - base[name]) / base[name] if base[name] else None)
+            for name in base if base[name] is not None and new.get(name) is not None}
+
+def format_report(report):
+    results, config = report["results"], report["config"]
+    latency = results["latency_seconds"]
+    if not results["spins"]:
+        return f"{config['target']}: no spins completed ({results['errors']} errors)"
+    return (f"{config['target']}, {config['num_players']} players, think {config['think_time']}s: "
+            f"{results['spins']} spins in {results['wall_seconds']:.1f}s = {results['throughput_spins_per_second']:,.0f}/s; "
+            f"latency p50 {latency['p50'] * 1e3:.2f}ms p99 {latency['p99'] * 1e3:.2f}ms p999 {latency['p999'] * 1e3:.2f}ms; "
+            f"CPU {results['cpu_seconds_per_spin'] * 1e6:.0f}us/spin; {results['errors']} errors, "
+            f"{results['seed_rotations']} seed rotations")
+
+# Example usage: python load_test.py --players 2000 --duration 10 --mode http --output reports/load.json
+if __name__ == "__main__":
+    from GameMath import GameMath, StakeMathAdapter
+
+    parser = argparse.ArgumentParser(description="Capacity-test StakeMathAdapter.spin with simulated players.")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean seconds between a player's rounds")
+    parser.add_argument("--mode", choices=("inline", "threads", "http", "all"), default="all")
+    parser.add_argument("--workers", type=int, default=4, help="Threads for --mode threads")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connections for --mode http")
+    parser.add_argument("--url", help="host:port of an existing spin endpoint (default: a local SpinHTTPServer)")
+    parser.add_argument("--output", help="Report JSON path (one file per mode: <name>_<mode>.json)")
+    parser.add_argument("--compare", help="Baseline report JSON to compare the run against")
+    args = parser.parse_args()
+
+    adapter = StakeMathAdapter(GameMath())
+    modes = ("inline", "threads", "http") if args.mode == "all" else (args.mode,)
+    for mode in modes:
+        server = None
+        if mode == "inline":
+            target = InProcessTarget(adapter)
+        elif mode == "threads":
+            target = InProcessTarget(adapter, max_workers=args.workers)
+        elif args.url:
+            host, port = args.url.rsplit(":", 1)
+            target = HTTPTarget(host, int(port), connections=args.connections)
+        else:
+            server = SpinHTTPServer(adapter)
+            target = HTTPTarget(server.host, server.port, connections=args.connections)
+        try:
+            report = asyncio.run(run_load_test(target, args.players, args.duration, args.think_time))
+        finally:
+            if server is not None:
+                server.close()
+        print(format_report(report))
+        if args.output:
+            root, extension = os.path.splitext(args.output)
+            path = save_report(report, f"{root}_{mode}{extension or '.json'}" if len(modes) > 1 else args.output)
+            print(f"  saved to {path}")
+        if args.compare:
+            for name, (before, after, change) in compare_reports(load_report(args.compare), report).items():
+                print(f"  {name}: {before:.6g} -> {after:.6g}" + (f" ({change:+.1%})" if change is not None else ""))
@@ -0,0 +1,522 @@
+# serving.py
+# Serving-side machinery around StakeMathAdapter.spin(): speculative precompute of upcoming nonces
+# (SpinPrecomputer), per-stage latency and payout metrics with a Prometheus /metrics endpoint (SpinMetrics,
+# MetricsHTTPServer) and a thread pool sharing one adapter (ThreadedSpinServer, run_thread_stress_test).
+# GameMath.py holds the game math; StakeMathAdapter imports from here when precompute or metrics are enabled.
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from GameMath import SpinOutcome, evaluate_round
+
+# --- Speculative Spin Precompute ---
+
+class SpinPrecomputer:
+    """
+    Evaluates upcoming rounds ahead of StakeMathAdapter.spin() requests.
+    A player's rounds use the same (client_seed, server_seed) pair with nonce, nonce + 1, ... until the server
+    seed is rotated, so after every spin the next `depth` nonces of that pair are generated and evaluated on a
+    worker pool and kept in a bounded LRU cache. The grid, wins and bonus events depend only on the seeds and
+    nonce; bet amount and selections are filled in when the round is actually requested, so a cached round
+    gives exactly the result calculate_spin_outcome would; a round cached under a CompiledConfig that has since
+    been replaced is evaluated again. A client seed showing up with a new server seed
+    drops everything cached for its previous pair, as does invalidate().
+    """
+    def __init__(self, math_logic, depth: int = 4, max_workers: int = 2, max_cached: int = 10000):
+        if depth < 1 or max_workers < 1 or max_cached < 1:
+            raise ValueError("depth, max_workers and max_cached must be at least 1.")
+        self.math_logic = math_logic
+        self.depth = depth
+        self.max_cached = max_cached
+        self.max_pairs = max(1, max_cached // depth) # Recently active seed pairs that get rounds precomputed
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spin-precompute")
+        self._lock = threading.Lock() # Guards the tables below
+        self._cache = OrderedDict() # (client_seed, server_seed, nonce) -> (grid, wins, total_win_multiplier, bonus_events, compiled)
+        self._pending = {} # Same key -> Future of a round being evaluated
+        self._pair_nonces = {} # (client_seed, server_seed) -> nonces in the cache
+        self._server_seeds = OrderedDict() # client_seed -> server seed of its active pair, least recent first
+        self._closed = False
+        self.stats = Counter() # hits, waits, misses, scheduled, evictions, invalidations
+
+    def spin_outcome(self, client_seed, server_seed, nonce, bet_amount, selections=None):
+        """Same result as math_logic.calculate_spin_outcome(...), from the cache when the round was precomputed."""
+        key = (client_seed, server_seed, nonce)
+        with self._lock:
+            self._activate(client_seed, server_seed)
+            core = self._take(key)
+            future = self._pending.get(key) if core is None else None
+            self.stats["hits" if core is not None else "waits" if future is not None else "misses"] += 1
+            self._schedule(client_seed, server_seed, nonce)
+        if core is None and future is not None:
+            core = future.result() # None if the round was skipped after a seed rotation
+            with self._lock:
+                self._take(key) # Hand each evaluated round out once
+        if core is not None and core[4] is not getattr(self.math_logic, "compiled", None):
+            core = None # Precomputed under a configuration that has since been replaced
+        if core is None:
+            core = self._evaluate(key)
+        grid, wins, total_win_multiplier, bonus_events, _ = core
+        return SpinOutcome(grid, wins, total_win_multiplier, bonus_events, nonce + 1, bet_amount, selections)
+
+    def invalidate(self, client_seed, server_seed=None):
+        """Drops the cached rounds of client_seed's active pair (or of (client_seed, server_seed))."""
+        with self._lock:
+            if server_seed is None:
+                server_seed = self._server_seeds.pop(client_seed, None)
+            elif self._server_seeds.get(client_seed) == server_seed:
+                del self._server_seeds[client_seed]
+            self._drop_pair(client_seed, server_seed)
+
+    def close(self):
+        """Stops the workers; rounds not yet started are cancelled."""
+        with self._lock:
+            self._closed = True
+            self._cache.clear()
+            self._pair_nonces.clear()
+            self._server_seeds.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _evaluate(self, key):
+        client_seed, server_seed, nonce = key
+        compiled = getattr(self.math_logic, "compiled", None)
+        grid, win_results, bonus_events = evaluate_round(self.math_logic, client_seed, server_seed, nonce, compiled)
+        return grid, win_results["wins"], win_results["total_win_multiplier"], bonus_events, compiled
+
+    def _precompute(self, key):
+        """Worker task: evaluates one upcoming round and caches it while its seed pair is still active."""
+        client_seed, server_seed, nonce = key
+        try:
+            with self._lock:
+                if self._server_seeds.get(client_seed) != server_seed:
+                    return None # Rotated before the worker got to it
+            core = self._evaluate(key)
+            with self._lock:
+                if self._server_seeds.get(client_seed) == server_seed:
+                    self._cache[key] = core
+                    self._pair_nonces.setdefault((client_seed, server_seed), set()).add(nonce)
+                    while len(self._cache) > self.max_cached:
+                        old_key, _ = self._cache.popitem(last=False)
+                        self._forget(old_key)
+                        self.stats["evictions"] += 1
+            return core
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    # The helpers below expect self._lock to be held.
+
+    def _activate(self, client_seed, server_seed):
+        active_server_seed = self._server_seeds.get(client_seed)
+        if active_server_seed != server_seed:
+            if active_server_seed is not None:
+                self._drop_pair(client_seed, active_server_seed) # Server seed rotated
+            self._server_seeds[client_seed] = server_seed
+        self._server_seeds.move_to_end(client_seed)
+        while len(self._server_seeds) > self.max_pairs:
+            idle_client_seed, idle_server_seed = self._server_seeds.popitem(last=False)
+            self._drop_pair(idle_client_seed, idle_server_seed)
+
+    def _schedule(self, client_seed, server_seed, nonce):
+        if self._closed:
+            return
+        for upcoming in range(nonce + 1, nonce + 1 + self.depth):
+            key = (client_seed, server_seed, upcoming)
+            if key not in self._cache and key not in self._pending:
+                self._pending[key] = self._executor.submit(self._precompute, key)
+                self.stats["scheduled"] += 1
+
+    def _take(self, key):
+        core = self._cache.pop(key, None)
+        if core is not None:
+            self._forget(key)
+        return core
+
+    def _forget(self, key):
+        nonces = self._pair_nonces.get(key[:2])
+        if nonces is not None:
+            nonces.discard(key[2])
+            if not nonces:
+                del self._pair_nonces[key[:2]]
+
+    def _drop_pair(self, client_seed, server_seed):
+        nonces = self._pair_nonces.pop((client_seed, server_seed), None)
+        if nonces:
+            for nonce in nonces:
+                del self._cache[(client_seed, server_seed, nonce)]
+            self.stats["invalidations"] += 1
+
+# --- Serving Metrics ---
+
+# Latency histogram bucket upper bounds in seconds (Prometheus "le"), 10us to 1s
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+SPIN_STAGES = ("spin", "generate_reels", "calculate_wins", "check_bonus_triggers")
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram in Prometheus' shape (per-bucket counts, sum, count)."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot: above the largest bound (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1 # First bound >= seconds
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound holding quantile q (the largest bound when it falls in +Inf), None when empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+def _prometheus_label(value):
+    """A label value escaped for the text exposition format (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class SpinMetrics:
+    """
+    Counters and per-stage latency histograms of StakeMathAdapter.spin() (see enable_metrics). Stages are the whole
+    spin plus, for GameMath logic served without precompute, reel generation, win evaluation and trigger checks.
+    Safe to update from ThreadedSpinServer workers; read with snapshot() or render_prometheus().
+    """
+    def __init__(self, namespace: str = "bombaroat", buckets=LATENCY_BUCKETS, precomputer_source=None):
+        self.namespace = namespace
+        self.histograms = {stage: LatencyHistogram(buckets) for stage in SPIN_STAGES}
+        self.counters = Counter() # spins, winning_spins, errors, payout_multiplier, bet_amount, payout_amount
+        self.win_categories = Counter()
+        self.bonus_events = Counter()
+        self._precomputer_source = precomputer_source # Callable returning the adapter's current SpinPrecomputer
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, timings, total_win_multiplier, bet_amount, bonus_events, win_category=None):
+        """One served round: timings {stage: seconds}."""
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.histograms[stage].observe(seconds)
+            self.counters["spins"] += 1
+            if total_win_multiplier > 0:
+                self.counters["winning_spins"] += 1
+            self.counters["payout_multiplier"] += total_win_multiplier
+            self.counters["bet_amount"] += bet_amount
+            self.counters["payout_amount"] += total_win_multiplier * bet_amount
+            if win_category is not None:
+                self.win_categories[win_category] += 1
+            for event in bonus_events:
+                self.bonus_events[event["type"]] += 1
+
+    def record_error(self, seconds):
+        with self._lock:
+            self.histograms["spin"].observe(seconds)
+            self.counters["errors"] += 1
+
+    def _precompute_stats(self):
+        precomputer = self._precomputer_source() if self._precomputer_source is not None else None
+        return Counter(precomputer.stats) if precomputer is not None else Counter()
+
+    def snapshot(self):
+        """Plain dict of the current values (latency quantiles are bucket upper bounds)."""
+        with self._lock:
+            latency = {stage: {"count": histogram.count, "sum": histogram.sum,
+                               "p50": histogram.quantile(0.5), "p99": histogram.quantile(0.99)}
+                       for stage, histogram in self.histograms.items() if histogram.count}
+            counters = dict(self.counters)
+            win_categories = dict(self.win_categories)
+            bonus_events = dict(self.bonus_events)
+        precompute = self._precompute_stats()
+        lookups = precompute["hits"] + precompute["waits"] + precompute["misses"]
+        uptime = time.time() - self.started
+        return {
+            "uptime_seconds": uptime,
+            "spins_per_second": counters.get("spins", 0) / uptime if uptime > 0 else 0.0,
+            "counters": counters,
+            "win_categories": win_categories,
+            "bonus_events": bonus_events,
+            "latency": latency,
+            "precompute": dict(precompute),
+            "precompute_hit_rate": precompute["hits"] / lookups if lookups else None,
+        }
+
+    def render_prometheus(self):
+        """The metrics in Prometheus text exposition format (version 0.0.4)."""
+        ns = self.namespace
+        lines = []
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {ns}_{name} {help_text}")
+            lines.append(f"# TYPE {ns}_{name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = "{" + ",".join(f'{key}="{_prometheus_label(label)}"' for key, label in labels) + "}" if labels else ""
+                lines.append(f"{ns}_{name}{suffix}{label_text} {value!r}" if isinstance(value, float) else
+                             f"{ns}_{name}{suffix}{label_text} {value}")
+
+        with self._lock:
+            counters = Counter(self.counters)
+            histogram_samples = []
+            for stage, histogram in self.histograms.items():
+                if not histogram.count:
+                    continue
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    histogram_samples.append(("_bucket", (("stage", stage), ("le", repr(bound))), cumulative))
+                histogram_samples.append(("_bucket", (("stage", stage), ("le", "+Inf")), histogram.count))
+                histogram_samples.append(("_sum", (("stage", stage),), histogram.sum))
+                histogram_samples.append(("_count", (("stage", stage),), histogram.count))
+            win_categories = sorted(self.win_categories.items())
+            bonus_events = sorted(self.bonus_events.items())
+        precompute = self._precompute_stats()
+
+        metric("spins_total", "counter", "Rounds served by StakeMathAdapter.spin.", [("", (), counters["spins"])])
+        metric("winning_spins_total", "counter", "Rounds with a non-zero payout.", [("", (), counters["winning_spins"])])
+        metric("spin_errors_total", "counter", "spin() calls that raised.", [("", (), counters["errors"])])
+        metric("payout_multiplier_total", "counter", "Sum of the total win multipliers served.",
+               [("", (), float(counters["payout_multiplier"]))])
+        metric("bet_amount_total", "counter", "Sum of the bet amounts served.", [("", (), float(counters["bet_amount"]))])
+        metric("payout_amount_total", "counter", "Sum of the payout amounts served.",
+               [("", (), float(counters["payout_amount"]))])
+        if win_categories:
+            metric("win_category_spins_total", "counter", "Rounds per win category.",
+                   [("", (("category", category),), count) for category, count in win_categories])
+        if bonus_events:
+            metric("bonus_events_total", "counter", "Bonus trigger events per type.",
+                   [("", (("type", event_type),), count) for event_type, count in bonus_events])
+        if histogram_samples:
+            metric("spin_stage_latency_seconds", "histogram", "Latency of spin() and its stages.", histogram_samples)
+        if precompute:
+            metric("precompute_lookups_total", "counter", "Precompute cache lookups by result.",
+                   [("", (("result", result),), precompute[result]) for result in ("hits", "waits", "misses")])
+            lookups = precompute["hits"] + precompute["waits"] + precompute["misses"]
+            metric("precompute_hit_ratio", "gauge", "Share of precompute lookups served from the cache.",
+                   [("", (), precompute["hits"] / lookups if lookups else 0.0)])
+        return "\n".join(lines) + "\n"
+
+class MetricsHTTPServer:
+    """Serves SpinMetrics.render_prometheus() at GET /metrics from a daemon thread (port 0 picks a free port)."""
+    def __init__(self, metrics: SpinMetrics, host: str = "127.0.0.1", port: int = 9464):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass # No per-scrape logging
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# --- Multi-Threaded Serving ---
+
+class ThreadedSpinServer:
+    """
+    Serves spin() requests for one shared StakeMathAdapter from a thread pool.
+    GameMath keeps no per-round state, so all workers share the adapter and its math logic instead of building
+    an instance per request. On free-threaded Python builds rounds are evaluated in parallel; with the GIL the
+    pool still overlaps spins with the I/O of the surrounding request handling.
+    """
+    def __init__(self, adapter, max_workers: int = None):
+        self.adapter = adapter
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spin-server")
+
+    def submit(self, client_seed: str, server_seed: str, nonce: int, bet_amount: float, selections: dict = None):
+        """Queues one round; returns a Future of its spin() result."""
+        return self._executor.submit(self.adapter.spin, client_seed, server_seed, nonce, bet_amount, selections)
+
+    def spin_all(self, rounds):
+        """Runs (client_seed, server_seed, nonce, bet_amount[, selections]) tuples; results in the same order."""
+        futures = [self.submit(*round_args) for round_args in rounds]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_thread_stress_test(adapter, num_threads: int = 8, rounds_per_thread: int = 500,
+                           num_players: int = 16):
+    """
+    Spins one shared adapter from num_threads threads at once, each playing interleaved rounds of num_players
+    seed pairs, and checks every result against the same round spun on a single thread. The same rounds are then
+    served through a ThreadedSpinServer while another thread keeps switching the math logic (GameMath.configure)
+    between its own tables and a variant with doubled payouts and reweighted reels: every result must then match
+    the round spun serially under one of the two, never reels of one with payouts of the other. The
+    interpreter's thread switch interval is shortened meanwhile so rounds interleave as often as possible.
+    Returns {"rounds", "mismatches", "server_mismatches", "variant_rounds", "reconfigurations", "serial_seconds",
+    "threaded_seconds"}; the reconfiguration phase is skipped (None counts) for logic without configure().
+    """
+    math_logic = adapter.math_logic
+    rounds = [(f"stress_client_{i % num_players}", f"stress_server_{i % num_players}", 1 + i // num_players, 1.0)
+              for i in range(num_threads * rounds_per_thread)]
+    start = time.perf_counter()
+    expected = [adapter.spin(*round_args) for round_args in rounds]
+    serial_seconds = time.perf_counter() - start
+
+    results = [None] * len(rounds)
+    barrier = threading.Barrier(num_threads)
+    def play(thread_index):
+        barrier.wait() # All threads start together
+        for i in range(thread_index, len(rounds), num_threads):
+            results[i] = adapter.spin(*rounds[i])
+
+    configure = getattr(math_logic, "configure", None)
+    if configure is not None:
+        base_tables = {"PAYTABLE": math_logic.PAYTABLE, "SYMBOL_WEIGHTS": math_logic.SYMBOL_WEIGHTS}
+        variant_tables = {
+            "PAYTABLE": {symbol: {count: payout * 2 for count, payout in payouts.items()}
+                         for symbol, payouts in math_logic.PAYTABLE.items()},
+            "SYMBOL_WEIGHTS": [{symbol: weight + (index % 3) for index, (symbol, weight) in enumerate(sorted(reel.items()))}
+                               for reel in math_logic.SYMBOL_WEIGHTS],
+        }
+        configure(**variant_tables)
+        expected_variant = [adapter.spin(*round_args) for round_args in rounds]
+        configure(**base_tables)
+    reconfigurations = 0
+    serving = threading.Event()
+    def reconfigure():
+        nonlocal reconfigurations
+        while not serving.is_set():
+            configure(**(variant_tables if reconfigurations % 2 == 0 else base_tables))
+            reconfigurations += 1
+
+    threads = [threading.Thread(target=play, args=(thread_index,)) for thread_index in range(num_threads)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    served = None
+    try:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        threaded_seconds = time.perf_counter() - start
+
+        if configure is not None:
+            publisher = threading.Thread(target=reconfigure)
+            publisher.start()
+            try:
+                with ThreadedSpinServer(adapter, max_workers=num_threads) as server:
+                    served = server.spin_all(rounds)
+            finally:
+                serving.set()
+                publisher.join()
+                configure(**base_tables)
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return {
+        "rounds": len(rounds),
+        "mismatches": sum(1 for result, reference in zip(results, expected) if result != reference),
+        "server_mismatches": None if served is None else sum(
+            1 for result, reference, variant in zip(served, expected, expected_variant) if result not in (reference, variant)),
+        "variant_rounds": None if served is None else sum(
+            1 for result, reference, variant in zip(served, expected, expected_variant) if result == variant != reference),
+        "reconfigurations": reconfigurations,
+        "serial_seconds": serial_seconds,
+        "threaded_seconds": threaded_seconds,
+    }
+
+# Example usage: python serving.py
+if __name__ == "__main__":
+    from urllib.request import urlopen
+
+    from GameMath import GameMath, StakeMathAdapter
+
+    adapter = StakeMathAdapter(GameMath())
+    client_seed = "test_client_seed_123"
+    server_seed = "test_server_seed_abc"
+    bet_amount = 1.0
+
+    # 1. Background precompute of upcoming nonces (player think time between spins)
+    print("\n--- Speculative Precompute (next nonces per seed pair) ---")
+    num_rounds = 200
+    think_time = 0.002
+    latencies = {}
+    results = {}
+    for label in ("direct", "precompute"):
+        if label == "precompute":
+            precomputer = adapter.enable_precompute(depth=4)
+        seconds = 0.0
+        results[label] = []
+        for round_nonce in range(1, num_rounds + 1):
+            start = time.perf_counter()
+            results[label].append(adapter.spin(client_seed, server_seed, round_nonce, bet_amount))
+            seconds += time.perf_counter() - start
+            time.sleep(think_time)
+        latencies[label] = seconds / num_rounds
+    rotated = adapter.spin(client_seed, "rotated_server_seed", 1, bet_amount) # New server seed: old pair dropped
+    adapter.disable_precompute()
+    print(f"  Results identical to direct spins: {results['direct'] == results['precompute']}")
+    print(f"  Rotated pair matches direct spin: {rotated == adapter.spin(client_seed, 'rotated_server_seed', 1, bet_amount)}")
+    print(f"  Mean spin() latency: direct {latencies['direct'] * 1e6:.0f}us, "
+          f"precompute {latencies['precompute'] * 1e6:.0f}us")
+    print(f"  Precompute stats: {dict(precomputer.stats)}")
+
+    # 2. One shared instance serving many threads
+    print("\n--- Multi-Threaded Serving (shared GameMath) ---")
+    stress = run_thread_stress_test(adapter, num_threads=8, rounds_per_thread=250)
+    print(f"  Stress test: {stress['rounds']} rounds on 8 threads, {stress['mismatches']} mismatches "
+          f"(serial {stress['serial_seconds']:.2f}s, threaded {stress['threaded_seconds']:.2f}s)")
+    print(f"  ThreadedSpinServer under {stress['reconfigurations']} concurrent reconfigurations: "
+          f"{stress['variant_rounds']} rounds from the variant tables, {stress['server_mismatches']} mixing both")
+    with ThreadedSpinServer(adapter, max_workers=8) as server:
+        served = server.spin_all([(client_seed, server_seed, round_nonce, bet_amount) for round_nonce in range(1, 101)])
+    print(f"  ThreadedSpinServer results match direct spins: {served == results['direct'][:100]}")
+
+    # 3. Serving metrics (Prometheus text via the pull API and a local /metrics endpoint)
+    print("\n--- Serving Metrics ---")
+    rounds = [(client_seed, server_seed, round_nonce, bet_amount) for round_nonce in range(1, 5001)]
+    timings = {}
+    for label in ("disabled", "enabled"):
+        if label == "enabled":
+            metrics = adapter.enable_metrics()
+        start = time.perf_counter()
+        measured = [adapter.spin(*round_args) for round_args in rounds]
+        timings[label] = (time.perf_counter() - start) / len(rounds)
+    print(f"  Results unchanged with metrics: {measured[:200] == results['direct']}")
+    print(f"  Mean spin() time: disabled {timings['disabled'] * 1e6:.1f}us, enabled {timings['enabled'] * 1e6:.1f}us")
+    with adapter.serve_metrics(port=0) as metrics_server:
+        scraped = urlopen(metrics_server.url).read().decode()
+    print(f"  Scraped {len(scraped.splitlines())} lines from {metrics_server.url}, e.g.:")
+    for line in scraped.splitlines():
+        if line.startswith(("bombaroat_spins_total", "bombaroat_winning_spins_total")) or 'le="+Inf"' in line:
+            print(f"    {line}")
+    snapshot = metrics.snapshot()
+    print(f"  p50/p99 spin latency <= {snapshot['latency']['spin']['p50'] * 1e6:.0f}us / "
+          f"{snapshot['latency']['spin']['p99'] * 1e6:.0f}us; win categories {snapshot['win_categories']}")
+    adapter.disable_metrics()
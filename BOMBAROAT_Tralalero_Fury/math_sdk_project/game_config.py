@@ -11,6 +11,17 @@ class GameParams:
         self.SYMBOLS = self._define_symbols()
         self.PAYLINES = self._define_paylines()
         self.PAYTABLE = self._define_paytable()
+        # Win evaluation: "lines" pays along PAYLINES, "ways" pays every left-to-right reel combination
+        # (GRID_ROWS ** GRID_COLS ways; see win_calculations.calculate_ways_wins)
+        self.WIN_EVALUATION = "lines"
+        # Cascading (tumble) reels for the base game: winning cells are removed and refilled from the strips until
+        # the grid stops winning (see game_executables/cascade_calculations.py)
+        self.CASCADE_REELS = False
+        self.MAX_CASCADES = 50
+        # Lean base books: base spins are evaluated for payout and triggers only and their books omit the wins_info
+        # event, which run.explain_book rebuilds from the grid for the books that are served. Like every instance
+        # setting, it reaches distributed workers through checkpoint.game_params_settings
+        self.LEAN_BASE_BOOKS = False
         self.REEL_STRIPS = self._define_reel_strips() # Placeholder for now
 
         # Bonus trigger definitions
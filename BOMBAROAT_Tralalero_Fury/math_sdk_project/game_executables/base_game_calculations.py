@@ -5,29 +5,13 @@
 
 # To ensure it works for subtask if run directly as script, let's assume win_calculations.py is in path
 import win_calculations # Simpler for now
+from outcome_types import SpinOutcome
 
-def evaluate_base_spin_outcome(grid, game_params):
+def evaluate_scatters_and_triggers(grid, game_params):
     """
-    Evaluates a single base game spin.
-    - grid: The 5x4 grid of symbol IDs.
-    - game_params: An instance of GameParams from game_config.py (or a mock).
+    The grid's SCATTER_MULT wins and feature triggers (the non-line part of evaluate_base_spin_outcome).
+    Returns (scatter_wins, total_scatter_payout, triggered_features).
     """
-    
-    if not grid or not game_params:
-        print("Error: Missing grid or game_params for base spin evaluation.")
-        return {
-            "line_wins": [], "scatter_wins": [], 
-            "total_payout_multiplier": 0, "triggered_features": [],
-            "grid_played": grid or []
-        }
-
-    all_line_wins, total_line_payout = win_calculations.calculate_line_wins(
-        grid,
-        game_params.PAYLINES,
-        game_params.PAYTABLE,
-        game_params.SYMBOLS
-    )
-    
     # Ensure SCATTER_MULT symbol ID exists before trying to use it
     scatter_mult_symbol_id = None
     for sid, sdata in game_params.SYMBOLS.items():
@@ -48,8 +32,6 @@ def evaluate_base_spin_outcome(grid, game_params):
             game_params.SYMBOLS
         )
     
-    total_payout_for_spin = total_line_payout + total_scatter_payout
-    
     triggered_features = []
     
     # Check for Free Spins trigger (Tralalero)
@@ -88,13 +70,66 @@ def evaluate_base_spin_outcome(grid, game_params):
         # print("Debug: BOMBAROAT_BONUS_SYMBOL_ID not defined in game_params.")
         pass
 
-    return {
-        "line_wins": all_line_wins,
-        "scatter_wins": scatter_wins,
-        "total_payout_multiplier": total_payout_for_spin,
-        "triggered_features": triggered_features,
-        "grid_played": grid # For reference
-    }
+    return scatter_wins, total_scatter_payout, triggered_features
+
+def evaluate_base_spin_outcome(grid, game_params):
+    """
+    Evaluates a single base game spin.
+    - grid: The 5x4 grid of symbol IDs.
+    - game_params: An instance of GameParams from game_config.py (or a mock).
+    """
+    
+    if not grid or not game_params:
+        print("Error: Missing grid or game_params for base spin evaluation.")
+        return SpinOutcome([], [], 0, [], grid or [])
+
+    # Payline or ways wins, per game_params.WIN_EVALUATION
+    all_line_wins, total_line_payout = win_calculations.calculate_grid_wins(grid, game_params)
+    
+    scatter_wins, total_scatter_payout, triggered_features = evaluate_scatters_and_triggers(grid, game_params)
+    total_payout_for_spin = total_line_payout + total_scatter_payout
+
+    return SpinOutcome(all_line_wins, scatter_wins, total_payout_for_spin, triggered_features,
+                       grid) # grid_played, for reference
+
+def evaluate_base_spin_payout(grid, game_params):
+    """
+    Lean evaluation of a base game spin for RTP runs and lookup tables: the same total payout and trigger counts as
+    evaluate_base_spin_outcome, without building any win records.
+    Returns (total_payout_multiplier, free_spins_symbol_count, bonus_symbol_count); use triggered_features() and
+    explain() for the details of the spins that need them.
+    """
+    total_payout = win_calculations.calculate_grid_payout(grid, game_params)
+    scatter_mult_symbol_id = win_calculations.find_scatter_mult_symbol_id(game_params.SYMBOLS)
+    free_spins_symbol_id = getattr(game_params, "FREE_SPINS_SYMBOL_ID", None)
+    bonus_symbol_id = getattr(game_params, "BOMBAROAT_BONUS_SYMBOL_ID", None)
+    scatter_count = fs_scatter_count = bonus_symbol_count = 0
+    for row in grid:
+        for symbol_id in row:
+            if symbol_id == scatter_mult_symbol_id:
+                scatter_count += 1
+            elif symbol_id == free_spins_symbol_id:
+                fs_scatter_count += 1
+            elif symbol_id == bonus_symbol_id:
+                bonus_symbol_count += 1
+    if scatter_count:
+        total_payout += game_params.PAYTABLE.get(scatter_mult_symbol_id, {}).get(scatter_count, 0)
+    return total_payout, fs_scatter_count if free_spins_symbol_id else 0, bonus_symbol_count if bonus_symbol_id else 0
+
+def triggered_features(fs_scatter_count, bonus_symbol_count, game_params):
+    """The triggered_features list of evaluate_base_spin_outcome, from evaluate_base_spin_payout's counts."""
+    features = []
+    if getattr(game_params, "FREE_SPINS_SYMBOL_ID", None) and fs_scatter_count >= game_params.FREE_SPINS_TRIGGER_COUNT:
+        features.append({"feature_type": "TRALALERO_FREE_SPINS", "symbol_id": game_params.FREE_SPINS_SYMBOL_ID,
+                         "count": fs_scatter_count})
+    if getattr(game_params, "BOMBAROAT_BONUS_SYMBOL_ID", None) and bonus_symbol_count >= game_params.BOMBAROAT_BONUS_TRIGGER_COUNT:
+        features.append({"feature_type": "BOMBAROAT_BONUS", "symbol_id": game_params.BOMBAROAT_BONUS_SYMBOL_ID,
+                         "count": bonus_symbol_count})
+    return features
+
+def explain(grid, game_params):
+    """The full SpinOutcome (every line / ways and scatter win) of a grid evaluated lean, rebuilt on demand."""
+    return evaluate_base_spin_outcome(grid, game_params)
 
 # Example usage (for testing this module directly)
 if __name__ == "__main__":
@@ -176,3 +211,10 @@ if __name__ == "__main__":
     print(f"  Scatter Wins: {outcome_scatter['scatter_wins']}")
     print(f"  Total Payout Multiplier: {outcome_scatter['total_payout_multiplier']}") # Expected: 5
     print(f"  Triggered Features: {outcome_scatter['triggered_features']}")
+
+    for test_grid in (test_grid_base, test_grid_no_bonus, test_grid_scatter_win):
+        total, fs_count, bonus_count = evaluate_base_spin_payout(test_grid, mock_params)
+        full = explain(test_grid, mock_params)
+        assert total == full["total_payout_multiplier"]
+        assert triggered_features(fs_count, bonus_count, mock_params) == full["triggered_features"]
+    print("\nLean evaluation matches the full outcome on all test grids.")
@@ -1,6 +1,7 @@
 # bombardino_bonus_calculations.py
 import random
 import win_calculations # Assumed accessible
+from outcome_types import FeatureResult
 
 # Placeholder for grid generation, similar to free spins module
 def generate_grid_for_bonus_spin(game_params):
@@ -14,9 +15,11 @@ def generate_grid_for_bonus_spin(game_params):
     # print("Warning: Bonus spin grid generation is using random.choice (placeholder).")
     return grid
 
-def apply_wild_expansions(grid, game_params):
+def apply_wild_expansions(grid, game_params, changed_cells=None):
     """
     Applies random wild expansions based on config.
+    - changed_cells: optional list; the (row, col) of every cell turned WILD is appended to it, so line results
+      of the original grid can be updated with win_calculations.IncrementalLineEvaluator.
     """
     transformed_grid = [row[:] for row in grid] # Create a copy
     
@@ -59,6 +62,8 @@ def apply_wild_expansions(grid, game_params):
         for i in range(min(num_wilds_to_add, len(empty_positions))):
             r, c = empty_positions[i]
             transformed_grid[r][c] = wild_symbol_id
+            if changed_cells is not None:
+                changed_cells.append((r, c))
             # print(f"Debug: Added WILD at ({r},{c}) for Bombardino Bonus")
 
     elif config.get("wild_expansion_type") == "expand_existing_wilds":
@@ -75,28 +80,34 @@ def apply_wild_expansions(grid, game_params):
         for i in range(min(num_wilds_to_add, len(empty_positions))):
             r, c = empty_positions[i]
             transformed_grid[r][c] = wild_symbol_id
+            if changed_cells is not None:
+                changed_cells.append((r, c))
         # print("Warning: 'expand_existing_wilds' in Bombardino is using placeholder logic (adds 1-2 random wilds).")
         pass
             
     return transformed_grid
 
-def simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=0, initial_grid=None):
+def simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=0, initial_grid=None, hit_recorder=None,
+                                      grid_generator=None):
     """
     Simulates the entire Bombardino Bonus feature.
     - game_params: Instance of GameParams.
     - triggering_bonus_count: Number of BONUS symbols that triggered (optional, for future extension)
     - initial_grid: The grid that triggered the feature (optional, for context).
+    - hit_recorder: Optional HitCountRecorder; every evaluated grid is added (line hits only) to its round in progress.
+    - grid_generator: Optional replacement for generate_grid_for_bonus_spin (same signature), e.g. an
+      importance sampler that biases the drawn symbols and tracks the likelihood ratio.
     """
     if not hasattr(game_params, 'bombardino_bonus_config') or \
        not isinstance(game_params.bombardino_bonus_config, dict):
         print("Error: bombardino_bonus_config missing or invalid in game_params.")
-        return {"total_feature_payout": 0, "spins_played": 0, "events": ["Bonus config error."]}
+        return FeatureResult(0, 0, ["Bonus config error."])
 
     bonus_config = game_params.bombardino_bonus_config
     num_bonus_spins = bonus_config.get("num_bonus_spins", 0) # Default to 0 if not specified
     
     if num_bonus_spins == 0:
-         return {"total_feature_payout": 0, "spins_played": 0, "events": ["No bonus spins awarded due to config."]}
+         return FeatureResult(0, 0, ["No bonus spins awarded due to config."])
 
     total_feature_payout = 0
     feature_events = []
@@ -107,7 +118,7 @@ def simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=0, ini
     for i in range(num_bonus_spins):
         spins_played_count += 1
         
-        spin_grid = generate_grid_for_bonus_spin(game_params)
+        spin_grid = (grid_generator or generate_grid_for_bonus_spin)(game_params)
         transformed_grid = apply_wild_expansions(spin_grid, game_params)
         
         feature_events.append({
@@ -117,9 +128,9 @@ def simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=0, ini
             # For detailed logging, one might include which wilds were added/expanded
         })
         
-        line_wins, line_payout = win_calculations.calculate_line_wins(
-            transformed_grid, game_params.PAYLINES, game_params.PAYTABLE, game_params.SYMBOLS
-        )
+        line_wins, line_payout = win_calculations.calculate_grid_wins(transformed_grid, game_params) # Lines or ways
+        if hit_recorder is not None:
+            hit_recorder.record_grid(transformed_grid, include_scatter=False)
         
         # Scatter wins are typically not part of these types of "sticky/expanding wild" bonus spins
         # unless specifically designed. Assuming only line wins contribute for Bombardino.
@@ -135,12 +146,8 @@ def simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=0, ini
             
     feature_events.append("Bombardino Bonus complete.")
             
-    return {
-        "total_feature_payout": total_feature_payout,
-        "spins_played": spins_played_count,
-        "events": feature_events,
-        "final_grid_example_if_needed": transformed_grid # Example
-    }
+    return FeatureResult(total_feature_payout, spins_played_count, feature_events,
+                         final_grid_example_if_needed=transformed_grid) # Example
 
 # Example Usage (for testing this module directly)
 if __name__ == "__main__":
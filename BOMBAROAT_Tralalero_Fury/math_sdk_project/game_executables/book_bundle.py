@@ -0,0 +1,149 @@
+# book_bundle.py
+# Range-fetchable book bundles for the frontend (frontend/src/services/bookBundle.ts).
+# The books of each mode are packed into books_<mode>.bundle: blocks of up to block_books JSONL lines, each block
+# an independent gzip member, so one HTTP range request of a block plus DecompressionStream("gzip") yields those
+# books without downloading the rest. books_<mode>.index holds one (byte offset, first book id) pair per block as
+# little-endian float64 (exact for offsets and ids below 2**53), followed by the bundle length; manifest.json
+# lists the modes with their file names and counts. Any static file server with Range support can serve them.
+import gzip
+import json
+import os
+import struct
+
+from outcome_types import json_default
+
+BUNDLE_VERSION = 1
+DEFAULT_BLOCK_BOOKS = 64
+
+def _book_id(line):
+    """Book id of one JSONL line; BookEncoder lines start with {"id": N, so json is only parsed for others."""
+    if line.startswith(b'{"id": '):
+        end = line.find(b",", 7)
+        if end > 7 and line[7:end].isdigit():
+            return int(line[7:end])
+    return json.loads(line)["id"]
+
+def _book_lines(source, book_encoder=None):
+    """JSONL lines (no newline) from a books file path, or from an iterable of entries encoded with book_encoder."""
+    if isinstance(source, str):
+        with (gzip.open(source, "rb") if source.endswith(".gz") else open(source, "rb")) as f:
+            for line in f:
+                line = line.rstrip(b"\r\n")
+                if line.strip():
+                    yield line
+    else:
+        for entry in source:
+            yield book_encoder.encode(entry) if book_encoder is not None else json.dumps(entry, default=json_default).encode()
+
+def write_book_bundle(books, output_dir, book_encoder=None, block_books: int = DEFAULT_BLOCK_BOOKS):
+    """
+    Packs {mode: books_<mode>.jsonl[.gz] path or list of book entries} into output_dir and writes manifest.json.
+    Entries are encoded with book_encoder (a BookEncoder) when given. Returns the manifest dict.
+    """
+    if block_books < 1:
+        raise ValueError("block_books must be at least 1.")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {"version": BUNDLE_VERSION, "compression": "gzip", "block_books": block_books, "modes": {}}
+    for mode, source in books.items():
+        bundle_name, index_name = f"books_{mode}.bundle", f"books_{mode}.index"
+        num_books = 0
+        index = []
+        with open(os.path.join(output_dir, bundle_name), "wb") as bundle:
+            block = []
+            for line in _book_lines(source, book_encoder):
+                block.append(line)
+                if len(block) == block_books:
+                    index.append((bundle.tell(), _book_id(block[0])))
+                    bundle.write(gzip.compress(b"\n".join(block) + b"\n", mtime=0))
+                    num_books += len(block)
+                    block = []
+            if block:
+                index.append((bundle.tell(), _book_id(block[0])))
+                bundle.write(gzip.compress(b"\n".join(block) + b"\n", mtime=0))
+                num_books += len(block)
+            bundle_bytes = bundle.tell()
+        if not num_books:
+            os.remove(os.path.join(output_dir, bundle_name))
+            continue
+        with open(os.path.join(output_dir, index_name), "wb") as f:
+            f.write(b"".join(struct.pack("<dd", offset, first_id) for offset, first_id in index))
+            f.write(struct.pack("<d", bundle_bytes))
+        manifest["modes"][mode] = {"bundle": bundle_name, "index": index_name, "books": num_books,
+                                   "blocks": len(index), "bytes": bundle_bytes}
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+class BookBundle:
+    """Python counterpart of the frontend client: reads single books from a bundle by position or id."""
+    def __init__(self, bundle_dir, mode):
+        with open(os.path.join(bundle_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if mode not in self.manifest["modes"]:
+            raise ValueError(f"Bundle in {bundle_dir} has no mode {mode!r}.")
+        self.info = self.manifest["modes"][mode]
+        self.block_books = self.manifest["block_books"]
+        with open(os.path.join(bundle_dir, self.info["index"]), "rb") as f:
+            values = [value for (value,) in struct.iter_unpack("<d", f.read())]
+        self.block_offsets = [int(value) for value in values[0:-1:2]] + [int(values[-1])]
+        self.first_ids = [int(value) for value in values[1::2]]
+        self.path = os.path.join(bundle_dir, self.info["bundle"])
+
+    def __len__(self):
+        return self.info["books"]
+
+    def read_block(self, block_index):
+        """Book entries of one block, reading only its byte range."""
+        start, end = self.block_offsets[block_index], self.block_offsets[block_index + 1]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = gzip.decompress(f.read(end - start))
+        return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+    def book(self, position):
+        """The book at this position (0-based, in bundle order)."""
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self.read_block(position // self.block_books)[position % self.block_books]
+
+    def book_by_id(self, book_id):
+        """The book with this id; blocks are searched by first id, so ids must increase through the bundle."""
+        low, high = 0, len(self.first_ids)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.first_ids[middle] <= book_id:
+                low = middle
+            else:
+                high = middle
+        for book in self.read_block(low):
+            if book["id"] == book_id:
+                return book
+        raise KeyError(book_id)
+
+def bundle_book_files(book_paths, output_dir, block_books: int = DEFAULT_BLOCK_BOOKS):
+    """write_book_bundle for {mode: books file path}, e.g. a streamed or distributed run's book_paths."""
+    return write_book_bundle({mode: path for mode, path in book_paths.items() if os.path.exists(path)},
+                             output_dir, block_books=block_books)
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+    import run
+
+    params = GameParams()
+    run.NUM_SIM_ARGS.update({"base": 20000, "tralalero_free_spins": 200, "bombardino_bonus": 500})
+    books = run.run_simulations(params)["books"]
+    with tempfile.TemporaryDirectory() as output_dir:
+        manifest = write_book_bundle(books, output_dir, run.BookEncoder(params))
+        for mode, info in manifest["modes"].items():
+            jsonl_bytes = len(run.BookEncoder(params).encode_lines(books[mode]))
+            bundle = BookBundle(output_dir, mode)
+            position = len(bundle) // 2
+            average_block = info["bytes"] / info["blocks"]
+            print(f"{mode}: {info['books']} books, JSONL {jsonl_bytes / 1e6:.2f} MB -> bundle {info['bytes'] / 1e6:.2f} MB "
+                  f"in {info['blocks']} blocks (~{average_block / 1e3:.1f} kB per range request); "
+                  f"book {position} matches: {bundle.book(position) == json.loads(json.dumps(books[mode][position], default=json_default))}, "
+                  f"by id: {bundle.book_by_id(books[mode][-1]['id'])['id'] == books[mode][-1]['id']}")
@@ -0,0 +1,245 @@
+# book_store.py
+# Random access to books_<mode>.jsonl[.gz|.zst] files by book id and by payout.
+# The first open of a books file scans it once and writes a sidecar index (<books file>.idx.npz): for every book
+# its id, payout, the compressed block holding it and the line's offset and length within that block, plus the
+# byte range of every block. Plain JSONL is a single block (the file itself). Compressed books are read by block:
+# every gzip member (StreamingOutput writes one per flush, write_books one per 1000 books) or zstd frame is
+# decompressed on its own, so fetching a book costs one block, not the file. The books file is memory-mapped, so
+# only the pages of the blocks actually read are loaded.
+import json
+import mmap
+import os
+import re
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import zstandard # Optional: only needed for .zst books
+except ImportError:
+    zstandard = None
+
+INDEX_VERSION = 1
+_READ_CHUNK = 1 << 20 # Compressed bytes fed to a decompressor at a time while indexing
+_ID_PATTERN = re.compile(rb'^\{"id": (-?\d+),')
+_PAYOUT_PATTERN = re.compile(rb'"payoutMultiplier": (-?[0-9.eE+-]+)[,}]')
+
+def _compression(path):
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"Reading {path} needs the zstandard package (pip install zstandard).")
+        return "zstd"
+    return None
+
+def _decompress_block(compression, data):
+    if compression == "gzip":
+        return zlib.decompress(data, wbits=31)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+def _iter_blocks(data, compression):
+    """(start, end, decompressed bytes) of every gzip member / zstd frame in data (the whole file for plain JSONL)."""
+    if compression is None:
+        yield 0, len(data), data
+        return
+    start = 0
+    while start < len(data):
+        decompressor = zlib.decompressobj(wbits=31) if compression == "gzip" else zstandard.ZstdDecompressor().decompressobj()
+        chunks = []
+        fed = start
+        while not decompressor.eof and fed < len(data):
+            chunk = data[fed:fed + _READ_CHUNK]
+            fed += len(chunk)
+            chunks.append(decompressor.decompress(chunk))
+        if not decompressor.eof:
+            raise ValueError(f"Truncated {compression} block at byte {start}.")
+        end = fed - len(decompressor.unused_data) # The block ends where the decompressor stopped consuming
+        yield start, end, b"".join(chunks)
+        start = end
+
+def _id_and_payout(line):
+    id_match, payout_match = _ID_PATTERN.match(line), _PAYOUT_PATTERN.search(line)
+    if id_match and payout_match:
+        return int(id_match.group(1)), float(payout_match.group(1))
+    book = json.loads(line)
+    return book["id"], float(book["payoutMultiplier"])
+
+def build_index(path, index_path=None):
+    """Scans a books file and writes its sidecar index; returns the index path."""
+    compression = _compression(path)
+    ids, payouts, blocks, offsets, lengths = [], [], [], [], []
+    block_ranges = []
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        for block, (start, end, text) in enumerate(_iter_blocks(data, compression)):
+            block_ranges.append((start, end))
+            line_start = 0
+            while line_start < len(text):
+                line_end = text.find(b"\n", line_start)
+                if line_end < 0:
+                    line_end = len(text)
+                line = text[line_start:line_end]
+                if line.strip():
+                    book_id, payout = _id_and_payout(line)
+                    ids.append(book_id)
+                    payouts.append(payout)
+                    blocks.append(block)
+                    offsets.append(line_start)
+                    lengths.append(line_end - line_start)
+                line_start = line_end + 1
+        if isinstance(data, mmap.mmap):
+            data.close()
+    ids = np.asarray(ids, dtype=np.int64)
+    payouts = np.asarray(payouts, dtype=np.float64)
+    id_order = np.argsort(ids, kind="stable")
+    if len(ids) > 1 and (np.diff(ids[id_order]) == 0).any():
+        raise ValueError(f"{path} contains duplicate book ids.")
+    payout_order = np.lexsort((ids, payouts)) # Ids of each payout, ascending
+    stat = os.stat(path)
+    index_path = index_path or path + ".idx.npz"
+    temp_path = index_path + ".tmp.npz"
+    np.savez(temp_path,
+             version=np.int64(INDEX_VERSION), source_size=np.int64(stat.st_size), source_mtime_ns=np.int64(stat.st_mtime_ns),
+             sorted_ids=ids[id_order], rows=id_order.astype(np.int64),
+             blocks=np.asarray(blocks, dtype=np.int64), offsets=np.asarray(offsets, dtype=np.int64),
+             lengths=np.asarray(lengths, dtype=np.int64), payouts=payouts,
+             payout_ids=ids[payout_order], payout_values=payouts[payout_order],
+             block_ranges=np.asarray(block_ranges, dtype=np.int64).reshape(-1, 2))
+    os.replace(temp_path, index_path)
+    return index_path
+
+class BookStore:
+    """
+    Books of one books file by id (get / get_raw) and by payout (ids_with_payout). The sidecar index is built on
+    first use and rebuilt whenever the books file's size or modification time no longer match it.
+    """
+    def __init__(self, path, index_path=None, cached_blocks: int = 8):
+        self.path = path
+        self.index_path = index_path or path + ".idx.npz"
+        self.compression = _compression(path)
+        stat = os.stat(path)
+        index = self._load_index(stat)
+        if index is None:
+            build_index(path, self.index_path)
+            index = self._load_index(stat)
+        self._sorted_ids, self._rows = index["sorted_ids"], index["rows"]
+        self._blocks, self._offsets, self._lengths = index["blocks"], index["offsets"], index["lengths"]
+        self._payouts = index["payouts"]
+        self._payout_ids, self._payout_values = index["payout_ids"], index["payout_values"]
+        self._block_ranges = index["block_ranges"]
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b"" # mmap cannot map 0 bytes
+        self._cached_blocks = cached_blocks
+        self._block_cache = OrderedDict() # block -> decompressed bytes, least recently used first
+
+    def _load_index(self, stat):
+        if not os.path.exists(self.index_path):
+            return None
+        with np.load(self.index_path) as index:
+            if int(index["version"]) != INDEX_VERSION or int(index["source_size"]) != stat.st_size \
+               or int(index["source_mtime_ns"]) != stat.st_mtime_ns:
+                return None # Stale: the books file changed since the index was built
+            return {key: index[key] for key in index.files}
+
+    def __len__(self):
+        return len(self._sorted_ids)
+
+    def __contains__(self, book_id):
+        return self._row(book_id) is not None
+
+    @property
+    def ids(self):
+        return self._sorted_ids
+
+    def get_raw(self, book_id):
+        """The book's JSONL line (bytes, no newline)."""
+        row = self._row(book_id)
+        if row is None:
+            raise KeyError(book_id)
+        offset, length = int(self._offsets[row]), int(self._lengths[row])
+        if self.compression is None:
+            return bytes(self._data[offset:offset + length])
+        return self._block(int(self._blocks[row]))[offset:offset + length]
+
+    def get(self, book_id):
+        return json.loads(self.get_raw(book_id))
+
+    def payout(self, book_id):
+        row = self._row(book_id)
+        if row is None:
+            raise KeyError(book_id)
+        return float(self._payouts[row])
+
+    def ids_with_payout(self, payout):
+        """Ids (ascending) of the books paying exactly this multiplier."""
+        start = np.searchsorted(self._payout_values, payout, side="left")
+        end = np.searchsorted(self._payout_values, payout, side="right")
+        return self._payout_ids[start:end]
+
+    def payout_counts(self):
+        """{payout: number of books}."""
+        values, counts = np.unique(self._payout_values, return_counts=True)
+        return {float(value): int(count) for value, count in zip(values, counts)}
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _row(self, book_id):
+        position = int(np.searchsorted(self._sorted_ids, book_id))
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == book_id:
+            return int(self._rows[position])
+        return None
+
+    def _block(self, block):
+        text = self._block_cache.get(block)
+        if text is None:
+            start, end = self._block_ranges[block]
+            text = _decompress_block(self.compression, self._data[int(start):int(end)])
+            self._block_cache[block] = text
+            if len(self._block_cache) > self._cached_blocks:
+                self._block_cache.popitem(last=False)
+        else:
+            self._block_cache.move_to_end(block)
+        return text
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+    from checkpoint import read_books
+    import run
+
+    params = GameParams()
+    run.NUM_SIM_ARGS.update({"base": 50000, "tralalero_free_spins": 0, "bombardino_bonus": 0})
+    books = run.run_simulations(params)["books"]
+    with tempfile.TemporaryDirectory() as output_dir:
+        for compression in (False, True):
+            path = run.write_books(run.BookEncoder(params), books, output_dir, compression=compression)["base"]
+            start = time.perf_counter()
+            store = BookStore(path)
+            index_seconds = time.perf_counter() - start
+            wanted = books["base"][-1]["id"]
+            start = time.perf_counter()
+            scanned = next(book for book in read_books(path) if book["id"] == wanted)
+            scan_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            found = store.get(wanted)
+            get_seconds = time.perf_counter() - start
+            top_payout = max(store.payout_counts())
+            print(f"{os.path.basename(path)}: index {index_seconds:.2f}s, last book by scan {scan_seconds * 1e3:.1f}ms, "
+                  f"by BookStore {get_seconds * 1e3:.2f}ms, same: {found == scanned}; "
+                  f"top payout {top_payout}x ids {store.ids_with_payout(top_payout).tolist()}")
+            store.close()
@@ -0,0 +1,184 @@
+# cascade_calculations.py
+# Cascading (tumble) reels on top of the grid and reel strip model of run.sdk_generate_grid_from_reels.
+# After a winning evaluation the winning cells are removed, the symbols above them drop down, and each reel is
+# refilled from the top by continuing its strip upwards (row r shows strip[stop + r], so the next symbols in are
+# strip[stop - 1], strip[stop - 2], ...). The grid is re-evaluated until it no longer wins or max_cascades is hit.
+# Payline wins are re-evaluated incrementally: every payline's current win is kept, and after a tumble only the
+# paylines through cells whose symbol actually changed are evaluated again (win_calculations.IncrementalLineEvaluator).
+# Ways wins (WIN_EVALUATION = "ways") already cost O(symbols x reels) per grid and are simply recomputed.
+# Scatter wins and feature triggers are evaluated once, on the final grid. SCATTER_FS and BONUS never pay on lines
+# or ways, so they are never removed; SCATTER_MULT is in PAYTABLE and is paid as a line (or ways) symbol too, so its
+# cells in a winning line are removed like any other. Symbols that fell in can complete any of them.
+import random
+from collections import Counter
+
+import win_calculations
+from base_game_calculations import evaluate_scatters_and_triggers
+from outcome_types import CascadeOutcome, CascadeStep
+
+DEFAULT_MAX_CASCADES = 50
+
+class CascadeEngine:
+    """
+    Cascading spins for one GameParams. The reel strips are read from game_params at every spin, so a
+    configuration whose REEL_STRIPS are replaced (e.g. restored from a checkpoint) needs no new engine.
+    incremental=False re-evaluates every payline after each tumble (reference behaviour for checking).
+    """
+    def __init__(self, game_params, max_cascades=None, incremental: bool = True):
+        self.game_params = game_params
+        self.max_cascades = max_cascades if max_cascades is not None else \
+            getattr(game_params, "MAX_CASCADES", DEFAULT_MAX_CASCADES)
+        if self.max_cascades < 0:
+            raise ValueError("max_cascades must be at least 0.")
+        self.incremental = incremental
+        self.rows = game_params.GRID_ROWS
+        self.cols = game_params.GRID_COLS
+        self.ways = getattr(game_params, "WIN_EVALUATION", "lines") == "ways"
+        self.wild_symbol_id = win_calculations.find_wild_symbol_id(game_params.SYMBOLS)
+        self.line_evaluator = win_calculations.IncrementalLineEvaluator(
+            game_params.PAYLINES, game_params.PAYTABLE, game_params.SYMBOLS, self.rows, self.cols)
+        self.stats = Counter() # spins, cascades, lines_evaluated, lines_full (what full re-evaluation would cost)
+
+    def _strips(self):
+        strips = []
+        for c in range(self.cols):
+            strip = self.game_params.REEL_STRIPS.get(f"reel_{c+1}", [])
+            if not strip:
+                raise ValueError(f"Cascading reels need a non-empty reel strip for reel_{c+1}.")
+            strips.append(strip)
+        return strips
+
+    def spin(self, stops=None, rng=random):
+        """
+        One cascading base spin -> CascadeOutcome. stops: per-reel start positions (random ones from rng when None),
+        with the same meaning as in run.sdk_generate_grid_from_reels.
+        """
+        params = self.game_params
+        strips = self._strips()
+        if stops is None:
+            stops = [rng.randint(0, len(strip) - 1) for strip in strips]
+        grid = [[strips[c][(stops[c] + r) % len(strips[c])] for c in range(self.cols)] for r in range(self.rows)]
+        grid_played = [row[:] for row in grid]
+        next_positions = [stop - 1 for stop in stops] # Strip position of the next symbol to fall in, per reel
+
+        wins, total_payout = self._evaluate_full(grid)
+        initial_wins = list(wins.values()) if not self.ways else wins
+        cascades = []
+        while total_payout_of(wins) > 0 and len(cascades) < self.max_cascades:
+            removed = self._winning_cells(grid, wins)
+            changed, fill = self._tumble(grid, removed, strips, next_positions)
+            wins = self._evaluate_after_tumble(grid, wins, changed)
+            step_payout = total_payout_of(wins)
+            cascades.append(CascadeStep(sorted([r, c] for r, c in removed), fill, self._compact_wins(wins), step_payout))
+            total_payout += step_payout
+
+        scatter_wins, total_scatter_payout, triggered_features = evaluate_scatters_and_triggers(grid, params)
+        self.stats["spins"] += 1
+        self.stats["cascades"] += len(cascades)
+        return CascadeOutcome(initial_wins, scatter_wins, total_payout + total_scatter_payout, triggered_features,
+                              grid_played, cascades)
+
+    def _evaluate_full(self, grid):
+        """Line wins as {line_index: LineWin} (ways wins as a list) and their total."""
+        if self.ways:
+            return win_calculations.calculate_ways_wins(grid, self.game_params.PAYTABLE, self.game_params.SYMBOLS)
+        wins = self.line_evaluator.evaluate(grid)
+        self.stats["lines_evaluated"] += len(self.game_params.PAYLINES)
+        self.stats["lines_full"] += len(self.game_params.PAYLINES)
+        return wins, total_payout_of(wins)
+
+    def _evaluate_after_tumble(self, grid, wins, changed):
+        if self.ways or not self.incremental:
+            return self._evaluate_full(grid)[0]
+        # Lines through unchanged cells only keep their win
+        self.stats["lines_evaluated"] += self.line_evaluator.update(grid, wins, changed)
+        self.stats["lines_full"] += len(self.game_params.PAYLINES)
+        return wins
+
+    def _winning_cells(self, grid, wins):
+        if not self.ways:
+            return {cell for line_win in wins.values() for cell in line_win.line_coordinates[:line_win.match_count]}
+        cells = set()
+        for ways_win in wins:
+            for c in range(ways_win.match_count):
+                for r in range(self.rows):
+                    if grid[r][c] == ways_win.symbol_id or grid[r][c] == self.wild_symbol_id:
+                        cells.add((r, c))
+        return cells
+
+    def _tumble(self, grid, removed, strips, next_positions):
+        """Drops and refills the reels in place; returns (cells whose symbol changed, new symbols per reel)."""
+        removed_rows = [[] for _ in range(self.cols)]
+        for r, c in removed:
+            removed_rows[c].append(r)
+        changed, fill = [], []
+        for c, rows in enumerate(removed_rows):
+            if not rows:
+                fill.append([])
+                continue
+            strip = strips[c]
+            new_symbols = [strip[(next_positions[c] - len(rows) + 1 + i) % len(strip)] for i in range(len(rows))]
+            next_positions[c] -= len(rows)
+            column = new_symbols + [grid[r][c] for r in range(self.rows) if r not in rows]
+            for r in range(max(rows) + 1): # Cells below the lowest removed one do not move
+                if grid[r][c] != column[r]:
+                    grid[r][c] = column[r]
+                    changed.append((r, c))
+            fill.append(new_symbols)
+        return changed, fill
+
+    def _compact_wins(self, wins):
+        if self.ways:
+            return [[win.symbol_id, win.match_count, win.ways, win.payout_multiplier] for win in wins]
+        return [[line_index, win.symbol_id, win.match_count, win.payout_multiplier]
+                for line_index, win in sorted(wins.items())]
+
+def total_payout_of(wins):
+    """Total payout of {line_index: LineWin} or a list of WaysWin."""
+    return sum(win.payout_multiplier for win in (wins.values() if isinstance(wins, dict) else wins))
+
+def replay_cascades(grid_played, cascades):
+    """The grid after each tumble, rebuilt from a book's initial grid and its compact cascade steps."""
+    grid = [row[:] for row in grid_played]
+    grids = []
+    for step in cascades:
+        for c, new_symbols in enumerate(step["fill"]):
+            removed = {r for r, removed_c in step["removed"] if removed_c == c}
+            if removed:
+                column = list(new_symbols) + [grid[r][c] for r in range(len(grid)) if r not in removed]
+                for r, symbol_id in enumerate(column):
+                    grid[r][c] = symbol_id
+        grids.append([row[:] for row in grid])
+    return grids
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    num_spins = 20000
+    spin_stops = [[random.Random(seed).randint(0, len(params.REEL_STRIPS[f"reel_{c+1}"]) - 1) for c in range(params.GRID_COLS)]
+                  for seed in range(num_spins)]
+    results = {}
+    for incremental in (True, False):
+        engine = CascadeEngine(params, incremental=incremental)
+        start = time.perf_counter()
+        results[incremental] = [engine.spin(stops) for stops in spin_stops]
+        seconds = time.perf_counter() - start
+        print(f"{'incremental' if incremental else 'full re-evaluation'}: {seconds:.2f}s, "
+              f"{engine.stats['cascades']} tumbles over {num_spins} spins, "
+              f"{engine.stats['lines_evaluated']} of {engine.stats['lines_full']} payline evaluations")
+    same = all(a == b for a, b in zip(results[True], results[False]))
+    # Books only keep the initial grid and the compact steps: replay them and re-check every step's wins
+    replay_ok = all(
+        win_calculations.calculate_grid_wins(grid, params)[1] == step["payout_multiplier"]
+        for outcome in results[True] if outcome["cascades"]
+        for grid, step in zip(replay_cascades(outcome["grid_played"], outcome["cascades"]), outcome["cascades"]))
+    longest = max(results[True], key=lambda outcome: len(outcome["cascades"]))
+    print(f"Incremental and full results identical: {same}; replayed steps pay as recorded: {replay_ok}")
+    print(f"Longest sequence: {len(longest['cascades'])} tumbles paying {longest['total_payout_multiplier']}x; "
+          f"RTP estimate {sum(outcome['total_payout_multiplier'] for outcome in results[True]) / num_spins:.4f}x")
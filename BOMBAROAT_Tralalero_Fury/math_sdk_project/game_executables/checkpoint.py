@@ -0,0 +1,155 @@
+# checkpoint.py
+# Checkpoint / resume support for long simulation runs (run.py).
+# A checkpointed run streams its books and lookup tables to files instead of keeping them in memory, and
+# periodically saves everything needed to continue: the `random` module state, the per-mode round cursor,
+# the statistics accumulators and the byte length of every output file at that point. Resuming truncates the
+# outputs back to those lengths and carries on from the cursor, so the finished files and statistics are
+# identical to those of an uninterrupted run.
+import ast
+import gzip
+import json
+import os
+import pickle
+
+CHECKPOINT_VERSION = 2 # 2: run_key (NUM_SIM_ARGS, run conditions, GameParams settings) instead of num_sim_args
+
+class PayoutStatistics:
+    """Running payout statistics of one mode (rounds, RTP, hit rate, standard deviation, max payout)."""
+    def __init__(self):
+        self.rounds = 0
+        self.total_payout = 0.0
+        self.total_payout_squared = 0.0
+        self.hits = 0
+        self.max_payout = 0
+
+    def add(self, payout):
+        self.rounds += 1
+        self.total_payout += payout
+        self.total_payout_squared += payout * payout
+        if payout > 0:
+            self.hits += 1
+        if payout > self.max_payout:
+            self.max_payout = payout
+
+    def summary(self):
+        if not self.rounds:
+            return {"rounds": 0, "rtp": 0, "hit_rate": 0, "std_dev": 0, "max_payout_multiplier": 0}
+        mean = self.total_payout / self.rounds
+        return {
+            "rounds": self.rounds,
+            "rtp": mean,
+            "hit_rate": self.hits / self.rounds,
+            "std_dev": max(self.total_payout_squared / self.rounds - mean * mean, 0.0) ** 0.5,
+            "max_payout_multiplier": self.max_payout,
+        }
+
+def game_params_settings(game_params):
+    """
+    Every instance setting of a GameParams (paytable, paylines, reel strips, WIN_EVALUATION, feature configs, ...)
+    as a Python literal string. Strips are shuffled per instance and any setting may be edited after construction,
+    so this is what another process needs to rebuild the same configuration (apply_game_params_settings).
+    Private attributes (caches such as run.py's cascade engine) are not settings and are left out.
+    """
+    public = {name: value for name, value in vars(game_params).items() if not name.startswith("_")}
+    settings = repr(public)
+    try:
+        if ast.literal_eval(settings) != public:
+            raise ValueError
+    except (ValueError, SyntaxError):
+        raise ValueError("GameParams settings must be plain literals (dicts, lists, tuples, strings, numbers, bools).") from None
+    return settings
+
+def apply_game_params_settings(game_params, settings):
+    """Overwrites game_params' instance settings with a game_params_settings() string; returns game_params."""
+    vars(game_params).update(ast.literal_eval(settings))
+    return game_params
+
+class StreamingOutput:
+    """
+    Append-only books_<mode>.jsonl[.gz] and lookUpTable_<mode>.csv files under output_dir.
+    Records are buffered and only reach the files on flush(), which returns the file lengths to store in a
+    checkpoint. With compression every flush appends one gzip member (a multi-member .gz file reads as one
+    stream), so a compressed book can be truncated back to any flushed length.
+    """
+    def __init__(self, output_dir, book_encoder, modes, compression=False, offsets=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.book_encoder = book_encoder
+        self.compression = compression
+        self.book_paths = {mode: os.path.join(output_dir, f"books_{mode}.jsonl" + (".gz" if compression else "")) for mode in modes}
+        self.lookup_paths = {mode: os.path.join(output_dir, f"lookUpTable_{mode}.csv") for mode in modes}
+        self._files = {}
+        for path in list(self.book_paths.values()) + list(self.lookup_paths.values()):
+            if offsets is None:
+                f = open(path, "wb") # Fresh run
+            else:
+                if path not in offsets:
+                    raise ValueError(f"Checkpoint has no offset for {path}.")
+                f = open(path, "r+b") if os.path.exists(path) else open(path, "w+b")
+                f.truncate(offsets[path]) # Drop whatever was written after the checkpoint
+                f.seek(offsets[path])
+            self._files[path] = f
+        self._books = {mode: [] for mode in modes}
+        self._lookups = {mode: [] for mode in modes}
+
+    def add(self, mode, book_entry, lookup_entry):
+        self._books[mode].append(book_entry)
+        self._lookups[mode].append(lookup_entry)
+
+    def flush(self):
+        """Writes the buffered records, syncs the files to disk and returns {path: length}."""
+        for mode, entries in self._books.items():
+            if entries:
+                data = self.book_encoder.encode_lines(entries)
+                self._files[self.book_paths[mode]].write(gzip.compress(data, mtime=0) if self.compression else data)
+                entries.clear()
+        for mode, entries in self._lookups.items():
+            if entries:
+                self._files[self.lookup_paths[mode]].write("".join(entry + "\n" for entry in entries).encode())
+                entries.clear()
+        offsets = {}
+        for path, f in self._files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            offsets[path] = f.tell()
+        return offsets
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+def read_books(path):
+    """Book entries from a books_<mode>.jsonl or .jsonl.gz file, one at a time."""
+    with (gzip.open(path, "rt") if path.endswith(".gz") else open(path)) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_lookup_entries(path):
+    with open(path) as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+def save_checkpoint(path, state):
+    """Writes state atomically: a crash while saving leaves the previous checkpoint in place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(dict(state, version=CHECKPOINT_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def load_checkpoint(path):
+    """The saved state, or None if there is no checkpoint at path."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {path} has version {state.get('version')}, expected {CHECKPOINT_VERSION}.")
+    return state
+
+def remove_checkpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,390 @@
+# distributed.py
+# Distributed book simulation: a coordinator splits the run.py modes into leases (a mode and a range of round
+# indices) and hands them to worker processes over TCP; workers simulate their lease and send the encoded
+# books and lookup lines back. No shared filesystem or queue service is needed, so workers can run on any host
+# that can reach the coordinator. Locally, run_distributed() starts the workers as subprocesses.
+#
+# Every round is seeded from (seed, mode, round index) alone, so a round's outcome does not depend on which
+# worker ran it, in what order, or how the run was cut into leases. Leases held by a worker whose connection
+# drops (or that exceeds lease_timeout) go back to the queue; a lease completed twice is kept once. Shards
+# are merged in (mode, round) order into the same books_<mode>.jsonl[.gz] / lookUpTable_<mode>.csv files a
+# checkpointed run.py writes, so the output is identical for any number of workers and any failures.
+#
+# Wire format: one JSON header line per message, followed by header["payload_bytes"] raw bytes if present.
+import gzip
+import hashlib
+import json
+import os
+import random
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from book_encoder import BOOKS_PER_GZIP_MEMBER, BookEncoder
+from checkpoint import PayoutStatistics, apply_game_params_settings, game_params_settings
+
+SIM_MODES = ("base", "tralalero_free_spins", "bombardino_bonus")
+DEFAULT_LEASE_ROUNDS = {"base": 10000, "tralalero_free_spins": 200, "bombardino_bonus": 1000}
+DEFAULT_LEASE_TIMEOUT = 600.0 # Seconds before a lease held by an unresponsive worker is re-issued
+WORKER_POLL_SECONDS = 0.2
+
+def _send(sock_file, header, payload=b""):
+    header = dict(header, payload_bytes=len(payload))
+    sock_file.write(json.dumps(header).encode() + b"\n" + payload)
+    sock_file.flush()
+
+def _receive(sock_file):
+    """(header, payload), or (None, b"") when the peer has closed the connection."""
+    line = sock_file.readline()
+    if not line:
+        return None, b""
+    header = json.loads(line)
+    payload = sock_file.read(header["payload_bytes"]) if header["payload_bytes"] else b""
+    if len(payload) != header["payload_bytes"]:
+        return None, b"" # Connection lost mid-message
+    return header, payload
+
+def plan_leases(num_sim_args, lease_rounds=None):
+    """
+    Leases in merge order. Sim ids follow run.py: consecutive across modes in SIM_MODES order, starting at 1.
+    Each lease: {"lease_id", "mode", "start", "stop", "first_sim_id"} (sim id of round i is first_sim_id + i).
+    """
+    lease_rounds = dict(DEFAULT_LEASE_ROUNDS, **(lease_rounds or {}))
+    leases = []
+    sim_id_counter = 1
+    for mode in SIM_MODES:
+        num_rounds = num_sim_args.get(mode, 0)
+        for start in range(0, num_rounds, lease_rounds[mode]):
+            leases.append({"lease_id": len(leases), "mode": mode, "start": start,
+                           "stop": min(start + lease_rounds[mode], num_rounds), "first_sim_id": sim_id_counter})
+        sim_id_counter += max(num_rounds, 0)
+    return leases
+
+def simulate_lease(game_params, lease, seed, stratified_base_rounds=None, book_encoder=None):
+    """
+    Runs one lease and returns (books JSONL bytes, lookup CSV bytes). Round i of a mode is seeded with
+    f"{seed}-{mode}-{i}" (the global `random` module, which the feature simulators draw from).
+    stratified_base_rounds: total base rounds of the run, to draw base stops from StratifiedStopSampler.
+    """
+    import run # The per-round simulation helpers live in run.py
+
+    book_encoder = book_encoder or BookEncoder(game_params)
+    stop_sampler = None
+    if lease["mode"] == "base" and stratified_base_rounds:
+        stop_sampler = run.StratifiedStopSampler(game_params, stratified_base_rounds)
+    books, lookups = [], []
+    for i in range(lease["start"], lease["stop"]):
+        random.seed(f"{seed}-{lease['mode']}-{i}")
+        sim_id = lease["first_sim_id"] + i
+        if lease["mode"] == "base":
+            book_entry, payout = run.simulate_base_round(game_params, sim_id,
+                                                         grid_stops=stop_sampler.stops_for(i) if stop_sampler else None)
+        elif lease["mode"] == "tralalero_free_spins":
+            book_entry, payout = run.simulate_free_spins_round(game_params, sim_id)
+        else:
+            book_entry, payout = run.simulate_bonus_round(game_params, sim_id)
+        books.append(book_entry)
+        lookups.append(f"{sim_id},1,{payout}\n")
+    return book_encoder.encode_lines(books), "".join(lookups).encode()
+
+class LeaseTable:
+    """Thread-safe lease bookkeeping for the coordinator."""
+    def __init__(self, leases, lease_timeout=DEFAULT_LEASE_TIMEOUT, completed=()):
+        self.leases = {lease["lease_id"]: lease for lease in leases}
+        self.lease_timeout = lease_timeout
+        self.completed = set(completed)
+        self.pending = deque(lease_id for lease_id in self.leases if lease_id not in self.completed)
+        self.in_flight = {} # lease_id -> (worker_id, deadline)
+        self.reissued = 0
+        self._lock = threading.Lock()
+        self.all_done = threading.Event()
+        if len(self.completed) == len(self.leases):
+            self.all_done.set()
+
+    def acquire(self, worker_id):
+        """A lease for worker_id, None if there is nothing to hand out right now."""
+        with self._lock:
+            now = time.monotonic()
+            for lease_id, (_, deadline) in list(self.in_flight.items()):
+                if deadline < now: # Unresponsive worker: give its lease to someone else
+                    del self.in_flight[lease_id]
+                    self.pending.append(lease_id)
+                    self.reissued += 1
+            while self.pending:
+                lease_id = self.pending.popleft()
+                if lease_id not in self.completed:
+                    self.in_flight[lease_id] = (worker_id, now + self.lease_timeout)
+                    return self.leases[lease_id]
+            return None
+
+    def complete(self, lease_id):
+        """Marks a lease done; False if it already was (a re-issued lease finished twice)."""
+        with self._lock:
+            self.in_flight.pop(lease_id, None)
+            if lease_id in self.completed:
+                return False
+            self.completed.add(lease_id)
+            if len(self.completed) == len(self.leases):
+                self.all_done.set()
+            return True
+
+    def release_worker(self, worker_id):
+        """Puts the leases of a disconnected worker back at the front of the queue."""
+        with self._lock:
+            for lease_id, (holder, _) in list(self.in_flight.items()):
+                if holder == worker_id:
+                    del self.in_flight[lease_id]
+                    if lease_id not in self.completed:
+                        self.pending.appendleft(lease_id)
+                        self.reissued += 1
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker_id = f"{self.client_address[0]}:{self.client_address[1]}"
+        try:
+            while True:
+                header, payload = _receive(self.rfile)
+                if header is None:
+                    return
+                if header["type"] == "hello":
+                    _send(self.wfile, {"type": "config", **coordinator.job})
+                elif header["type"] == "request":
+                    if coordinator.table.all_done.is_set():
+                        _send(self.wfile, {"type": "done"})
+                        return
+                    lease = coordinator.table.acquire(worker_id)
+                    _send(self.wfile, {"type": "lease", "lease": lease} if lease else {"type": "wait"})
+                elif header["type"] == "result":
+                    coordinator.store_result(header["lease_id"], payload[:header["books_bytes"]], payload[header["books_bytes"]:])
+                    _send(self.wfile, {"type": "ack"})
+        except (ConnectionError, OSError, ValueError):
+            return
+        finally:
+            coordinator.table.release_worker(worker_id)
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class Coordinator:
+    """
+    Serves the leases of one run on (host, port) and stores finished shards under output_dir/shards.
+    Shards left by an earlier coordinator for the same job are kept, so a restarted coordinator only
+    re-simulates the leases that had not finished.
+    """
+    def __init__(self, game_params, num_sim_args, output_dir, seed=0, lease_rounds=None, host="127.0.0.1", port=0,
+                 lease_timeout=DEFAULT_LEASE_TIMEOUT, compression=False, stratified=False):
+        self.output_dir = output_dir
+        self.compression = compression
+        self.num_sim_args = {mode: num_sim_args.get(mode, 0) for mode in SIM_MODES}
+        self.leases = plan_leases(self.num_sim_args, lease_rounds)
+        self.job = {
+            "seed": seed,
+            # All instance settings: strips are shuffled per GameParams instance, and WIN_EVALUATION, CASCADE_REELS,
+            # LEAN_BASE_BOOKS, PAYTABLE edits, ... must reach the workers and tell one job from another
+            "game_params": game_params_settings(game_params),
+            "stratified_base_rounds": self.num_sim_args["base"] if stratified else None,
+        }
+        self.shard_dir = os.path.join(output_dir, "shards")
+        job_id = hashlib.sha256(json.dumps([self.job, self.leases], sort_keys=True).encode()).hexdigest()
+        manifest_path = os.path.join(self.shard_dir, "job.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f).get("job_id") != job_id:
+                    shutil.rmtree(self.shard_dir) # Shards of another job
+        os.makedirs(self.shard_dir, exist_ok=True)
+        with open(manifest_path, "w") as f:
+            json.dump({"job_id": job_id}, f)
+        completed = [lease["lease_id"] for lease in self.leases if os.path.exists(self._shard_path(lease, "csv"))]
+        self.table = LeaseTable(self.leases, lease_timeout, completed)
+        self.server = _ThreadingServer((host, port), _CoordinatorHandler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+
+    def _shard_path(self, lease, extension):
+        return os.path.join(self.shard_dir, f"{lease['mode']}-{lease['start']:012d}.{extension}")
+
+    def store_result(self, lease_id, books, lookups):
+        lease = self.table.leases[lease_id]
+        if lease_id in self.table.completed:
+            return # Re-issued lease finished twice; the shards are already stored (and identical)
+        # Books first, lookups last: an existing lookup shard marks the lease complete on restart
+        for data, extension in ((books, "jsonl"), (lookups, "csv")):
+            path = self._shard_path(lease, extension)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        self.table.complete(lease_id)
+
+    def serve(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wait(self, timeout=None):
+        return self.table.all_done.wait(timeout)
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def merge(self):
+        """
+        Concatenates the shards in (mode, round) order into books_<mode>.jsonl[.gz] and lookUpTable_<mode>.csv.
+        Compressed books get one gzip member per BOOKS_PER_GZIP_MEMBER books across shard boundaries, the same
+        bytes write_books produces, so book_store.BookStore decompresses one block per lookup.
+        """
+        book_paths, lookup_paths, statistics = {}, {}, {mode: PayoutStatistics() for mode in SIM_MODES}
+        for mode in SIM_MODES:
+            book_paths[mode] = os.path.join(self.output_dir, f"books_{mode}.jsonl" + (".gz" if self.compression else ""))
+            lookup_paths[mode] = os.path.join(self.output_dir, f"lookUpTable_{mode}.csv")
+            with open(book_paths[mode], "wb") as books, open(lookup_paths[mode], "wb") as lookups:
+                block = [] # Book lines not yet compressed
+                for lease in self.leases:
+                    if lease["mode"] != mode:
+                        continue
+                    with open(self._shard_path(lease, "jsonl"), "rb") as shard:
+                        if not self.compression:
+                            shutil.copyfileobj(shard, books)
+                        else:
+                            block.extend(shard.read().splitlines(keepends=True))
+                            while len(block) >= BOOKS_PER_GZIP_MEMBER:
+                                books.write(gzip.compress(b"".join(block[:BOOKS_PER_GZIP_MEMBER]), mtime=0))
+                                del block[:BOOKS_PER_GZIP_MEMBER]
+                    with open(self._shard_path(lease, "csv"), "rb") as shard:
+                        data = shard.read()
+                    lookups.write(data)
+                    for line in data.decode().splitlines():
+                        payout = line.rsplit(",", 1)[1]
+                        statistics[mode].add(float(payout) if "." in payout or "e" in payout else int(payout))
+                if block:
+                    books.write(gzip.compress(b"".join(block), mtime=0))
+        return book_paths, lookup_paths, statistics
+
+def run_worker(host, port, max_leases=None):
+    """Worker loop: asks the coordinator for leases until it reports the run done. Returns leases completed."""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    with socket.create_connection((host, port)) as sock:
+        sock_file = sock.makefile("rwb")
+        _send(sock_file, {"type": "hello"})
+        job, _ = _receive(sock_file)
+        game_params = apply_game_params_settings(GameParams(), job["game_params"])
+        book_encoder = BookEncoder(game_params)
+        completed = 0
+        while max_leases is None or completed < max_leases:
+            _send(sock_file, {"type": "request"})
+            header, _ = _receive(sock_file)
+            if header is None or header["type"] == "done":
+                break
+            if header["type"] == "wait":
+                time.sleep(WORKER_POLL_SECONDS)
+                continue
+            lease = header["lease"]
+            books, lookups = simulate_lease(game_params, lease, job["seed"], job["stratified_base_rounds"], book_encoder)
+            _send(sock_file, {"type": "result", "lease_id": lease["lease_id"], "books_bytes": len(books)}, books + lookups)
+            _receive(sock_file)
+            completed += 1
+        return completed
+
+def start_local_worker(host, port, max_leases=None):
+    """Worker subprocess on this machine (its stdout, mostly GameParams banners, is discarded)."""
+    command = [sys.executable, os.path.abspath(__file__), "worker", host, str(port)]
+    if max_leases is not None:
+        command.append(str(max_leases))
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+def run_distributed(game_params, num_sim_args, output_dir, num_workers=4, seed=0, lease_rounds=None,
+                    compression=False, stratified=False, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+    """
+    Runs the whole job on localhost: a coordinator plus num_workers worker subprocesses (a worker that exits
+    early is replaced while leases remain). Returns run.py-style output with book/lookup paths and statistics.
+    """
+    coordinator = Coordinator(game_params, num_sim_args, output_dir, seed=seed, lease_rounds=lease_rounds,
+                              lease_timeout=lease_timeout, compression=compression, stratified=stratified)
+    coordinator.serve()
+    host, port = coordinator.address
+    workers = [start_local_worker(host, port) for _ in range(num_workers)]
+    restarts_left = 3 * num_workers
+    try:
+        while not coordinator.wait(0.5):
+            for k, worker in enumerate(workers):
+                if worker.poll() is not None: # Died (its leases are re-issued on disconnect); start a replacement
+                    if restarts_left == 0:
+                        raise RuntimeError(f"Workers keep exiting (last exit code {worker.returncode}); giving up.")
+                    restarts_left -= 1
+                    workers[k] = start_local_worker(host, port)
+    finally:
+        for worker in workers:
+            try:
+                worker.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+        coordinator.shutdown()
+    book_paths, lookup_paths, statistics = coordinator.merge()
+    return {
+        "books": {mode: [] for mode in SIM_MODES}, # Streamed to disk, see book_paths
+        "lookups": {mode: [] for mode in SIM_MODES},
+        "book_paths": book_paths,
+        "lookup_paths": lookup_paths,
+        "statistics": {mode: mode_statistics.summary() for mode, mode_statistics in statistics.items()},
+        "reissued_leases": coordinator.table.reissued,
+    }
+
+# Worker entry point: python distributed.py worker HOST PORT [MAX_LEASES]
+# Example usage (for testing this module directly): python distributed.py
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "worker":
+        run_worker(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]) if len(sys.argv) > 4 else None)
+        sys.exit(0)
+
+    import tempfile
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    num_sim_args = {"base": 20000, "tralalero_free_spins": 200, "bombardino_bonus": 1000}
+    lease_rounds = {"base": 2000, "tralalero_free_spins": 20, "bombardino_bonus": 100}
+    digests = []
+    for num_workers, compression in ((1, False), (4, False), (4, True)):
+        output_dir = tempfile.mkdtemp()
+        start = time.time()
+        coordinator = Coordinator(params, num_sim_args, output_dir, seed=7, lease_rounds=lease_rounds, compression=compression)
+        coordinator.serve()
+        host, port = coordinator.address
+        workers = [start_local_worker(host, port) for _ in range(num_workers)]
+        time.sleep(2.0)
+        workers[0].kill() # Simulated crash mid-lease: its lease goes back to the queue
+        if num_workers == 1:
+            workers.append(start_local_worker(host, port))
+        coordinator.wait()
+        for worker in workers:
+            worker.wait()
+        coordinator.shutdown()
+        book_paths, lookup_paths, statistics = coordinator.merge()
+        digest = hashlib.sha256()
+        for mode in SIM_MODES:
+            with (gzip.open(book_paths[mode], "rb") if compression else open(book_paths[mode], "rb")) as f:
+                digest.update(f.read())
+            with open(lookup_paths[mode], "rb") as f:
+                digest.update(f.read())
+        digests.append(digest.hexdigest())
+        print(f"{num_workers} worker(s){', compressed' if compression else ''}: {time.time() - start:.1f}s, base RTP {statistics['base'].summary()['rtp']:.4f}x, "
+              f"re-issued leases {coordinator.table.reissued}, output digest {digests[-1][:16]}")
+        shutil.rmtree(output_dir)
+    print(f"Identical output: {len(set(digests)) == 1}")
+
+    # Instance settings reach the workers: a lean run writes base books without wins_info
+    params.LEAN_BASE_BOOKS = True
+    output_dir = tempfile.mkdtemp()
+    output = run_distributed(params, {"base": 2000}, output_dir, num_workers=2, seed=7, lease_rounds=lease_rounds)
+    with open(output["book_paths"]["base"]) as f:
+        lean = all(not any(event["type"] == "wins_info" for event in json.loads(line)["events"]) for line in f)
+    print(f"LEAN_BASE_BOOKS honoured by the workers: {lean}")
+    shutil.rmtree(output_dir)
@@ -0,0 +1,482 @@
+# evaluator_benchmark.py
+# Differential testing and benchmarking of grid evaluators.
+# Every registered evaluator maps a grid to a canonical result (total payout, line wins, scatter wins, feature
+# triggers) so evaluators with different record shapes can be compared: GameMath.calculate_wins (+ its bonus
+# trigger check), win_calculations.calculate_line_wins / calculate_scatter_wins, evaluate_base_spin_outcome, and
+# any fast path added later. The harness runs them all on the same randomized, adversarial and feature-simulated
+# grid corpora, reports every disagreement with the reference (the first registered evaluator) and the throughput
+# of each. The reference is brute_force_evaluator, which shares no evaluation code with win_calculations.
+import os
+import random
+import sys
+import time
+from itertools import product
+
+import win_calculations
+from base_game_calculations import evaluate_base_spin_outcome, evaluate_base_spin_payout, triggered_features
+from bombardino_bonus_calculations import simulate_bombardino_bonus_feature
+from tralalero_free_spins_calculations import simulate_tralalero_free_spins_feature
+
+# Canonical feature names: GameMath.check_bonus_triggers "type" / base_game_calculations "feature_type"
+_FEATURE_NAMES = {
+    "free_spins": "free_spins", "TRALALERO_FREE_SPINS": "free_spins",
+    "bombardino_bonus": "bonus", "BOMBAROAT_BONUS": "bonus",
+}
+
+def canonical_result(total_payout, line_wins=(), scatter_wins=(), triggers=()):
+    """
+    Comparable form of one evaluation: (total, line wins, scatter wins, triggers), each part a sorted tuple.
+    line_wins: (line_index, symbol, count, payout), or (ways, symbol, count, payout) for ways wins;
+    scatter_wins: (symbol, count, payout); triggers: (feature, count).
+    """
+    return (total_payout, tuple(sorted(line_wins)), tuple(sorted(scatter_wins)), tuple(sorted(triggers)))
+
+def _symbol_id(symbols, name_or_id):
+    """Symbol id for an id or a symbol name (GameMath's trigger symbols are given by name)."""
+    if name_or_id in symbols:
+        return name_or_id
+    for symbol_id, data in symbols.items():
+        if data.get("name", "").lower() == str(name_or_id).lower():
+            return symbol_id
+    return None
+
+class GameMathConfig:
+    """
+    GameParams-style view (SYMBOLS, PAYLINES, PAYTABLE, *_SYMBOL_ID / *_TRIGGER_COUNT) of a GameMath instance,
+    so the math_sdk_project evaluators can run on GameMath's configuration.
+    """
+    def __init__(self, game_math):
+        self.GRID_ROWS, self.GRID_COLS = game_math.GRID_ROWS, game_math.GRID_COLS
+        self.SYMBOLS, self.PAYLINES, self.PAYTABLE = game_math.SYMBOLS, game_math.PAYLINES, game_math.PAYTABLE
+        self.SYMBOL_WEIGHTS = game_math.SYMBOL_WEIGHTS
+        self.FREE_SPINS_SYMBOL_ID = _symbol_id(self.SYMBOLS, game_math.FREE_SPINS_TRIGGER_SYMBOL)
+        self.FREE_SPINS_TRIGGER_COUNT = game_math.FREE_SPINS_TRIGGER_COUNT
+        self.BOMBAROAT_BONUS_SYMBOL_ID = _symbol_id(self.SYMBOLS, game_math.BONUS_ROUND_TRIGGER_SYMBOL)
+        self.BOMBAROAT_BONUS_TRIGGER_COUNT = game_math.BONUS_ROUND_TRIGGER_COUNT
+
+# --- Independent reference ---
+
+def brute_force_evaluator(config, grid_wins_only: bool = False):
+    """
+    Reference evaluator written from the game rules by exhaustive matching, sharing no evaluation code with
+    win_calculations (only its symbol lookups):
+    - lines: every payline is tried against every (symbol, count) entry of the paytable. An entry matches when the
+      line's first `count` cells are the symbol or WILD, the next cell (if any) is neither, and the symbol leads
+      the line (its first non-WILD cell; WILD only for an all-WILD line).
+    - ways: every left-to-right path (one cell per reel) through the reels a symbol reaches is enumerated and
+      counted when it holds at least one real symbol; paths of WILDs alone pay as WILD when they cover every reel.
+    - SCATTER_MULT pays for its exact count anywhere; triggers count the feature symbols on the whole grid.
+    grid_wins_only: the line / ways total alone (e.g. for ways_payout_evaluator).
+    """
+    wild_id = win_calculations.find_wild_symbol_id(config.SYMBOLS)
+    scatter_id = win_calculations.find_scatter_mult_symbol_id(config.SYMBOLS)
+    ways = getattr(config, "WIN_EVALUATION", "lines") == "ways"
+    trigger_symbols = [("free_spins", getattr(config, "FREE_SPINS_SYMBOL_ID", None), getattr(config, "FREE_SPINS_TRIGGER_COUNT", 0)),
+                       ("bonus", getattr(config, "BOMBAROAT_BONUS_SYMBOL_ID", None), getattr(config, "BOMBAROAT_BONUS_TRIGGER_COUNT", 0))]
+
+    def line_wins(grid):
+        wins = []
+        for line_index, line in enumerate(config.PAYLINES):
+            cells = [grid[r][c] for r, c in line]
+            lead = next((symbol_id for symbol_id in cells if symbol_id != wild_id), wild_id)
+            for symbol_id, payouts in config.PAYTABLE.items():
+                for count, payout in payouts.items():
+                    if symbol_id == lead and 0 < count <= len(cells) and \
+                       all(cell in (symbol_id, wild_id) for cell in cells[:count]) and \
+                       (count == len(cells) or cells[count] not in (symbol_id, wild_id)):
+                        wins.append((line_index, symbol_id, count, payout))
+        return wins
+
+    def ways_wins(grid):
+        rows, reels = len(grid), len(grid[0])
+        wins = []
+        for symbol_id, payouts in config.PAYTABLE.items():
+            if symbol_id == wild_id:
+                continue
+            matching_rows = []
+            for c in range(reels):
+                reel_rows = [r for r in range(rows) if grid[r][c] in (symbol_id, wild_id)]
+                if not reel_rows:
+                    break
+                matching_rows.append(reel_rows)
+            count = len(matching_rows)
+            paths = sum(1 for path in product(*matching_rows)
+                        if any(grid[r][c] == symbol_id for c, r in enumerate(path))) if count else 0
+            if paths and count in payouts:
+                wins.append((paths, symbol_id, count, payouts[count] * paths))
+        if wild_id in config.PAYTABLE and reels in config.PAYTABLE[wild_id]:
+            paths = sum(1 for _ in product(*([r for r in range(rows) if grid[r][c] == wild_id] for c in range(reels))))
+            if paths:
+                wins.append((paths, wild_id, reels, config.PAYTABLE[wild_id][reels] * paths))
+        return wins
+
+    def evaluate(grid):
+        wins = ways_wins(grid) if ways else line_wins(grid)
+        total = sum(win[3] for win in wins)
+        if grid_wins_only:
+            return canonical_result(total)
+        scatter_wins = []
+        scatter_count = sum(row.count(scatter_id) for row in grid)
+        if scatter_id in config.SYMBOLS and scatter_id in config.PAYTABLE and scatter_count in config.PAYTABLE[scatter_id]:
+            scatter_wins.append((scatter_id, scatter_count, config.PAYTABLE[scatter_id][scatter_count]))
+            total += config.PAYTABLE[scatter_id][scatter_count]
+        triggers = []
+        for feature, symbol_id, trigger_count in trigger_symbols:
+            count = sum(row.count(symbol_id) for row in grid)
+            if symbol_id and count >= trigger_count:
+                triggers.append((feature, count))
+        return canonical_result(total, wins, scatter_wins, triggers)
+    return evaluate
+
+def payout_only(evaluate):
+    """An evaluator reduced to its total and triggers, for comparing lean (payout-only) evaluators."""
+    def evaluate_payout(grid):
+        total, _, _, triggers = evaluate(grid)
+        return canonical_result(total, triggers=triggers)
+    return evaluate_payout
+
+# --- Evaluator adapters (grid -> canonical result) ---
+
+def game_math_evaluator(game_math):
+    """GameMath.calculate_wins + check_bonus_triggers."""
+    def evaluate(grid):
+        win_results = game_math.calculate_wins(grid)
+        line_wins, scatter_wins = [], []
+        for win in win_results["wins"]:
+            if win.get("type") == "scatter_win":
+                scatter_wins.append((win["symbol"], win["count"], win["payout_multiplier"]))
+            else:
+                line_wins.append((win["line_index"], win["symbol"], win["count"], win["payout_multiplier"]))
+        triggers = [(_FEATURE_NAMES[event["type"]], event["count"]) for event in game_math.check_bonus_triggers(grid)]
+        return canonical_result(win_results["total_win_multiplier"], line_wins, scatter_wins, triggers)
+    return evaluate
+
+def _line_key(win):
+    """line_index of a LineWin, ways of a WaysWin (records or their dicts)."""
+    return win["line_index"] if "line_index" in win else win["ways"]
+
+def _canonical_spin_outcome(outcome):
+    return canonical_result(
+        outcome["total_payout_multiplier"],
+        [(_line_key(win), win["symbol_id"], win["match_count"], win["payout_multiplier"]) for win in outcome["line_wins"]],
+        [(win["symbol_id"], win["count"], win["payout_multiplier"]) for win in outcome["scatter_wins"]],
+        [(_FEATURE_NAMES[feature["feature_type"]], feature["count"]) for feature in outcome["triggered_features"]])
+
+def base_outcome_evaluator(config):
+    """base_game_calculations.evaluate_base_spin_outcome (win_calculations line + scatter wins, trigger counts)."""
+    def evaluate(grid):
+        return _canonical_spin_outcome(evaluate_base_spin_outcome(grid, config))
+    return evaluate
+
+def lean_payout_evaluator(config):
+    """base_game_calculations.evaluate_base_spin_payout (total and trigger counts, no win records)."""
+    def evaluate(grid):
+        total, fs_count, bonus_count = evaluate_base_spin_payout(grid, config)
+        return canonical_result(total, triggers=[(_FEATURE_NAMES[feature["feature_type"]], feature["count"])
+                                                 for feature in triggered_features(fs_count, bonus_count, config)])
+    return evaluate
+
+def win_calculations_evaluator(config):
+    """win_calculations.calculate_grid_wins (lines or ways) + calculate_scatter_wins, triggers counted directly."""
+    scatter_id = win_calculations.find_scatter_mult_symbol_id(config.SYMBOLS)
+    trigger_symbols = [("free_spins", config.FREE_SPINS_SYMBOL_ID, config.FREE_SPINS_TRIGGER_COUNT),
+                       ("bonus", config.BOMBAROAT_BONUS_SYMBOL_ID, config.BOMBAROAT_BONUS_TRIGGER_COUNT)]
+    def evaluate(grid):
+        line_wins, line_payout = win_calculations.calculate_grid_wins(grid, config)
+        scatter_wins, scatter_payout = win_calculations.calculate_scatter_wins(grid, config.PAYTABLE, scatter_id, config.SYMBOLS)
+        triggers = []
+        for feature, symbol_id, trigger_count in trigger_symbols:
+            count = sum(row.count(symbol_id) for row in grid)
+            if symbol_id is not None and count >= trigger_count:
+                triggers.append((feature, count))
+        return canonical_result(
+            line_payout + scatter_payout,
+            [(_line_key(win), win.symbol_id, win.match_count, win.payout_multiplier) for win in line_wins],
+            [(win.symbol_id, win.count, win.payout_multiplier) for win in scatter_wins], triggers)
+    return evaluate
+
+def ways_payout_evaluator(config):
+    """Total of win_calculations.calculate_ways_wins only (no scatters or triggers)."""
+    def evaluate(grid):
+        return canonical_result(win_calculations.calculate_ways_wins(grid, config.PAYTABLE, config.SYMBOLS)[1])
+    return evaluate
+
+def ways_payout_batch_evaluator(config):
+    """Batch counterpart of ways_payout_evaluator: win_calculations.calculate_ways_payouts_batch."""
+    def evaluate(grids):
+        totals = win_calculations.calculate_ways_payouts_batch(grids, config.PAYTABLE, config.SYMBOLS)
+        return [canonical_result(total) for total in totals.tolist()]
+    return evaluate
+
+# --- Grid corpora ---
+
+def _random_grid(config, rng, symbols):
+    return [[rng.choice(symbols) for _ in range(config.GRID_COLS)] for _ in range(config.GRID_ROWS)]
+
+def _weighted_grid(config, rng):
+    """Cells drawn per reel from SYMBOL_WEIGHTS ({reel: {symbol: weight}}), as GameMath spins them."""
+    grid = [[None] * config.GRID_COLS for _ in range(config.GRID_ROWS)]
+    for c in range(config.GRID_COLS):
+        symbols, weights = zip(*sorted(config.SYMBOL_WEIGHTS[c].items()))
+        for r, symbol_id in enumerate(rng.choices(symbols, weights, k=config.GRID_ROWS)):
+            grid[r][c] = symbol_id
+    return grid
+
+def _place(grid, symbol_id, count, rng):
+    """Sets exactly `count` cells of grid to symbol_id (other occurrences are replaced by a filler)."""
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))]
+    filler = next(value for row in grid for value in row if value != symbol_id) if any(
+        value != symbol_id for row in grid for value in row) else None
+    for r, c in cells:
+        if grid[r][c] == symbol_id:
+            grid[r][c] = filler
+    for r, c in rng.sample(cells, min(count, len(cells))):
+        grid[r][c] = symbol_id
+    return grid
+
+def build_corpora(config, num_random: int = 20000, num_adversarial: int = 2000, seed=0):
+    """
+    {corpus name: [grids]} for config:
+    - random: uniform over all symbols; weighted: from SYMBOL_WEIGHTS when the config has them
+    - all_wild_lines: one or more paylines entirely WILD
+    - wild_led_lines: paylines starting with 1-4 WILDs followed by a paying symbol (and WILD/symbol continuations)
+    - scatter_edges: every SCATTER_MULT count from 0 to the grid size
+    - feature_triggers: free spins / bonus symbol counts just below, at and above the trigger counts, alone and
+      together (the grids that trigger features and, inside free spins, retrigger them)
+    """
+    rng = random.Random(seed)
+    symbols = sorted(config.SYMBOLS)
+    wild_id = win_calculations.find_wild_symbol_id(config.SYMBOLS)
+    scatter_id = win_calculations.find_scatter_mult_symbol_id(config.SYMBOLS)
+    paying = sorted(symbol_id for symbol_id in config.PAYTABLE if symbol_id not in (wild_id, scatter_id))
+    cells = config.GRID_ROWS * config.GRID_COLS
+    corpora = {"random": [_random_grid(config, rng, symbols) for _ in range(num_random)]}
+    if getattr(config, "SYMBOL_WEIGHTS", None):
+        corpora["weighted"] = [_weighted_grid(config, rng) for _ in range(num_random)]
+
+    if wild_id is not None:
+        all_wild = []
+        for _ in range(num_adversarial):
+            grid = _random_grid(config, rng, symbols)
+            for line in rng.sample(config.PAYLINES, rng.randint(1, 3)):
+                for r, c in line:
+                    grid[r][c] = wild_id
+            all_wild.append(grid)
+        corpora["all_wild_lines"] = all_wild
+
+        wild_led = []
+        for _ in range(num_adversarial):
+            grid = _random_grid(config, rng, symbols)
+            line = rng.choice(config.PAYLINES)
+            leading = rng.randint(1, len(line) - 1)
+            symbol_id = rng.choice(paying)
+            for position, (r, c) in enumerate(line):
+                if position < leading:
+                    grid[r][c] = wild_id
+                elif position == leading:
+                    grid[r][c] = symbol_id
+                else:
+                    grid[r][c] = rng.choice((symbol_id, wild_id, rng.choice(symbols)))
+            wild_led.append(grid)
+        corpora["wild_led_lines"] = wild_led
+
+    if scatter_id is not None:
+        corpora["scatter_edges"] = [_place(_random_grid(config, rng, symbols), scatter_id, count, rng)
+                                    for count in range(cells + 1) for _ in range(max(1, num_adversarial // (cells + 1)))]
+
+    triggers = [(getattr(config, "FREE_SPINS_SYMBOL_ID", None), getattr(config, "FREE_SPINS_TRIGGER_COUNT", 0)),
+                (getattr(config, "BOMBAROAT_BONUS_SYMBOL_ID", None), getattr(config, "BOMBAROAT_BONUS_TRIGGER_COUNT", 0))]
+    triggers = [(symbol_id, count) for symbol_id, count in triggers if symbol_id is not None]
+    if triggers:
+        feature_grids = []
+        for _ in range(num_adversarial):
+            grid = _random_grid(config, rng, [symbol_id for symbol_id in symbols if symbol_id not in dict(triggers)])
+            for symbol_id, trigger_count in rng.sample(triggers, rng.randint(1, len(triggers))):
+                _place(grid, symbol_id, max(0, trigger_count + rng.choice((-1, 0, 0, 1, 2))), rng)
+            feature_grids.append(grid)
+        corpora["feature_triggers"] = feature_grids
+    return corpora
+
+class GridCollector:
+    """
+    Stand-in for the HitCountRecorder the feature simulators accept: keeps a copy of every grid they evaluate
+    (after symbol transformations / wild expansions) instead of counting hits.
+    """
+    def __init__(self):
+        self.grids = []
+
+    def record_grid(self, grid, include_scatter=True):
+        self.grids.append([list(row) for row in grid])
+
+    def take(self):
+        """The grids collected since the last take()."""
+        grids, self.grids = self.grids, []
+        return grids
+
+def build_feature_corpora(config, num_features: int = 200, seed=0):
+    """
+    {corpus name: [grids]} of the grids the feature simulations evaluate, for a GameParams-style config:
+    - free_spins: every free spin of num_features Tralalero Free Spins features (each triggering scatter count
+      in spins_awarded_by_scatter_count in turn), after its symbol transformations
+    - free_spins_retriggered: the free spins of those features that retriggered
+    - bombardino_bonus: every bonus spin of num_features Bombardino Bonus features, after its wild expansions
+    The simulators draw from the random module, which is seeded for the build and restored afterwards.
+    """
+    random_state = random.getstate()
+    random.seed(seed)
+    collector = GridCollector()
+    corpora = {}
+    try:
+        fs_config = getattr(config, "tralalero_free_spins_config", None)
+        if isinstance(fs_config, dict) and fs_config.get("spins_awarded_by_scatter_count"):
+            scatter_counts = sorted(fs_config["spins_awarded_by_scatter_count"])
+            free_spins, retriggered = [], []
+            for i in range(num_features):
+                result = simulate_tralalero_free_spins_feature(scatter_counts[i % len(scatter_counts)], config,
+                                                               hit_recorder=collector)
+                grids = collector.take()
+                free_spins.extend(grids)
+                if result["retriggered_times"]:
+                    retriggered.extend(grids)
+            corpora["free_spins"] = free_spins
+            if retriggered:
+                corpora["free_spins_retriggered"] = retriggered
+        if isinstance(getattr(config, "bombardino_bonus_config", None), dict):
+            for _ in range(num_features):
+                simulate_bombardino_bonus_feature(config, triggering_bonus_count=getattr(config, "BOMBAROAT_BONUS_TRIGGER_COUNT", 0),
+                                                  hit_recorder=collector)
+            corpora["bombardino_bonus"] = collector.take()
+    finally:
+        random.setstate(random_state)
+    return corpora
+
+# --- Harness ---
+
+class EvaluatorHarness:
+    """
+    Registered evaluators (name -> grid -> canonical_result) run over the same corpora. The first one registered
+    is the reference; run() counts, per evaluator and corpus, the grids whose result differs from it.
+    Batch evaluators (grids -> list of canonical results) are registered with batch=True.
+    """
+    def __init__(self):
+        self.evaluators = {} # name -> (function, batch)
+
+    def register(self, name, evaluate, batch: bool = False):
+        if name in self.evaluators:
+            raise ValueError(f"Evaluator {name!r} is already registered.")
+        self.evaluators[name] = (evaluate, batch)
+        return self
+
+    def run(self, corpora, max_examples: int = 3):
+        """
+        {"reference", "throughput": {evaluator: {corpus: grids per second}},
+         "mismatches": {evaluator: {corpus: {"count", "parts", "examples"}}}}
+        """
+        if not self.evaluators:
+            raise ValueError("No evaluators registered.")
+        reference = next(iter(self.evaluators))
+        throughput = {name: {} for name in self.evaluators}
+        mismatches = {name: {} for name in self.evaluators if name != reference}
+        for corpus_name, grids in corpora.items():
+            results = {}
+            for name, (evaluate, batch) in self.evaluators.items():
+                start = time.perf_counter()
+                results[name] = evaluate(grids) if batch else [evaluate(grid) for grid in grids]
+                seconds = time.perf_counter() - start
+                throughput[name][corpus_name] = len(grids) / seconds if seconds > 0 else float("inf")
+            for name in mismatches:
+                count, parts, examples = 0, set(), []
+                for grid, expected, actual in zip(grids, results[reference], results[name]):
+                    if actual != expected:
+                        count += 1
+                        parts.update(part for part, a, b in zip(("total", "line_wins", "scatter_wins", "triggers"), actual, expected) if a != b)
+                        if len(examples) < max_examples:
+                            examples.append({"grid": grid, "reference": expected, "evaluator": actual})
+                if count:
+                    mismatches[name][corpus_name] = {"count": count, "parts": sorted(parts), "examples": examples}
+        return {"reference": reference, "corpus_sizes": {name: len(grids) for name, grids in corpora.items()},
+                "throughput": throughput, "mismatches": mismatches}
+
+def assert_equivalent(report):
+    """Raises AssertionError naming the first evaluator and corpus that disagree with the reference."""
+    for name, corpora in report["mismatches"].items():
+        for corpus_name, mismatch in corpora.items():
+            example = mismatch["examples"][0]
+            raise AssertionError(
+                f"{name} differs from {report['reference']} on {mismatch['count']} {corpus_name} grids "
+                f"({', '.join(mismatch['parts'])}); e.g. grid {example['grid']}: "
+                f"expected {example['reference']}, got {example['evaluator']}")
+
+def format_report(report):
+    corpus_names = list(report["corpus_sizes"])
+    width = max(len(name) for name in report["throughput"]) + len(" (ref)")
+    lines = [f"{'grids/s':<{width}}  " + "  ".join(f"{name:>16}" for name in corpus_names)]
+    for name, rates in report["throughput"].items():
+        label = f"{name} (ref)" if name == report["reference"] else name
+        lines.append(f"{label:<{width}}  " + "  ".join(f"{rates[corpus_name]:>16,.0f}" for corpus_name in corpus_names))
+    for name, corpora in report["mismatches"].items():
+        if not corpora:
+            lines.append(f"{name}: identical to {report['reference']} on all {sum(report['corpus_sizes'].values())} grids")
+        for corpus_name, mismatch in corpora.items():
+            lines.append(f"{name}: {mismatch['count']}/{report['corpus_sizes'][corpus_name]} {corpus_name} grids differ "
+                         f"({', '.join(mismatch['parts'])}); e.g. {mismatch['examples'][0]['grid']}")
+            lines.append(f"    reference {mismatch['examples'][0]['reference']}")
+            lines.append(f"    evaluator {mismatch['examples'][0]['evaluator']}")
+    return "\n".join(lines)
+
+def load_game_math():
+    """GameMath from BOMBAROAT_Tralalero_Fury/math (not a package, so its folder goes on the path)."""
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "math"))
+    from GameMath import GameMath
+    return GameMath
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    # The two evaluator families on GameMath's configuration, against the brute-force reference
+    game_math = load_game_math()()
+    config = GameMathConfig(game_math)
+    harness = (EvaluatorHarness()
+               .register("brute force", brute_force_evaluator(config))
+               .register("GameMath.calculate_wins", game_math_evaluator(game_math))
+               .register("win_calculations", win_calculations_evaluator(config))
+               .register("evaluate_base_spin_outcome", base_outcome_evaluator(config)))
+    print("--- GameMath configuration ---")
+    print(format_report(harness.run(build_corpora(config, num_random=10000, num_adversarial=1000))))
+
+    # math_sdk_project configuration: the simulators' evaluation path and the win_calculations primitives against
+    # the brute-force reference, on synthetic corpora and on the grids the feature simulations actually evaluate
+    params = GameParams()
+    corpora = {**build_corpora(params, num_random=10000, num_adversarial=1000), **build_feature_corpora(params)}
+    print("\n--- GameParams configuration ---")
+    for harness in (EvaluatorHarness()
+                    .register("brute force", brute_force_evaluator(params))
+                    .register("win_calculations", win_calculations_evaluator(params))
+                    .register("evaluate_base_spin_outcome", base_outcome_evaluator(params)),
+                    EvaluatorHarness() # Lean (payout and triggers only) evaluation
+                    .register("brute force (payout)", payout_only(brute_force_evaluator(params)))
+                    .register("evaluate_base_spin_payout", lean_payout_evaluator(params))):
+        report = harness.run(corpora)
+        print(format_report(report))
+        assert_equivalent(report)
+
+    # Ways evaluation: the simulators' path, the single-grid and the batch ways evaluators against path enumeration
+    params.WIN_EVALUATION = "ways"
+    corpora = {**build_corpora(params, num_random=10000, num_adversarial=1000), **build_feature_corpora(params)}
+    print("\n--- GameParams configuration, ways ---")
+    for harness in (EvaluatorHarness()
+                    .register("brute force (ways)", brute_force_evaluator(params))
+                    .register("win_calculations (ways)", win_calculations_evaluator(params))
+                    .register("evaluate_base_spin_outcome", base_outcome_evaluator(params)),
+                    EvaluatorHarness()
+                    .register("brute force (ways payout)", brute_force_evaluator(params, grid_wins_only=True))
+                    .register("calculate_ways_wins", ways_payout_evaluator(params))
+                    .register("calculate_ways_payouts_batch", ways_payout_batch_evaluator(params), batch=True),
+                    EvaluatorHarness()
+                    .register("brute force (payout)", payout_only(brute_force_evaluator(params)))
+                    .register("evaluate_base_spin_payout", lean_payout_evaluator(params))):
+        report = harness.run(corpora)
+        print(format_report(report))
+        assert_equivalent(report)
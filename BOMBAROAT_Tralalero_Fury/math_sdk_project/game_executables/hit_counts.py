@@ -0,0 +1,192 @@
+# hit_counts.py
+# Payout-independent hit counts for paytable what-if analysis.
+# A line's evaluated symbol and match count depend only on the grid and the WILD, never on the payouts,
+# so a simulation can record them once and any candidate paytable can be priced afterwards.
+from array import array
+from collections import Counter
+
+import win_calculations # Assumed accessible, like the other game_executables modules
+
+class HitCountRecorder:
+    """
+    Records, per simulated round (base spin or whole feature), which (symbol, match_count) line hits and
+    which SCATTER_MULT count occurred, following calculate_line_wins / calculate_scatter_wins.
+    - line_hits: hit-count tensor {(line_index, symbol_id, match_count): grids}
+    - scatter_hits: {scatter_mult_count: grids} (only grids recorded with include_scatter=True)
+    Rounds are stored as interned signatures, so reprice() prices each distinct signature once.
+    Lines with fewer than min_match_count matches are not recorded and cannot be priced by reprice().
+    """
+    def __init__(self, game_params, min_match_count=2):
+        win_calculations.require_line_evaluation(game_params, "HitCountRecorder")
+        self.rows = game_params.GRID_ROWS
+        self.cols = game_params.GRID_COLS
+        self.paylines = game_params.PAYLINES
+        self.wild_symbol_id = win_calculations.find_wild_symbol_id(game_params.SYMBOLS)
+        self.scatter_mult_symbol_id = win_calculations.find_scatter_mult_symbol_id(game_params.SYMBOLS)
+        self.min_match_count = min_match_count
+
+        self.line_hits = Counter()
+        self.scatter_hits = Counter()
+        self.grids_recorded = 0
+
+        self._signature_index = {} # signature -> signature id
+        self._signatures = []      # signature id -> (((symbol_id, match_count, hits), ...), ((scatter_count, grids), ...))
+        self._round_ids = []
+        self._round_signatures = array("I")
+        self._current_lines = Counter()
+        self._current_scatters = Counter()
+
+    def record_grid(self, grid, include_scatter=True):
+        """Adds one evaluated grid to the round in progress."""
+        wild = self.wild_symbol_id
+        for i, line_coords in enumerate(self.paylines):
+            try:
+                line_symbols_ids = [grid[r][c] for r, c in line_coords]
+            except IndexError:
+                continue # Skipped by calculate_line_wins too
+            eval_symbol = next((s for s in line_symbols_ids if s != wild), wild)
+            if eval_symbol is None:
+                continue
+            match_count = 0
+            for sym_id in line_symbols_ids:
+                if sym_id == eval_symbol or sym_id == wild:
+                    match_count += 1
+                else:
+                    break
+            if match_count >= self.min_match_count:
+                self.line_hits[(i, eval_symbol, match_count)] += 1
+                self._current_lines[(eval_symbol, match_count)] += 1
+
+        if include_scatter and self.scatter_mult_symbol_id:
+            count = sum(row.count(self.scatter_mult_symbol_id) for row in grid)
+            self.scatter_hits[count] += 1
+            self._current_scatters[count] += 1
+        self.grids_recorded += 1
+
+    def end_round(self, sim_id):
+        """Closes the round in progress under sim_id (one lookup table row)."""
+        signature = (tuple(sorted((sym, n, hits) for (sym, n), hits in self._current_lines.items())),
+                     tuple(sorted(self._current_scatters.items())))
+        signature_id = self._signature_index.get(signature)
+        if signature_id is None:
+            signature_id = len(self._signatures)
+            self._signature_index[signature] = signature_id
+            self._signatures.append(signature)
+        self._round_ids.append(sim_id)
+        self._round_signatures.append(signature_id)
+        self._current_lines.clear()
+        self._current_scatters.clear()
+
+    def record_spin(self, sim_id, grid, include_scatter=True):
+        """Convenience for single-grid rounds (base game spins)."""
+        self.record_grid(grid, include_scatter)
+        self.end_round(sim_id)
+
+    @property
+    def num_rounds(self):
+        return len(self._round_ids)
+
+    def signature_rounds(self):
+        """Distinct signatures with the number of rounds that produced each, as [(signature, rounds), ...].
+        A signature is (((symbol_id, match_count, hits), ...), ((scatter_count, grids), ...))."""
+        rounds = Counter(self._round_signatures)
+        return [(signature, rounds[signature_id]) for signature_id, signature in enumerate(self._signatures)]
+
+    def _signature_payout(self, signature, paytable):
+        line_part, scatter_part = signature
+        payout = 0
+        for symbol_id, match_count, hits in line_part:
+            payout += paytable.get(symbol_id, {}).get(match_count, 0) * hits
+        scatter_table = paytable.get(self.scatter_mult_symbol_id, {}) if self.scatter_mult_symbol_id else {}
+        for count, grids in scatter_part:
+            payout += scatter_table.get(count, 0) * grids
+        return payout
+
+    def reprice(self, paytable):
+        """
+        Prices every recorded round under paytable ({symbol_id: {match_count: payout_multiplier}})
+        without re-simulating. Returns RTP, hit rate, the exact payout distribution and lookup payouts.
+        """
+        signature_payouts = [self._signature_payout(sig, paytable) for sig in self._signatures]
+        signature_rounds = Counter(self._round_signatures)
+
+        num_rounds = self.num_rounds
+        total_payout = 0
+        winning_rounds = 0
+        payout_distribution = Counter()
+        for signature_id, rounds in signature_rounds.items():
+            payout = signature_payouts[signature_id]
+            total_payout += payout * rounds
+            payout_distribution[payout] += rounds
+            if payout > 0:
+                winning_rounds += rounds
+
+        return {
+            "rounds": num_rounds,
+            "total_payout_multiplier": total_payout,
+            "rtp": total_payout / num_rounds if num_rounds else 0,
+            "hit_rate": winning_rounds / num_rounds if num_rounds else 0,
+            "max_payout_multiplier": max(payout_distribution) if payout_distribution else 0,
+            "payout_distribution": dict(sorted(payout_distribution.items())),
+            "lookup_payouts": [signature_payouts[sig_id] for sig_id in self._round_signatures],
+            "distinct_signatures": len(self._signatures),
+        }
+
+    def lookup_entries(self, paytable):
+        """Lookup table rows ("id,weight,payoutMultiplier", weight 1 as in run.py) under paytable."""
+        payouts = self.reprice(paytable)["lookup_payouts"]
+        return [f"{sim_id},1,{payout}" for sim_id, payout in zip(self._round_ids, payouts)]
+
+    def rtp_by_line(self, paytable):
+        """Per-payline RTP contribution under paytable, from the hit-count tensor."""
+        per_line = Counter()
+        for (line_index, symbol_id, match_count), hits in self.line_hits.items():
+            per_line[line_index] += paytable.get(symbol_id, {}).get(match_count, 0) * hits
+        return {i: total / self.num_rounds for i, total in sorted(per_line.items())} if self.num_rounds else {}
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import random
+    import time
+
+    class MockGameParams:
+        def __init__(self):
+            self.GRID_ROWS = 4
+            self.GRID_COLS = 5
+            self.SYMBOLS = {
+                "H1": {"id": "H1", "name": "Brainroat"},
+                "WILD": {"id": "WILD", "name": "Crocodrillo", "type": "wild"},
+                "M1": {"id": "M1", "name": "Spaghetti"},
+                "L1": {"id": "L1", "name": "Mask"},
+                "SCATTER_MULT": {"id": "SCATTER_MULT", "name": "Lirili Larila"}
+            }
+            self.PAYLINES = [[(r, c) for c in range(self.GRID_COLS)] for r in range(self.GRID_ROWS)]
+            self.PAYTABLE = {
+                "H1": {3: 25, 4: 100, 5: 500},
+                "WILD": {3: 25, 4: 100, 5: 500},
+                "M1": {3: 10, 4: 40, 5: 150},
+                "L1": {3: 5, 4: 20, 5: 100},
+                "SCATTER_MULT": {3: 5, 4: 15, 5: 50}
+            }
+
+    params = MockGameParams()
+    recorder = HitCountRecorder(params)
+    symbol_ids = list(params.SYMBOLS.keys())
+    direct_payouts = []
+    for sim_id in range(1, 20001):
+        grid = [[random.choice(symbol_ids) for _ in range(params.GRID_COLS)] for _ in range(params.GRID_ROWS)]
+        _, line_payout = win_calculations.calculate_line_wins(grid, params.PAYLINES, params.PAYTABLE, params.SYMBOLS)
+        _, scatter_payout = win_calculations.calculate_scatter_wins(grid, params.PAYTABLE, "SCATTER_MULT", params.SYMBOLS)
+        direct_payouts.append(line_payout + scatter_payout)
+        recorder.record_spin(sim_id, grid)
+
+    start = time.time()
+    repriced = recorder.reprice(params.PAYTABLE)
+    print(f"Repriced {repriced['rounds']} rounds ({repriced['distinct_signatures']} signatures) "
+          f"in {(time.time() - start) * 1000:.1f} ms")
+    print("Matches direct evaluation:", repriced["lookup_payouts"] == direct_payouts) # Expected: True
+    print("RTP:", repriced["rtp"], "Hit rate:", repriced["hit_rate"])
+
+    what_if = {sym: dict(table) for sym, table in params.PAYTABLE.items()}
+    what_if["H1"] = {3: 30, 4: 120, 5: 600}
+    print("What-if RTP (H1 +20%):", recorder.reprice(what_if)["rtp"])
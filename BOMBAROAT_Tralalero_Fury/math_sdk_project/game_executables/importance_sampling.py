@@ -0,0 +1,256 @@
+# importance_sampling.py
+# Importance-sampling estimates of tail win probabilities.
+# Spins are drawn from a proposal biased toward high-paying outcomes (reel stops whose window shows the
+# boosted symbols, or boosted symbols in the features' random grids), and each round carries the
+# likelihood ratio p(draws) / q(draws). Weighting by that ratio keeps every estimate unbiased for the
+# real game while the rare mega wins are hit orders of magnitude more often.
+import math
+import random
+from statistics import NormalDist
+
+import win_calculations # Assumed accessible, like the other game_executables modules
+from reel_strip_optimizer import BaseSpinEvaluator
+from tralalero_free_spins_calculations import simulate_tralalero_free_spins_feature
+from bombardino_bonus_calculations import simulate_bombardino_bonus_feature
+
+DEFAULT_STOP_BOOST = 10.0 # Extra proposal weight per boosted symbol in a reel stop's window
+DEFAULT_DEFENSIVE_WEIGHT = 0.5 # Share of feature rounds drawn from the real game (caps each likelihood ratio at 2)
+
+class StopImportanceSampler:
+    """
+    Biased replacement for uniform reel stops (sdk_generate_grid_from_reels) in the base game.
+    Reel c stops at s with probability proportional to 1 + boost * (boosted symbols in the window at s),
+    instead of 1 / len(strip). sample_grid() returns the grid and its log likelihood ratio.
+    By default the WILD and the best-paying line symbol are boosted.
+    """
+    def __init__(self, game_params, boost_symbols=None, boost=DEFAULT_STOP_BOOST, rng=None):
+        self.rows = game_params.GRID_ROWS
+        self.cols = game_params.GRID_COLS
+        self.rng = rng or random.Random()
+        if boost_symbols is None:
+            boost_symbols = default_boost_symbols(game_params)
+        boost_symbols = set(boost_symbols)
+        if boost < 0:
+            raise ValueError("boost must be non-negative, otherwise some stops could never be drawn")
+
+        self.strips = []
+        self.cum_weights = []
+        self.log_ratios = []
+        for reel_id in win_calculations.reel_ids(game_params.REEL_STRIPS)[:self.cols]:
+            strip = list(game_params.REEL_STRIPS[reel_id])
+            if not strip:
+                raise ValueError(f"Reel strip {reel_id} is empty; importance sampling needs real strips.")
+            length = len(strip)
+            weights = [1 + boost * sum(1 for r in range(self.rows) if strip[(stop + r) % length] in boost_symbols)
+                       for stop in range(length)]
+            total = sum(weights)
+            self.strips.append(strip)
+            self.cum_weights.append(_cumulative(weights))
+            self.log_ratios.append([math.log(total / (length * w)) for w in weights]) # log((1/L) / (w/total))
+
+    def sample_grid(self):
+        grid = [[None] * self.cols for _ in range(self.rows)]
+        log_ratio = 0.0
+        for c, strip in enumerate(self.strips):
+            stop = self.rng.choices(range(len(strip)), cum_weights=self.cum_weights[c])[0]
+            log_ratio += self.log_ratios[c][stop]
+            for r in range(self.rows):
+                grid[r][c] = strip[(stop + r) % len(strip)]
+        return grid, log_ratio
+
+class SymbolImportanceSampler:
+    """
+    Biased drop-in for generate_grid_for_free_spin / generate_grid_for_bonus_spin (pass it as grid_generator).
+    Those draw every cell uniformly from game_params.SYMBOLS; the biased proposal draws symbol s with weight
+    bias_factors[s] (default 1). Per-cell ratios multiply over every cell of every feature spin, so on its own
+    the proposal lets a few rounds carry huge weights; it is therefore used as a defensive mixture: each round
+    (reset()) is drawn from the real game with probability defensive_weight and from the proposal otherwise, and
+    its likelihood ratio p / (defensive_weight * p + (1 - defensive_weight) * q) never exceeds 1 / defensive_weight.
+    """
+    def __init__(self, game_params, bias_factors, rng=None, defensive_weight=DEFAULT_DEFENSIVE_WEIGHT):
+        self.symbol_ids = list(game_params.SYMBOLS.keys())
+        self.rng = rng or random.Random()
+        weights = [bias_factors.get(sid, 1.0) for sid in self.symbol_ids]
+        if min(weights) <= 0:
+            raise ValueError("bias_factors must be positive, otherwise some grids could never be drawn")
+        if not 0 <= defensive_weight <= 1:
+            raise ValueError("defensive_weight must be between 0 and 1")
+        total = sum(weights)
+        self.cum_weights = _cumulative(weights)
+        self.log_proposal_ratio = {sid: math.log(len(weights) * w / total) for sid, w in zip(self.symbol_ids, weights)} # log(q / p)
+        self.defensive_weight = defensive_weight
+        self.reset()
+
+    def __call__(self, game_params):
+        num_cells = game_params.GRID_ROWS * game_params.GRID_COLS
+        if self._biased:
+            cells = self.rng.choices(self.symbol_ids, cum_weights=self.cum_weights, k=num_cells)
+        else:
+            cells = self.rng.choices(self.symbol_ids, k=num_cells)
+        self._log_proposal_ratio += sum(self.log_proposal_ratio[sid] for sid in cells)
+        cols = game_params.GRID_COLS
+        return [cells[r * cols:(r + 1) * cols] for r in range(game_params.GRID_ROWS)]
+
+    @property
+    def log_likelihood_ratio(self):
+        """log p / (defensive_weight * p + (1 - defensive_weight) * q) of the round drawn since reset()."""
+        if self.defensive_weight == 0:
+            return -self._log_proposal_ratio
+        if self.defensive_weight == 1:
+            return 0.0
+        a, b = math.log(self.defensive_weight), math.log(1 - self.defensive_weight) + self._log_proposal_ratio
+        high = max(a, b)
+        return -(high + math.log(math.exp(a - high) + math.exp(b - high)))
+
+    def reset(self):
+        """Starts a round: picks the mixture component it is drawn from."""
+        self._biased = self.rng.random() >= self.defensive_weight
+        self._log_proposal_ratio = 0.0
+
+def _cumulative(weights):
+    cum, running = [], 0
+    for w in weights:
+        running += w
+        cum.append(running)
+    return cum
+
+def default_boost_symbols(game_params):
+    """The WILD plus the line symbol with the largest single payout."""
+    wild = win_calculations.find_wild_symbol_id(game_params.SYMBOLS)
+    line_symbols = [sid for sid in game_params.PAYTABLE if sid != wild and sid in game_params.SYMBOLS]
+    best = max(line_symbols, key=lambda sid: max(game_params.PAYTABLE[sid].values(), default=0))
+    return [s for s in (wild, best) if s]
+
+def default_feature_bias_factors(game_params, mode="bombardino_bonus", factor=1.2):
+    """Feature grid bias on the boosted line symbols (see default_boost_symbols), and in free spins also on the
+    FREE_SPINS_SYMBOL_ID scatters whose retriggers make the longest (highest-paying) features.
+    Kept mild on purpose: the likelihood ratio multiplies over every cell of every feature spin, so strong
+    per-cell factors collapse the effective sample size long before they help the tail."""
+    factors = {sid: factor for sid in default_boost_symbols(game_params)}
+    if mode == "tralalero_free_spins" and getattr(game_params, "FREE_SPINS_SYMBOL_ID", None):
+        factors[game_params.FREE_SPINS_SYMBOL_ID] = factor
+    return factors
+
+def weighted_tail_estimates(payouts, log_likelihood_ratios, tail_thresholds, confidence=0.95):
+    """
+    Unbiased estimates from importance-sampled rounds: RTP (mean payout multiplier), and per threshold t
+    P(payout > t) and the RTP contributed by rounds above t, each with a normal-approximation confidence
+    interval. variance_reduction is the crude Monte Carlo variance of the same estimate divided by the
+    importance-sampling variance, i.e. how many times fewer rounds the biased run needs, as estimated from this
+    run's own rounds (noisy when the effective sample size is small; compare repeated runs to confirm a gain).
+    """
+    n = len(payouts)
+    if n == 0:
+        return {"rounds": 0}
+    ratios = [math.exp(x) for x in log_likelihood_ratios]
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    def estimate(values):
+        weighted = [w * v for w, v in zip(ratios, values)]
+        mean = sum(weighted) / n
+        is_variance = max(sum(x * x for x in weighted) / n - mean * mean, 0.0)
+        crude_variance = max(sum(w * v * v for w, v in zip(ratios, values)) / n - mean * mean, 0.0)
+        half_width = z * math.sqrt(is_variance / n)
+        return {
+            "estimate": mean,
+            "ci": (mean - half_width, mean + half_width),
+            "variance_reduction": crude_variance / is_variance if is_variance > 0 else None,
+        }
+
+    ratio_sum = sum(ratios)
+    results = {
+        "rounds": n,
+        "confidence": confidence,
+        "effective_sample_size": ratio_sum * ratio_sum / sum(w * w for w in ratios),
+        "mean_likelihood_ratio": ratio_sum / n, # Should be close to 1 for a healthy proposal
+        "rtp": estimate(payouts),
+        "tails": {},
+    }
+    for threshold in tail_thresholds:
+        above = [p > threshold for p in payouts]
+        probability = estimate([1.0 if a else 0.0 for a in above])
+        contribution = estimate([p if a else 0.0 for p, a in zip(payouts, above)])
+        results["tails"][threshold] = {
+            "hits": sum(above),
+            "probability": probability["estimate"],
+            "probability_ci": probability["ci"],
+            "probability_variance_reduction": probability["variance_reduction"],
+            "rtp_contribution": contribution["estimate"],
+            "rtp_contribution_ci": contribution["ci"],
+        }
+    return results
+
+def run_importance_sampling(game_params, mode, num_rounds, tail_thresholds, boost_symbols=None, boost=DEFAULT_STOP_BOOST,
+                            bias_factors=None, defensive_weight=DEFAULT_DEFENSIVE_WEIGHT, confidence=0.95, seed=None):
+    """
+    Importance-sampled simulation of one mode ("base", "tralalero_free_spins" or "bombardino_bonus").
+    Base spins use StopImportanceSampler (boost_symbols, boost); features use SymbolImportanceSampler
+    (bias_factors, default default_feature_bias_factors for the mode, and defensive_weight). Features are triggered with 3 symbols, as in run.py.
+    Returns weighted_tail_estimates() plus the raw per-round payouts and log likelihood ratios.
+    """
+    rng = random.Random(seed)
+    payouts, log_ratios = [], []
+    if mode == "base":
+        sampler = StopImportanceSampler(game_params, boost_symbols, boost, rng)
+        evaluator = BaseSpinEvaluator(game_params)
+        for _ in range(num_rounds):
+            grid, log_ratio = sampler.sample_grid()
+            payout, _, _ = evaluator.evaluate([symbol for row in grid for symbol in row])
+            payouts.append(payout)
+            log_ratios.append(log_ratio)
+    elif mode in ("tralalero_free_spins", "bombardino_bonus"):
+        sampler = SymbolImportanceSampler(game_params, bias_factors or default_feature_bias_factors(game_params, mode), rng,
+                                          defensive_weight)
+        for _ in range(num_rounds):
+            sampler.reset()
+            if mode == "tralalero_free_spins":
+                outcome = simulate_tralalero_free_spins_feature(3, game_params, grid_generator=sampler)
+            else:
+                outcome = simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=3, grid_generator=sampler)
+            payouts.append(outcome["total_feature_payout"])
+            log_ratios.append(sampler.log_likelihood_ratio)
+    else:
+        raise ValueError(f"Unknown mode for importance sampling: {mode}")
+
+    results = weighted_tail_estimates(payouts, log_ratios, tail_thresholds, confidence)
+    results["mode"] = mode
+    results["payouts"] = payouts
+    results["log_likelihood_ratios"] = log_ratios
+    return results
+
+def format_tail_estimates(results):
+    """Human-readable summary of run_importance_sampling() results."""
+    rtp = results["rtp"]
+    rtp_reduction = "n/a" if rtp["variance_reduction"] is None else f"{rtp['variance_reduction']:.2f}x"
+    lines = [f"{results.get('mode', '?')}: {results['rounds']} rounds, effective sample size {results['effective_sample_size']:.0f}, "
+             f"mean likelihood ratio {results['mean_likelihood_ratio']:.4f}",
+             f"  Mean payout: {rtp['estimate']:.4f}x  CI [{rtp['ci'][0]:.4f}, {rtp['ci'][1]:.4f}]  "
+             f"(variance reduction {rtp_reduction})"]
+    for threshold, tail in results["tails"].items():
+        reduction = tail["probability_variance_reduction"]
+        lines.append(f"  P(win > {threshold}x) = {tail['probability']:.3e}  CI [{tail['probability_ci'][0]:.3e}, "
+                     f"{tail['probability_ci'][1]:.3e}]  ({tail['hits']} biased hits, "
+                     f"variance reduction {'n/a' if reduction is None else f'{reduction:.1f}x'})")
+        lines.append(f"    RTP from wins > {threshold}x: {tail['rtp_contribution']:.4f}  "
+                     f"CI [{tail['rtp_contribution_ci'][0]:.4f}, {tail['rtp_contribution_ci'][1]:.4f}]")
+    if results["effective_sample_size"] < 0.01 * results["rounds"]:
+        lines.append("  Note: effective sample size below 1% of rounds; the proposal targets the tail, so the "
+                     "whole-distribution mean payout is better taken from a plain run.")
+    return "\n".join(lines)
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    for mode, rounds, thresholds in (("base", 50000, [1000, 2000]),
+                                     ("tralalero_free_spins", 2000, [15000]),
+                                     ("bombardino_bonus", 5000, [4000, 6000])):
+        start = time.time()
+        results = run_importance_sampling(params, mode, rounds, thresholds, seed=7)
+        print(format_tail_estimates(results))
+        print(f"  ({time.time() - start:.1f}s)\n")
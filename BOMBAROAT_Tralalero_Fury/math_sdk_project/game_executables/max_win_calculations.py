@@ -0,0 +1,366 @@
+# max_win_calculations.py
+# Exact maximum win per mode by branch-and-bound over grid configurations.
+# Each payline contributes an upper bound (best payout still reachable given the cells fixed so far),
+# so whole families of reel stops / symbol choices are discarded without evaluating their grids.
+from itertools import combinations
+
+import win_calculations # Assumed accessible, like the other game_executables modules
+from reel_strip_optimizer import BaseSpinEvaluator
+
+class GridMaxWinSearch:
+    """
+    Branch-and-bound maximiser of one grid's payout (line wins, plus SCATTER_MULT if include_scatter).
+    - variables: list of (cells, options); cells is a tuple of flat (row-major) cell indices and options a
+      list of symbol tuples, one symbol per cell. A free cell is ((cell,), [(s,) for s in symbols]);
+      a reel stop is (column cells, [window for every stop]).
+    - required_counts: {symbol_id: minimum number of cells} the final grid must satisfy.
+    - grid_filter: optional callable(flat_grid) -> bool for further feasibility rules.
+    """
+    def __init__(self, evaluator, variables, include_scatter=True, required_counts=None, grid_filter=None):
+        self.evaluator = evaluator
+        self.variables = variables
+        self.include_scatter = include_scatter and bool(evaluator.scatter_mult_symbol_id)
+        self.required_counts = dict(required_counts or {})
+        self.grid_filter = grid_filter
+
+        num_cells = evaluator.rows * evaluator.cols
+        self.cell_lines = [[] for _ in range(num_cells)]
+        for line_index, line in enumerate(evaluator.paylines):
+            for idx in set(line):
+                self.cell_lines[idx].append(line_index)
+        # Every symbol a cell can still show, from the options of the variable that owns it
+        self.cell_domains = [set() for _ in range(num_cells)]
+        for cells, options in variables:
+            for pos, idx in enumerate(cells):
+                self.cell_domains[idx].update(option[pos] for option in options)
+
+        self.best_payout = -1
+        self.best_grid = None
+        self.nodes_visited = 0
+
+    # --- Bounds ---
+
+    def _line_bound(self, grid, line):
+        """Best payout the line can still reach given the fixed cells."""
+        wild = self.evaluator.wild_symbol_id
+        domains = self.cell_domains
+        # Per position: the single fixed symbol, or the set of symbols the open cell can still show
+        options = [(grid[idx],) if grid[idx] is not None else domains[idx] for idx in line]
+        best = 0
+        for symbol_id, table in self.evaluator.paytable.items():
+            if symbol_id == wild:
+                if all(wild in opts for opts in options):
+                    best = max(best, table.get(len(line), 0)) # Only an all-wild line is evaluated as WILD
+                continue
+            reach = 0
+            symbol_seen = False
+            for opts in options:
+                if symbol_id in opts:
+                    symbol_seen = True
+                elif wild not in opts:
+                    break
+                reach += 1
+            if symbol_seen:
+                for n in range(1, reach + 1):
+                    if table.get(n, 0) > best:
+                        best = table[n]
+        return best
+
+    def _scatter_bound(self, grid, line_bounds, net_of_line_cost=True):
+        """
+        Best SCATTER_MULT payout net of the line value it must cost. Reaching fixed + m scatters means
+        pinning m open cells to the scatter, which loses at least the m-th smallest single-cell loss
+        (line bounds only shrink as more cells are pinned). net_of_line_cost=False skips that refinement.
+        """
+        if not self.include_scatter:
+            return 0
+        scatter_id = self.evaluator.scatter_mult_symbol_id
+        table = self.evaluator.paytable[scatter_id]
+        fixed = sum(1 for sym_id in grid if sym_id == scatter_id)
+        open_cells = [idx for idx, sym_id in enumerate(grid) if sym_id is None and scatter_id in self.cell_domains[idx]]
+        best = table.get(fixed, 0)
+        losses = None
+        for m in range(1, len(open_cells) + 1):
+            value = table.get(fixed + m, 0)
+            if value <= best:
+                continue
+            if not net_of_line_cost:
+                best = value
+                continue
+            if losses is None:
+                losses = sorted(self._pin_loss(grid, idx, scatter_id, line_bounds) for idx in open_cells)
+            best = max(best, value - losses[m - 1])
+        return best
+
+    def _pin_loss(self, grid, idx, symbol_id, line_bounds):
+        """Drop in the summed line bounds if open cell idx is pinned to symbol_id."""
+        grid[idx] = symbol_id
+        loss = sum(line_bounds[line_index] - self._line_bound(grid, self.evaluator.paylines[line_index])
+                   for line_index in self.cell_lines[idx])
+        grid[idx] = None
+        return loss
+
+    def _feasible(self, grid):
+        for symbol_id, needed in self.required_counts.items():
+            possible = sum(1 for idx, sym_id in enumerate(grid)
+                           if sym_id == symbol_id or (sym_id is None and symbol_id in self.cell_domains[idx]))
+            if possible < needed:
+                return False
+        return True
+
+    # --- Search ---
+
+    def _exact_payout(self, grid):
+        line_total = sum(self.evaluator.line_payout([grid[idx] for idx in line]) for line in self.evaluator.paylines)
+        if self.include_scatter:
+            scatter_id = self.evaluator.scatter_mult_symbol_id
+            line_total += self.evaluator.paytable[scatter_id].get(grid.count(scatter_id), 0)
+        return line_total
+
+    def _search(self, grid, depth, line_bounds):
+        self.nodes_visited += 1
+        if depth == len(self.variables):
+            if self.grid_filter is not None and not self.grid_filter(grid):
+                return
+            payout = self._exact_payout(grid)
+            if payout > self.best_payout:
+                self.best_payout = payout
+                self.best_grid = grid[:]
+            return
+
+        cells, options = self.variables[depth]
+        touched_lines = sorted({line_index for idx in cells for line_index in self.cell_lines[idx]})
+        children = []
+        for option in options:
+            for idx, symbol_id in zip(cells, option):
+                grid[idx] = symbol_id
+            if self._feasible(grid):
+                child_bounds = line_bounds[:]
+                for line_index in touched_lines:
+                    child_bounds[line_index] = self._line_bound(grid, self.evaluator.paylines[line_index])
+                bound = sum(child_bounds) + self._scatter_bound(grid, child_bounds)
+                if bound > self.best_payout:
+                    children.append((bound, option, child_bounds))
+        for idx in cells:
+            grid[idx] = None
+
+        children.sort(key=lambda child: -child[0]) # Best-first: good incumbents early prune the rest
+        for bound, option, child_bounds in children:
+            if bound <= self.best_payout:
+                break
+            for idx, symbol_id in zip(cells, option):
+                grid[idx] = symbol_id
+            self._search(grid, depth + 1, child_bounds)
+        for idx in cells:
+            grid[idx] = None
+
+    def run(self, fixed_cells=None):
+        """Searches (optionally with some cells pinned to a symbol) and returns (best_payout, best_flat_grid)."""
+        grid = [None] * (self.evaluator.rows * self.evaluator.cols)
+        variables = self.variables
+        if fixed_cells:
+            for idx, symbol_id in fixed_cells.items():
+                grid[idx] = symbol_id
+            self.variables = [(cells, options) for cells, options in variables
+                              if not all(idx in fixed_cells for idx in cells)]
+        line_bounds = [self._line_bound(grid, line) for line in self.evaluator.paylines]
+        if self._feasible(grid) and sum(line_bounds) + self._scatter_bound(grid, line_bounds) > self.best_payout:
+            self._search(grid, 0, line_bounds)
+        self.variables = variables
+        return self.best_payout, self.best_grid
+
+def _free_cell_variables(game_params, excluded_cells=()):
+    symbol_ids = list(game_params.SYMBOLS.keys())
+    # Order symbols by their best payout so the first dive is already a strong incumbent
+    symbol_ids.sort(key=lambda sid: -max(game_params.PAYTABLE.get(sid, {0: 0}).values()))
+    num_cells = game_params.GRID_ROWS * game_params.GRID_COLS
+    cells = sorted(range(num_cells), key=lambda idx: (idx % game_params.GRID_COLS, idx // game_params.GRID_COLS))
+    return [((idx,), [(sid,) for sid in symbol_ids]) for idx in cells if idx not in excluded_cells]
+
+def _to_grid(flat_grid, game_params):
+    cols = game_params.GRID_COLS
+    return [list(flat_grid[r * cols:(r + 1) * cols]) for r in range(game_params.GRID_ROWS)]
+
+def max_free_grid_payout(game_params, include_scatter=True, required_counts=None, grid_filter=None):
+    """
+    Best payout of a single freely generated grid (any symbol on any cell, as in the feature grid generators).
+    required_counts pins the cheapest cells for each required symbol: every placement of exactly that many
+    cells is tried in bound order, and the remaining cells are searched with the shared incumbent.
+    """
+    evaluator = BaseSpinEvaluator(game_params)
+    search = GridMaxWinSearch(evaluator, _free_cell_variables(game_params), include_scatter,
+                              required_counts, grid_filter)
+    if not required_counts:
+        payout, flat_grid = search.run()
+    else:
+        # Enumerate placements of the required symbols (only the first one is pinned jointly with later ones)
+        num_cells = game_params.GRID_ROWS * game_params.GRID_COLS
+        placements = [{}]
+        for symbol_id, needed in required_counts.items():
+            placements = [{**p, **{idx: symbol_id for idx in combo}}
+                          for p in placements
+                          for combo in combinations([i for i in range(num_cells) if i not in p], needed)]
+
+        open_line_bounds = [search._line_bound([None] * num_cells, line) for line in evaluator.paylines]
+
+        def placement_bound(fixed):
+            grid = [None] * num_cells
+            line_bounds = open_line_bounds[:]
+            for idx, symbol_id in fixed.items():
+                grid[idx] = symbol_id
+            for line_index in {li for idx in fixed for li in search.cell_lines[idx]}:
+                line_bounds[line_index] = search._line_bound(grid, evaluator.paylines[line_index])
+            return sum(line_bounds) + search._scatter_bound(grid, line_bounds, net_of_line_cost=False)
+
+        ranked = sorted(((placement_bound(p), i) for i, p in enumerate(placements)), reverse=True)
+        for bound, i in ranked:
+            if bound <= search.best_payout:
+                break
+            search.run(fixed_cells=placements[i])
+        payout, flat_grid = search.best_payout, search.best_grid
+    return {
+        "payout": payout,
+        "grid": _to_grid(flat_grid, game_params) if flat_grid else None,
+        "nodes_visited": search.nodes_visited,
+    }
+
+def find_base_game_max_win(game_params):
+    """Max base game payout over every combination of reel strip stops (line wins + SCATTER_MULT)."""
+    evaluator = BaseSpinEvaluator(game_params)
+    rows, cols = game_params.GRID_ROWS, game_params.GRID_COLS
+    variables = []
+    stop_by_window = [] # Per reel: first stop showing each distinct window
+    for c in range(cols):
+        strip = game_params.REEL_STRIPS.get(f"reel_{c + 1}", [])
+        if not strip:
+            raise ValueError(f"Reel strip reel_{c + 1} is missing or empty.")
+        windows = {}
+        for stop in range(len(strip)):
+            windows.setdefault(tuple(strip[(stop + r) % len(strip)] for r in range(rows)), stop)
+        variables.append((tuple(r * cols + c for r in range(rows)), list(windows.keys())))
+        stop_by_window.append(windows)
+
+    search = GridMaxWinSearch(evaluator, variables)
+    payout, flat_grid = search.run()
+    grid = _to_grid(flat_grid, game_params)
+    stops = [stop_by_window[c][tuple(grid[r][c] for r in range(rows))] for c in range(cols)]
+    return {
+        "mode": "base",
+        "max_win_multiplier": payout,
+        "witness": {"reel_stops": stops, "grid": grid},
+        "nodes_visited": search.nodes_visited,
+    }
+
+def _awarded_spins(spins_awarded_map, scatter_count):
+    """Same award rule as simulate_tralalero_free_spins_feature, including counts above the highest key."""
+    spins = spins_awarded_map.get(scatter_count, 0)
+    if spins == 0 and scatter_count > 0 and spins_awarded_map:
+        max_defined = max(spins_awarded_map.keys(), default=0)
+        if scatter_count > max_defined > 0:
+            spins = spins_awarded_map[max_defined]
+    return spins
+
+def find_free_spins_max_win(game_params, triggering_scatter_count=None):
+    """
+    Max Tralalero Free Spins feature payout.
+    Every free spin grid can show any symbol; symbol transformations only turn M1/M2/L1 into H1, so an
+    evaluated grid that still shows a transformation symbol must show at least one H1. A retrigger spin
+    must show the scatter count it is credited with; every retrigger is taken (up to max_retriggers)
+    with the scatter count that maximises its extra spins x best spin + its own constrained payout.
+    """
+    fs_config = game_params.tralalero_free_spins_config
+    spins_awarded_map = fs_config.get("spins_awarded_by_scatter_count", {})
+    if triggering_scatter_count is None:
+        triggering_scatter_count = max(spins_awarded_map, key=lambda k: spins_awarded_map[k])
+    initial_spins = _awarded_spins(spins_awarded_map, triggering_scatter_count)
+    if initial_spins == 0:
+        return {"mode": "tralalero_free_spins", "max_win_multiplier": 0, "witness": None}
+
+    transformation_symbols = set(fs_config.get("transformation_symbols", []))
+    target_symbol = fs_config.get("transformation_target_symbol")
+
+    def reachable_after_transformation(flat_grid):
+        if not transformation_symbols or not target_symbol:
+            return True
+        return target_symbol in flat_grid or not any(s in transformation_symbols for s in flat_grid)
+
+    best_spin = max_free_grid_payout(game_params, grid_filter=reachable_after_transformation)
+    per_retrigger = None
+    max_retriggers = fs_config.get("max_retriggers", 0) if fs_config.get("can_retrigger", False) else 0
+    if max_retriggers > 0 and spins_awarded_map:
+        for scatter_count in range(game_params.FREE_SPINS_TRIGGER_COUNT, max(spins_awarded_map) + 1):
+            additional = _awarded_spins(spins_awarded_map, scatter_count)
+            if additional == 0:
+                continue
+            spin = max_free_grid_payout(game_params, required_counts={game_params.FREE_SPINS_SYMBOL_ID: scatter_count},
+                                        grid_filter=reachable_after_transformation)
+            gain = additional * best_spin["payout"] + spin["payout"] - best_spin["payout"]
+            if per_retrigger is None or gain > per_retrigger["gain"]:
+                per_retrigger = {"gain": gain, "scatter_count": scatter_count, "additional_spins": additional, "spin": spin}
+
+    retriggers = max_retriggers if per_retrigger and per_retrigger["gain"] > 0 else 0
+    total_spins = initial_spins + retriggers * (per_retrigger["additional_spins"] if retriggers else 0)
+    total = (total_spins - retriggers) * best_spin["payout"]
+    if retriggers:
+        total += retriggers * per_retrigger["spin"]["payout"]
+    witness = {
+        "triggering_scatter_count": triggering_scatter_count,
+        "spins_played": total_spins,
+        "retriggers": retriggers,
+        "best_spin": {"payout": best_spin["payout"], "grid": best_spin["grid"]},
+    }
+    if retriggers:
+        witness["retrigger_spin"] = {
+            "payout": per_retrigger["spin"]["payout"],
+            "grid": per_retrigger["spin"]["grid"],
+            "scatter_count": per_retrigger["scatter_count"],
+            "additional_spins": per_retrigger["additional_spins"],
+        }
+    return {"mode": "tralalero_free_spins", "max_win_multiplier": total, "witness": witness}
+
+def find_bombardino_max_win(game_params):
+    """
+    Max Bombardino Bonus payout: num_bonus_spins independent spins, line wins only. After the wild
+    placement every evaluated grid holds at least the minimum number of added WILDs.
+    """
+    bonus_config = game_params.bombardino_bonus_config
+    num_bonus_spins = bonus_config.get("num_bonus_spins", 0)
+    if num_bonus_spins == 0:
+        return {"mode": "bombardino_bonus", "max_win_multiplier": 0, "witness": None}
+    if bonus_config.get("wild_expansion_type") == "add_random_wilds":
+        min_wilds = bonus_config.get("min_wilds_to_add", 1)
+    else:
+        min_wilds = 1 # expand_existing_wilds placeholder adds 1-2 wilds
+    wild_symbol_id = win_calculations.find_wild_symbol_id(game_params.SYMBOLS)
+    required = {wild_symbol_id: min_wilds} if wild_symbol_id and min_wilds > 0 else None
+    best_spin = max_free_grid_payout(game_params, include_scatter=False, required_counts=required)
+    return {
+        "mode": "bombardino_bonus",
+        "max_win_multiplier": num_bonus_spins * best_spin["payout"],
+        "witness": {"spins_played": num_bonus_spins, "best_spin": {"payout": best_spin["payout"], "grid": best_spin["grid"]}},
+    }
+
+def find_max_win_by_mode(game_params):
+    """Exact max win multiplier and a witness outcome for every run.py mode."""
+    return {
+        "base": find_base_game_max_win(game_params),
+        "tralalero_free_spins": find_free_spins_max_win(game_params),
+        "bombardino_bonus": find_bombardino_max_win(game_params),
+    }
+
+# Example usage (for running this module directly)
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    for mode, finder in (("base", find_base_game_max_win),
+                         ("tralalero_free_spins", find_free_spins_max_win),
+                         ("bombardino_bonus", find_bombardino_max_win)):
+        start = time.time()
+        result = finder(params)
+        print(f"\n{mode}: max win {result['max_win_multiplier']}x ({time.time() - start:.2f}s)")
+        print(f"  Witness: {result['witness']}")
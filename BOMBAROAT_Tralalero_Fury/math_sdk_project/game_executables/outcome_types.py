@@ -0,0 +1,163 @@
+# outcome_types.py
+# Compact result records for the win calculations, base spin evaluation and feature simulators.
+# Each record keeps its fields in __slots__ instead of a per-instance dict, but still behaves as a mapping with
+# the same keys as the dicts these functions used to return (win["payout_multiplier"], win.get(...), dict(win),
+# ==, iteration), so existing callers keep working. Existing fields can be reassigned (record[key] = value);
+# keys outside the record's fields cannot be added. Records are for the evaluation hot paths: anything that
+# leaves the engine (book entries) is converted to plain dicts with to_dicts, so json.dumps works on it as before.
+# Single records convert with to_dict, or to JSON with to_json / json.dumps(..., default=json_default).
+import json
+from collections.abc import Mapping
+from operator import attrgetter
+
+class _Missing:
+    """Marks an optional field that is not part of this record's dict shape."""
+    __slots__ = ()
+
+    def __reduce__(self):
+        return "_MISSING" # Pickled (and deep-copied) as a reference to the module's single instance
+
+    def __repr__(self):
+        return "_MISSING"
+
+_MISSING = _Missing()
+
+class _SlottedRecord(Mapping):
+    __slots__ = ()
+    _KEYS = () # Dict keys in output order; each is also a slot name
+    _FLAT = False # True when no field is optional or holds records, so to_dict can copy the fields as they are
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = attrgetter(*cls._KEYS) if len(cls._KEYS) > 1 else (lambda record: (getattr(record, cls._KEYS[0]),))
+
+    def __getitem__(self, key):
+        if key in self._KEYS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._KEYS:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (key for key in self._KEYS if getattr(self, key) is not _MISSING)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Plain (nested) dict in the original shape."""
+        if self._FLAT:
+            return dict(zip(self._KEYS, self._fields(self)))
+        return {key: _plain(value) for key, value in zip(self._KEYS, self._fields(self)) if value is not _MISSING}
+
+    def to_json(self, **json_kwargs):
+        return json.dumps(self, default=json_default, **json_kwargs)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+def _plain(value):
+    if isinstance(value, _SlottedRecord):
+        return value.to_dict()
+    if isinstance(value, list) and value and isinstance(value[0], _SlottedRecord):
+        return [_plain(item) for item in value]
+    return value
+
+def to_dicts(records):
+    """Plain dicts of a list of records (plain dicts pass through), e.g. the win lists that go into book entries."""
+    # Duck-typed for the same reason as json_default below
+    return [record.to_dict() if hasattr(record, "to_dict") else record for record in records]
+
+def json_default(obj):
+    """json.dumps default= hook for the records in this module."""
+    # Duck-typed: run.py reaches this module as game_executables.outcome_types while the calculation
+    # modules import it flat, so the record classes may come from either module object.
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class LineWin(_SlottedRecord):
+    """One payline win (calculate_line_wins)."""
+    __slots__ = _KEYS = ("line_index", "symbol_id", "match_count", "payout_multiplier", "line_coordinates")
+    _FLAT = True
+
+    def __init__(self, line_index, symbol_id, match_count, payout_multiplier, line_coordinates):
+        self.line_index = line_index
+        self.symbol_id = symbol_id
+        self.match_count = match_count
+        self.payout_multiplier = payout_multiplier
+        self.line_coordinates = line_coordinates
+
+class ScatterWin(_SlottedRecord):
+    """A SCATTER_MULT count win (calculate_scatter_wins)."""
+    __slots__ = _KEYS = ("symbol_id", "count", "payout_multiplier", "positions")
+    _FLAT = True
+
+    def __init__(self, symbol_id, count, payout_multiplier, positions):
+        self.symbol_id = symbol_id
+        self.count = count
+        self.payout_multiplier = payout_multiplier
+        self.positions = positions
+
+class WaysWin(_SlottedRecord):
+    """One symbol's ways win (calculate_ways_wins): ways combinations of match_count reels, paying payout_multiplier in total."""
+    __slots__ = _KEYS = ("symbol_id", "match_count", "ways", "payout_multiplier")
+    _FLAT = True
+
+    def __init__(self, symbol_id, match_count, ways, payout_multiplier):
+        self.symbol_id = symbol_id
+        self.match_count = match_count
+        self.ways = ways
+        self.payout_multiplier = payout_multiplier
+
+class SpinOutcome(_SlottedRecord):
+    """Result of evaluate_base_spin_outcome."""
+    __slots__ = _KEYS = ("line_wins", "scatter_wins", "total_payout_multiplier", "triggered_features", "grid_played")
+
+    def __init__(self, line_wins, scatter_wins, total_payout_multiplier, triggered_features, grid_played):
+        self.line_wins = line_wins
+        self.scatter_wins = scatter_wins
+        self.total_payout_multiplier = total_payout_multiplier
+        self.triggered_features = triggered_features
+        self.grid_played = grid_played
+
+class CascadeStep(_SlottedRecord):
+    """
+    One tumble (cascade_calculations): the cells removed, the symbols that fell in per reel (top to bottom), and
+    the wins of the resulting grid as compact lists - [line_index, symbol_id, match_count, payout] for lines,
+    [symbol_id, match_count, ways, payout] for ways.
+    """
+    __slots__ = _KEYS = ("removed", "fill", "wins", "payout_multiplier")
+    _FLAT = True
+
+    def __init__(self, removed, fill, wins, payout_multiplier):
+        self.removed = removed
+        self.fill = fill
+        self.wins = wins
+        self.payout_multiplier = payout_multiplier
+
+class CascadeOutcome(SpinOutcome):
+    """SpinOutcome of a cascading spin: line_wins are the initial grid's, cascades the tumbles that followed."""
+    __slots__ = ("cascades",)
+    _KEYS = SpinOutcome._KEYS + ("cascades",)
+
+    def __init__(self, line_wins, scatter_wins, total_payout_multiplier, triggered_features, grid_played, cascades):
+        super().__init__(line_wins, scatter_wins, total_payout_multiplier, triggered_features, grid_played)
+        self.cascades = cascades
+
+class FeatureResult(_SlottedRecord):
+    """Result of a feature simulator; retriggered_times / final_grid_example_if_needed only when the feature sets them."""
+    __slots__ = _KEYS = ("total_feature_payout", "spins_played", "retriggered_times", "events", "final_grid_example_if_needed")
+
+    def __init__(self, total_feature_payout, spins_played, events, retriggered_times=_MISSING,
+                 final_grid_example_if_needed=_MISSING):
+        self.total_feature_payout = total_feature_payout
+        self.spins_played = spins_played
+        self.retriggered_times = retriggered_times
+        self.events = events
+        self.final_grid_example_if_needed = final_grid_example_if_needed
@@ -0,0 +1,149 @@
+# paired_comparison.py
+# Common-random-numbers A/B comparison of two GameParams variants.
+# Both configurations are driven from the same random stream per sim id: base spins share the per-reel
+# uniforms behind the reel stops (stop = floor(u * strip length)), and feature rounds re-seed the global
+# `random` module identically before each configuration runs, so grid draws, transformations and wild
+# placements line up wherever the two configurations have the same structure. The per-sim payout
+# differences are then strongly correlated pairs, and the RTP / hit-rate deltas come with paired
+# confidence intervals that are far tighter than two independent simulations would give.
+import math
+import random
+from statistics import NormalDist
+
+from reel_strip_optimizer import BaseSpinEvaluator
+from win_calculations import reel_ids
+from tralalero_free_spins_calculations import simulate_tralalero_free_spins_feature
+from bombardino_bonus_calculations import simulate_bombardino_bonus_feature
+
+DEFAULT_NUM_SIMS = {
+    "base": int(1e5),
+    "tralalero_free_spins": int(2e3),
+    "bombardino_bonus": int(5e3),
+}
+
+def _paired_delta(values_a, values_b, z):
+    """Mean of b - a with its paired CI, plus the variance reduction versus independent runs of the same size."""
+    n = len(values_a)
+    diffs = [b - a for a, b in zip(values_a, values_b)]
+    mean_a, mean_b = sum(values_a) / n, sum(values_b) / n
+    delta = mean_b - mean_a
+    if n < 2:
+        return {"a": mean_a, "b": mean_b, "delta": delta, "ci": (delta, delta), "variance_reduction": None}
+    var_a = sum((x - mean_a) ** 2 for x in values_a) / (n - 1)
+    var_b = sum((x - mean_b) ** 2 for x in values_b) / (n - 1)
+    var_d = sum((d - delta) ** 2 for d in diffs) / (n - 1)
+    half_width = z * math.sqrt(var_d / n)
+    return {
+        "a": mean_a,
+        "b": mean_b,
+        "delta": delta,
+        "ci": (delta - half_width, delta + half_width),
+        "independent_ci_half_width": z * math.sqrt((var_a + var_b) / n),
+        "variance_reduction": (var_a + var_b) / var_d if var_d > 0 else None,
+    }
+
+def _base_payouts(game_params, uniforms_by_sim):
+    evaluator = BaseSpinEvaluator(game_params)
+    strips = [game_params.REEL_STRIPS[reel_id] for reel_id in reel_ids(game_params.REEL_STRIPS)[:game_params.GRID_COLS]]
+    rows, cols = game_params.GRID_ROWS, game_params.GRID_COLS
+    payouts = []
+    for uniforms in uniforms_by_sim:
+        flat_grid = [None] * (rows * cols)
+        for c, strip in enumerate(strips):
+            stop = int(uniforms[c] * len(strip))
+            for r in range(rows):
+                flat_grid[r * cols + c] = strip[(stop + r) % len(strip)]
+        payouts.append(evaluator.evaluate(flat_grid)[0])
+    return payouts
+
+def _feature_payout(game_params, mode, round_seed):
+    random.seed(round_seed) # Same draws for both configurations
+    if mode == "tralalero_free_spins":
+        return simulate_tralalero_free_spins_feature(3, game_params)["total_feature_payout"]
+    return simulate_bombardino_bonus_feature(game_params, triggering_bonus_count=3)["total_feature_payout"]
+
+def compare_configurations(params_a, params_b, num_sims=None, seed=0, confidence=0.95):
+    """
+    Paired comparison of two GameParams variants per mode ({"base", "tralalero_free_spins", "bombardino_bonus"},
+    sims per mode from num_sims, default DEFAULT_NUM_SIMS). Returns per mode "rtp" and "hit_rate" deltas (b - a)
+    from _paired_delta, plus the payout correlation between the paired runs.
+    Feature rounds re-seed the global `random` module; its state is restored afterwards.
+    """
+    num_sims = DEFAULT_NUM_SIMS if num_sims is None else num_sims
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    saved_state = random.getstate()
+    results = {}
+    try:
+        for mode, sims in num_sims.items():
+            if sims <= 0:
+                continue
+            if mode == "base":
+                uniforms_by_sim = []
+                for sim in range(sims):
+                    rng = random.Random(f"{seed}-base-{sim}")
+                    uniforms_by_sim.append([rng.random() for _ in range(params_a.GRID_COLS)])
+                payouts_a = _base_payouts(params_a, uniforms_by_sim)
+                payouts_b = _base_payouts(params_b, uniforms_by_sim)
+            elif mode in ("tralalero_free_spins", "bombardino_bonus"):
+                payouts_a = [_feature_payout(params_a, mode, f"{seed}-{mode}-{sim}") for sim in range(sims)]
+                payouts_b = [_feature_payout(params_b, mode, f"{seed}-{mode}-{sim}") for sim in range(sims)]
+            else:
+                raise ValueError(f"Unknown mode for paired comparison: {mode}")
+
+            rtp = _paired_delta(payouts_a, payouts_b, z)
+            hit_rate = _paired_delta([1.0 if p > 0 else 0.0 for p in payouts_a],
+                                     [1.0 if p > 0 else 0.0 for p in payouts_b], z)
+            results[mode] = {
+                "sims": sims,
+                "confidence": confidence,
+                "rtp": rtp,
+                "hit_rate": hit_rate,
+                "payout_correlation": _correlation(payouts_a, payouts_b),
+            }
+    finally:
+        random.setstate(saved_state)
+    return results
+
+def _correlation(xs, ys):
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    var_y = sum((y - mean_y) ** 2 for y in ys)
+    return cov / math.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else None
+
+def format_comparison(results):
+    """Human-readable summary of compare_configurations() results."""
+    lines = []
+    for mode, res in results.items():
+        correlation = res["payout_correlation"]
+        lines.append(f"{mode}: {res['sims']} paired sims, payout correlation "
+                     f"{'n/a' if correlation is None else f'{correlation:.4f}'}")
+        for metric in ("rtp", "hit_rate"):
+            d = res[metric]
+            reduction = d["variance_reduction"]
+            lines.append(f"  {metric}: A {d['a']:.4f}  B {d['b']:.4f}  delta {d['delta']:+.4f}  "
+                         f"CI [{d['ci'][0]:+.4f}, {d['ci'][1]:+.4f}]  "
+                         f"(independent runs: +/-{d.get('independent_ci_half_width', 0):.4f}, "
+                         f"variance reduction {'n/a' if reduction is None else f'{reduction:.1f}x'})")
+    return "\n".join(lines)
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import copy
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params_a = GameParams()
+    params_b = copy.deepcopy(params_a) # Variant: one L1 stop on reel 3 replaced by M1
+    strip = list(params_b.REEL_STRIPS["reel_3"])
+    strip[strip.index("L1")] = "M1"
+    params_b.REEL_STRIPS["reel_3"] = strip
+
+    start = time.time()
+    comparison = compare_configurations(params_a, params_b, {"base": 50000, "bombardino_bonus": 1000}, seed=1)
+    print(format_comparison(comparison))
+    print(f"({time.time() - start:.1f}s)")
@@ -0,0 +1,157 @@
+# payout_classes.py
+# Payout equivalence-class compaction of the mode lookup tables (id,weight,payoutMultiplier).
+# Rounds with the same payout are interchangeable for the optimizer and for the RGS draw, so the rows of a table
+# are grouped by payout: each class keeps the summed weight of its rows plus a bounded, weight-proportional
+# reservoir of book ids to serve that payout from. The compact table has one row per class (id = the class's
+# first representative book id, weight = the class weight), so the payout distribution is exactly that of the
+# full table while the row count drops from the number of rounds to the number of distinct payouts.
+# A payoutClasses_<mode>.json sidecar maps every class back to its representative books.
+import heapq
+import json
+import math
+import os
+import random
+
+from book_store import BookStore
+
+class PayoutClass:
+    """All rows of one payout: summed weight, row count and up to reservoir_size representative book ids."""
+    def __init__(self, payout, payout_text):
+        self.payout = payout
+        self.payout_text = payout_text # As first written in the lookup table, so the compact table repeats it exactly
+        self.weight = 0
+        self.rows = 0
+        self._reservoir = [] # Min-heap of (key, book id); weighted reservoir sampling (A-Res, log keys)
+
+    @property
+    def book_ids(self):
+        return sorted(book_id for _, book_id in self._reservoir)
+
+    def to_dict(self):
+        return {"payout": self.payout_text, "weight": self.weight, "rows": self.rows, "book_ids": self.book_ids}
+
+class PayoutClassCompactor:
+    """
+    Groups lookup rows by payout. Feed rows with add() / add_entries() / add_csv(), then write the compact
+    table with lookup_entries() or write_payout_classes(). The reservoirs are seeded, so the same rows always
+    give the same representatives.
+    """
+    def __init__(self, reservoir_size: int = 16, seed=0):
+        if reservoir_size < 1:
+            raise ValueError("reservoir_size must be at least 1.")
+        self.reservoir_size = reservoir_size
+        self._rng = random.Random(seed)
+        self._classes = {} # payout (float) -> PayoutClass
+        self.rows = 0
+
+    def add(self, book_id: int, weight, payout_text: str):
+        payout = float(payout_text)
+        payout_class = self._classes.get(payout)
+        if payout_class is None:
+            payout_class = self._classes[payout] = PayoutClass(payout, payout_text)
+        payout_class.weight += weight
+        payout_class.rows += 1
+        self.rows += 1
+        # Larger key wins; key = log(u) / weight keeps a row with probability proportional to its weight.
+        # Zero-weight rows only fill a reservoir nothing else has claimed.
+        key = math.log(1.0 - self._rng.random()) / weight if weight > 0 else -math.inf
+        reservoir = payout_class._reservoir
+        if len(reservoir) < self.reservoir_size:
+            heapq.heappush(reservoir, (key, book_id))
+        elif key > reservoir[0][0]:
+            heapq.heapreplace(reservoir, (key, book_id))
+
+    def add_entries(self, entries):
+        """Adds "id,weight,payoutMultiplier" strings; header and blank lines are skipped."""
+        for entry in entries:
+            fields = entry.strip().split(",")
+            if len(fields) != 3 or not fields[0].strip().lstrip("-").isdigit():
+                continue
+            weight = fields[1].strip()
+            self.add(int(fields[0]), int(weight) if weight.isdigit() else float(weight), fields[2].strip())
+        return self
+
+    def add_csv(self, path):
+        """Adds the rows of a lookUpTable_<mode>.csv, streaming it line by line."""
+        with open(path) as f:
+            return self.add_entries(f)
+
+    def classes(self):
+        """PayoutClass objects by increasing payout."""
+        return [self._classes[payout] for payout in sorted(self._classes)]
+
+    def lookup_entries(self):
+        """The compact table: one "id,weight,payoutMultiplier" row per class."""
+        return [f"{payout_class.book_ids[0]},{payout_class.weight},{payout_class.payout_text}"
+                for payout_class in self.classes() if payout_class.rows]
+
+    def summary(self):
+        total_weight = sum(payout_class.weight for payout_class in self._classes.values())
+        return {
+            "rows": self.rows,
+            "classes": len(self._classes),
+            "compression_ratio": self.rows / len(self._classes) if self._classes else 0,
+            "rtp": sum(payout_class.weight * payout_class.payout for payout_class in self._classes.values()) / total_weight
+                   if total_weight else 0,
+        }
+
+def write_payout_classes(compactor, output_dir, mode):
+    """
+    Writes lookUpTable_<mode>_compact.csv and the payoutClasses_<mode>.json sidecar under output_dir.
+    Returns {"lookup_path", "classes_path"}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    lookup_path = os.path.join(output_dir, f"lookUpTable_{mode}_compact.csv")
+    classes_path = os.path.join(output_dir, f"payoutClasses_{mode}.json")
+    with open(lookup_path, "w") as f:
+        f.write("".join(entry + "\n" for entry in compactor.lookup_entries()))
+    with open(classes_path, "w") as f:
+        json.dump({"mode": mode, "reservoir_size": compactor.reservoir_size, "rows": compactor.rows,
+                   "classes": [payout_class.to_dict() for payout_class in compactor.classes()]}, f)
+    return {"lookup_path": lookup_path, "classes_path": classes_path}
+
+def load_payout_classes(path):
+    """The payoutClasses_<mode>.json sidecar as a dict."""
+    with open(path) as f:
+        return json.load(f)
+
+def read_class_books(classes, book_path, payout):
+    """Book entries of the class with this payout (its representative ids) from a books_<mode>.jsonl[.gz] file."""
+    payout = float(payout)
+    for payout_class in classes["classes"]:
+        if float(payout_class["payout"]) == payout:
+            break
+    else:
+        raise ValueError(f"No payout class {payout} in {classes['mode']}.")
+    with BookStore(book_path) as store: # Indexed random access instead of scanning the books file
+        for book_id in payout_class["book_ids"]:
+            yield store.get(book_id)
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+    from session_simulator import LookupTable
+    import run
+
+    params = GameParams()
+    run.NUM_SIM_ARGS.update({"base": 20000, "tralalero_free_spins": 200, "bombardino_bonus": 500})
+    output = run.run_simulations(params)
+    with tempfile.TemporaryDirectory() as output_dir:
+        for mode, entries in output["lookups"].items():
+            compactor = PayoutClassCompactor(reservoir_size=8).add_entries(entries)
+            paths = write_payout_classes(compactor, output_dir, mode)
+            summary = compactor.summary()
+            full_rtp = LookupTable.from_entries(entries).rtp
+            compact_rtp = LookupTable.from_entries(compactor.lookup_entries()).rtp
+            print(f"{mode}: {summary['rows']} rows -> {summary['classes']} classes ({summary['compression_ratio']:.0f}x), "
+                  f"mean payout full {full_rtp:.6f}x / compact {compact_rtp:.6f}x")
+        classes = load_payout_classes(os.path.join(output_dir, "payoutClasses_base.json"))
+        top = classes["classes"][-1]
+        book_path = os.path.join(output_dir, "books_base.jsonl")
+        with open(book_path, "wb") as f:
+            f.write(run.BookEncoder(params).encode_lines(output["books"]["base"]))
+        books = list(read_class_books(classes, book_path, top["payout"]))
+        print(f"Top base class {top['payout']}x: {top['rows']} rows, books {[book['id'] for book in books]}")
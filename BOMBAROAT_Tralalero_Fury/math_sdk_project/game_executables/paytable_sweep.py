@@ -0,0 +1,111 @@
+# paytable_sweep.py
+# One-pass scoring of many candidate paytables against the same reels.
+# Grids are generated and evaluated once into payout-independent hit counts (see hit_counts.py); every
+# distinct round signature becomes a row of a (signatures x symbols x counts) hit tensor, and all candidates
+# are priced together by contracting it with a (candidates x symbols x counts) payout tensor.
+import random
+
+import numpy as np
+
+from hit_counts import HitCountRecorder
+from win_calculations import reel_ids
+
+def payout_tensor(candidates, symbol_ids, max_count):
+    """(candidates x symbols x counts) array with tensor[k, s, n] = candidates[k][symbol_ids[s]][n] (0 if absent)."""
+    tensor = np.zeros((len(candidates), len(symbol_ids), max_count + 1))
+    for k, paytable in enumerate(candidates):
+        for s, symbol_id in enumerate(symbol_ids):
+            for count, payout in paytable.get(symbol_id, {}).items():
+                if count <= max_count:
+                    tensor[k, s, count] = payout
+    return tensor
+
+def sweep_recorded(recorder, candidates):
+    """
+    Prices every round held by a HitCountRecorder under each candidate paytable ({symbol_id: {count: payout}})
+    in one vectorized step. Returns one dict per candidate with rtp (mean payout multiplier per round),
+    hit_rate, volatility (standard deviation of the round payout) and max_payout_multiplier.
+    """
+    signature_rounds = recorder.signature_rounds()
+    if not signature_rounds:
+        return [{"rounds": 0, "rtp": 0, "hit_rate": 0, "volatility": 0, "max_payout_multiplier": 0} for _ in candidates]
+
+    symbol_ids = sorted({symbol_id for (line_part, _), _ in signature_rounds for symbol_id, _, _ in line_part})
+    symbol_index = {symbol_id: s for s, symbol_id in enumerate(symbol_ids)}
+    max_count = max([recorder.cols] + [n for (line_part, _), _ in signature_rounds for _, n, _ in line_part])
+    max_scatter = recorder.rows * recorder.cols
+
+    line_hits = np.zeros((len(signature_rounds), len(symbol_ids), max_count + 1))
+    scatter_hits = np.zeros((len(signature_rounds), max_scatter + 1))
+    rounds = np.zeros(len(signature_rounds))
+    for g, ((line_part, scatter_part), signature_count) in enumerate(signature_rounds):
+        for symbol_id, match_count, hits in line_part:
+            line_hits[g, symbol_index[symbol_id], match_count] += hits
+        for scatter_count, grids in scatter_part:
+            scatter_hits[g, scatter_count] += grids
+        rounds[g] = signature_count
+
+    scatter_tables = payout_tensor(candidates, [recorder.scatter_mult_symbol_id], max_scatter)[:, 0, :]
+    if not recorder.scatter_mult_symbol_id:
+        scatter_tables[:] = 0
+    # (signatures x candidates) payout of each distinct round under each paytable
+    payouts = np.einsum("gsn,ksn->gk", line_hits, payout_tensor(candidates, symbol_ids, max_count)) + scatter_hits @ scatter_tables.T
+
+    num_rounds = rounds.sum()
+    mean = rounds @ payouts / num_rounds
+    variance = np.maximum(rounds @ (payouts * payouts) / num_rounds - mean * mean, 0.0)
+    hit_rate = rounds @ (payouts > 0) / num_rounds
+    max_payout = payouts.max(axis=0)
+    return [{
+        "rounds": int(num_rounds),
+        "rtp": float(mean[k]),
+        "hit_rate": float(hit_rate[k]),
+        "volatility": float(np.sqrt(variance[k])),
+        "max_payout_multiplier": float(max_payout[k]),
+    } for k in range(len(candidates))]
+
+def sweep_base_game(game_params, candidates, num_spins, seed=None):
+    """
+    Generates num_spins base game grids from game_params.REEL_STRIPS (uniform stops, as run.py does),
+    records their hits once and prices all candidate paytables with sweep_recorded.
+    Returns (per-candidate results, recorder); the recorder can be swept again with more candidates.
+    """
+    rng = random.Random(seed)
+    rows, cols = game_params.GRID_ROWS, game_params.GRID_COLS
+    strips = [game_params.REEL_STRIPS[reel_id] for reel_id in reel_ids(game_params.REEL_STRIPS)[:cols]]
+    recorder = HitCountRecorder(game_params) # Records 2+ matches, so candidates may also pay 2 of a kind
+    for sim_id in range(1, num_spins + 1):
+        stops = [rng.randrange(len(strip)) for strip in strips]
+        grid = [[strips[c][(stops[c] + r) % len(strips[c])] for c in range(cols)] for r in range(rows)]
+        recorder.record_spin(sim_id, grid)
+    return sweep_recorded(recorder, candidates), recorder
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    candidates = []
+    for h1_scale in (0.5, 0.75, 1.0, 1.25, 1.5):
+        for low_scale in (0.5, 1.0, 1.5, 2.0):
+            paytable = {symbol_id: dict(table) for symbol_id, table in params.PAYTABLE.items()}
+            for symbol_id in ("H1", "WILD"):
+                paytable[symbol_id] = {n: p * h1_scale for n, p in paytable[symbol_id].items()}
+            paytable["L1"] = {n: p * low_scale for n, p in paytable["L1"].items()}
+            candidates.append(paytable)
+
+    start = time.time()
+    results, recorder = sweep_base_game(params, candidates, 50000, seed=1)
+    print(f"Swept {len(candidates)} paytables over {results[0]['rounds']} spins in {time.time() - start:.2f}s "
+          f"({len(recorder.signature_rounds())} distinct signatures)")
+    check = recorder.reprice(params.PAYTABLE)
+    print(f"Current paytable: sweep RTP {results[9]['rtp']:.4f}x vs reprice {check['rtp']:.4f}x, "
+          f"hit rate {results[9]['hit_rate']:.4f} vs {check['hit_rate']:.4f}")
+    for k in (0, 5, 9, 15, 19):
+        r = results[k]
+        print(f"  candidate {k}: RTP {r['rtp']:.4f}x  hit rate {r['hit_rate']:.4f}  volatility {r['volatility']:.2f}  "
+              f"max {r['max_payout_multiplier']:.0f}x")
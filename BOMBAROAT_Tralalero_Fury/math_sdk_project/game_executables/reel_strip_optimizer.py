@@ -0,0 +1,526 @@
+# reel_strip_optimizer.py
+# Simulated-annealing search over reel strip compositions and orderings for the base game.
+# Each candidate move (swap two stops, or replace one symbol) is scored incrementally: exact RTP is
+# patched from the stops whose window covers a changed position, trigger rates from the touched reel's
+# count distribution, and hit rate / volatility from only the sampled spins whose window it affects.
+import math
+import random
+from collections import Counter
+
+import win_calculations # Assumed accessible, like the other game_executables modules
+
+DEFAULT_TARGETS = {
+    "rtp": 0.965,                     # Base game payout multiplier per spin
+    "hit_rate": 0.30,                 # P(payout > 0)
+    "volatility": 5.0,                # Standard deviation of the per-spin payout multiplier
+    "free_spins_trigger_rate": 1 / 150,
+    "bombardino_trigger_rate": 1 / 200,
+}
+
+DEFAULT_TARGET_WEIGHTS = {
+    "rtp": 10.0,
+    "hit_rate": 2.0,
+    "volatility": 1.0,
+    "free_spins_trigger_rate": 2.0,
+    "bombardino_trigger_rate": 2.0,
+}
+
+class BaseSpinEvaluator:
+    """
+    Payout-only base game evaluator over a flat (row-major) grid of symbol IDs.
+    Mirrors evaluate_base_spin_outcome / calculate_line_wins / calculate_scatter_wins exactly,
+    but skips the per-win dicts so it can be called millions of times during a search.
+    """
+    def __init__(self, game_params):
+        win_calculations.require_line_evaluation(game_params, "BaseSpinEvaluator")
+        self.rows = game_params.GRID_ROWS
+        self.cols = game_params.GRID_COLS
+        self.paytable = game_params.PAYTABLE
+        self.wild_symbol_id = win_calculations.find_wild_symbol_id(game_params.SYMBOLS)
+        self.scatter_mult_symbol_id = win_calculations.find_scatter_mult_symbol_id(game_params.SYMBOLS)
+        if self.scatter_mult_symbol_id not in self.paytable:
+            self.scatter_mult_symbol_id = None
+        self.free_spins_symbol_id = getattr(game_params, "FREE_SPINS_SYMBOL_ID", None)
+        self.free_spins_trigger_count = getattr(game_params, "FREE_SPINS_TRIGGER_COUNT", 0)
+        self.bonus_symbol_id = getattr(game_params, "BOMBAROAT_BONUS_SYMBOL_ID", None)
+        self.bonus_trigger_count = getattr(game_params, "BOMBAROAT_BONUS_TRIGGER_COUNT", 0)
+
+        # Paylines compiled to flat cell indices; out-of-bounds lines are skipped like calculate_line_wins does.
+        self.paylines = []
+        for line_coords in game_params.PAYLINES:
+            if all(0 <= r < self.rows and 0 <= c < self.cols for r, c in line_coords):
+                self.paylines.append(tuple(r * self.cols + c for r, c in line_coords))
+
+    def line_payout(self, symbols):
+        """Payout of one payline given its symbols in payline order."""
+        wild = self.wild_symbol_id
+        eval_symbol = wild
+        for sym_id in symbols:
+            if sym_id != wild:
+                eval_symbol = sym_id
+                break
+        table = self.paytable.get(eval_symbol)
+        if not table:
+            return 0
+        match_count = 0
+        for sym_id in symbols:
+            if sym_id == eval_symbol or sym_id == wild:
+                match_count += 1
+            else:
+                break
+        return table.get(match_count, 0)
+
+    def evaluate(self, flat_grid):
+        """Returns (total_payout_multiplier, free_spins_triggered, bombardino_triggered)."""
+        wild = self.wild_symbol_id
+        paytable = self.paytable
+        total = 0
+        for line in self.paylines:
+            eval_symbol = wild
+            for idx in line:
+                if flat_grid[idx] != wild:
+                    eval_symbol = flat_grid[idx]
+                    break
+            table = paytable.get(eval_symbol)
+            if not table:
+                continue
+            match_count = 0
+            for idx in line:
+                sym_id = flat_grid[idx]
+                if sym_id == eval_symbol or sym_id == wild:
+                    match_count += 1
+                else:
+                    break
+            total += table.get(match_count, 0)
+
+        if self.scatter_mult_symbol_id:
+            total += self.paytable[self.scatter_mult_symbol_id].get(flat_grid.count(self.scatter_mult_symbol_id), 0)
+        fs_triggered = bool(self.free_spins_symbol_id) and \
+            flat_grid.count(self.free_spins_symbol_id) >= self.free_spins_trigger_count
+        bonus_triggered = bool(self.bonus_symbol_id) and \
+            flat_grid.count(self.bonus_symbol_id) >= self.bonus_trigger_count
+        return total, fs_triggered, bonus_triggered
+
+def _count_distribution(strip, rows, symbol_id):
+    """Distribution {count: probability} of symbol_id in the visible window of one reel over all stops."""
+    length = len(strip)
+    counts = Counter()
+    for stop in range(length):
+        counts[sum(1 for r in range(rows) if strip[(stop + r) % length] == symbol_id)] += 1
+    return {k: v / length for k, v in counts.items()}
+
+def _convolve(dist_a, dist_b):
+    result = {}
+    for ka, pa in dist_a.items():
+        for kb, pb in dist_b.items():
+            result[ka + kb] = result.get(ka + kb, 0.0) + pa * pb
+    return result
+
+def _symbol_count_distribution(strips, rows, symbol_id):
+    """Exact distribution of the number of symbol_id cells on the whole grid (reels are independent)."""
+    dist = {0: 1.0}
+    for strip in strips:
+        dist = _convolve(dist, _count_distribution(strip, rows, symbol_id))
+    return dist
+
+def _line_column_rows(evaluator, line):
+    """{column: sorted rows the payline uses on that reel}, in order of first appearance on the line."""
+    column_rows = {}
+    for idx in line:
+        column_rows.setdefault(idx % evaluator.cols, set()).add(idx // evaluator.cols)
+    return {c: sorted(rows) for c, rows in column_rows.items()}
+
+def _window_tuple(strip, stop, rows):
+    length = len(strip)
+    return tuple(strip[(stop + r) % length] for r in rows)
+
+def _exact_line_ev(evaluator, strips, line, fixed_column=None, fixed_window=None):
+    """
+    Exact expected payout of one payline. Columns are assigned in order of first appearance on the line;
+    within a column all rows used by the line are drawn jointly from the same stop, which keeps lines
+    that revisit a reel exact. Branches stop as soon as the line's payout is decided.
+    With fixed_column/fixed_window the result is conditional on that reel showing fixed_window
+    (symbols for the line's rows on that reel, as returned by _line_column_rows).
+    """
+    cols = evaluator.cols
+    cells = [(idx // cols, idx % cols) for idx in line]
+    column_rows = _line_column_rows(evaluator, line)
+    column_order = list(column_rows.keys())
+    column_windows = {}
+    for c in column_order:
+        if c == fixed_column:
+            column_windows[c] = [(tuple(fixed_window), 1.0)]
+            continue
+        strip = strips[c]
+        length = len(strip)
+        windows = Counter(_window_tuple(strip, stop, column_rows[c]) for stop in range(length))
+        column_windows[c] = [(window, n / length) for window, n in windows.items()]
+
+    wild = evaluator.wild_symbol_id
+    paytable = evaluator.paytable
+
+    def decided_payout(assigned):
+        symbols = []
+        for r, c in cells:
+            if c not in assigned:
+                break
+            symbols.append(assigned[c][column_rows[c].index(r)])
+        if len(symbols) == len(cells):
+            return evaluator.line_payout(symbols)
+        eval_symbol = next((s for s in symbols if s != wild), None)
+        if eval_symbol is None:
+            return None # Still only wilds: the evaluated symbol depends on unassigned cells
+        table = paytable.get(eval_symbol)
+        if not table:
+            return 0
+        match_count = 0
+        for sym_id in symbols:
+            if sym_id == eval_symbol or sym_id == wild:
+                match_count += 1
+            else:
+                return table.get(match_count, 0) # Streak broken before the unassigned cells
+        return None
+
+    def recurse(depth, assigned):
+        payout = decided_payout(assigned)
+        if payout is not None:
+            return payout
+        c = column_order[depth]
+        ev = 0.0
+        for window, prob in column_windows[c]:
+            assigned[c] = window
+            ev += prob * recurse(depth + 1, assigned)
+        del assigned[c]
+        return ev
+
+    return recurse(0, {})
+
+def compute_exact_base_metrics(reel_strips, game_params):
+    """
+    Exact (full stop-space) base game metrics for a strip set: RTP split into line and scatter parts,
+    and the Tralalero / Bombardino trigger probabilities. Hit rate and volatility need the joint
+    distribution over all lines and are estimated by the optimizer on its stop sample instead.
+    """
+    evaluator = BaseSpinEvaluator(game_params)
+    strips = [list(reel_strips[rid]) for rid in win_calculations.reel_ids(reel_strips)]
+    rows = evaluator.rows
+
+    line_rtp = sum(_exact_line_ev(evaluator, strips, line) for line in evaluator.paylines)
+    scatter_rtp = 0.0
+    if evaluator.scatter_mult_symbol_id:
+        table = evaluator.paytable[evaluator.scatter_mult_symbol_id]
+        dist = _symbol_count_distribution(strips, rows, evaluator.scatter_mult_symbol_id)
+        scatter_rtp = sum(p * table.get(k, 0) for k, p in dist.items())
+
+    def trigger_probability(symbol_id, trigger_count):
+        if not symbol_id:
+            return 0.0
+        dist = _symbol_count_distribution(strips, rows, symbol_id)
+        return sum(p for k, p in dist.items() if k >= trigger_count)
+
+    return {
+        "rtp": line_rtp + scatter_rtp,
+        "line_rtp": line_rtp,
+        "scatter_rtp": scatter_rtp,
+        "free_spins_trigger_rate": trigger_probability(evaluator.free_spins_symbol_id, evaluator.free_spins_trigger_count),
+        "bombardino_trigger_rate": trigger_probability(evaluator.bonus_symbol_id, evaluator.bonus_trigger_count),
+        "stop_combinations": math.prod(len(s) for s in strips),
+    }
+
+class ReelStripOptimizer:
+    """
+    Anneals reel strips toward target base game metrics.
+    - game_params: GameParams instance (paylines, paytable, symbols, trigger rules, starting REEL_STRIPS).
+    - targets / target_weights: metric name -> target value / weight in the squared relative error objective.
+    - num_samples: size of the fixed stop sample hit rate and volatility are tracked on
+      (common random numbers across moves). RTP and trigger rates are tracked exactly.
+    - block_size: moves are made on one focus reel at a time for this many iterations, so each line's
+      EV conditional on the focus reel's window can be cached and RTP patched exactly per move.
+    - min_symbol_count: minimum copies of every symbol kept on each strip by composition moves.
+    """
+    def __init__(self, game_params, targets=None, target_weights=None, num_samples=20000, block_size=100,
+                 min_symbol_count=1, composition_move_rate=0.5, seed=None, initial_strips=None):
+        self.game_params = game_params
+        self.evaluator = BaseSpinEvaluator(game_params)
+        self.targets = dict(targets if targets is not None else DEFAULT_TARGETS)
+        self.target_weights = dict(DEFAULT_TARGET_WEIGHTS)
+        if target_weights:
+            self.target_weights.update(target_weights)
+        self.block_size = block_size
+        self.min_symbol_count = min_symbol_count
+        self.composition_move_rate = composition_move_rate
+        self.rng = random.Random(seed)
+
+        source_strips = initial_strips if initial_strips is not None else game_params.REEL_STRIPS
+        self.reel_ids = win_calculations.reel_ids(source_strips)
+        if len(self.reel_ids) != self.evaluator.cols:
+            raise ValueError(f"Expected {self.evaluator.cols} reel strips, got {len(self.reel_ids)}.")
+        self.strips = [list(source_strips[rid]) for rid in self.reel_ids]
+        self.symbol_ids = sorted({s for strip in self.strips for s in strip} | set(game_params.SYMBOLS.keys()))
+
+        self._init_samples(num_samples)
+        self._begin_block(0)
+
+    # --- Sample bookkeeping (hit rate, volatility) ---
+
+    def _init_samples(self, num_samples):
+        rows = self.evaluator.rows
+        self.num_samples = num_samples
+        self.stops = [[self.rng.randrange(len(strip)) for strip in self.strips] for _ in range(num_samples)]
+        # coverage[c][pos]: samples whose visible window on reel c includes strip position pos
+        self.coverage = [[[] for _ in range(len(strip))] for strip in self.strips]
+        for n, sample_stops in enumerate(self.stops):
+            for c, stop in enumerate(sample_stops):
+                length = len(self.strips[c])
+                for r in range(rows):
+                    self.coverage[c][(stop + r) % length].append(n)
+
+        self.payouts = [0] * num_samples
+        self.fs_flags = [False] * num_samples
+        self.bonus_flags = [False] * num_samples
+        self.sums = {"payout": 0.0, "payout_sq": 0.0, "hits": 0, "fs": 0, "bonus": 0}
+        for n in range(num_samples):
+            self._store_sample(n, *self.evaluator.evaluate(self._sample_grid(n)))
+
+    def _sample_grid(self, n):
+        rows, cols = self.evaluator.rows, self.evaluator.cols
+        flat_grid = [None] * (rows * cols)
+        for c, stop in enumerate(self.stops[n]):
+            strip = self.strips[c]
+            length = len(strip)
+            for r in range(rows):
+                flat_grid[r * cols + c] = strip[(stop + r) % length]
+        return flat_grid
+
+    def _store_sample(self, n, payout, fs_triggered, bonus_triggered):
+        """Replaces sample n's contribution in the running sums."""
+        sums = self.sums
+        old = self.payouts[n]
+        sums["payout"] += payout - old
+        sums["payout_sq"] += payout * payout - old * old
+        sums["hits"] += (payout > 0) - (old > 0)
+        sums["fs"] += fs_triggered - self.fs_flags[n]
+        sums["bonus"] += bonus_triggered - self.bonus_flags[n]
+        self.payouts[n] = payout
+        self.fs_flags[n] = fs_triggered
+        self.bonus_flags[n] = bonus_triggered
+
+    def sampled_metrics(self):
+        sums = self.sums
+        n = self.num_samples
+        mean = sums["payout"] / n
+        variance = max(sums["payout_sq"] / n - mean * mean, 0.0)
+        return {
+            "rtp": mean,
+            "hit_rate": sums["hits"] / n,
+            "volatility": math.sqrt(variance),
+            "free_spins_trigger_rate": sums["fs"] / n,
+            "bombardino_trigger_rate": sums["bonus"] / n,
+        }
+
+    # --- Exact bookkeeping (RTP, trigger rates) ---
+
+    def _begin_block(self, c):
+        """Makes reel c the focus reel: caches per-line conditional EVs and the other reels' count distributions."""
+        evaluator = self.evaluator
+        self.focus_reel = c
+        self._line_terms = [] # (line, rows used on reel c, {window: conditional EV})
+        fixed_line_rtp = 0.0 # Lines that never touch reel c
+        for line in evaluator.paylines:
+            rows = _line_column_rows(evaluator, line).get(c)
+            if rows is None:
+                fixed_line_rtp += _exact_line_ev(evaluator, self.strips, line)
+            else:
+                self._line_terms.append((line, rows, {}))
+        strip = self.strips[c]
+        self._line_rtp = fixed_line_rtp + sum(
+            self._conditional_line_ev(term, _window_tuple(strip, stop, term[1]))
+            for term in self._line_terms for stop in range(len(strip))) / len(strip)
+
+        other_strips = [s for i, s in enumerate(self.strips) if i != c]
+        self._other_count_dists = {
+            symbol_id: _symbol_count_distribution(other_strips, evaluator.rows, symbol_id)
+            for symbol_id in (evaluator.scatter_mult_symbol_id, evaluator.free_spins_symbol_id, evaluator.bonus_symbol_id)
+            if symbol_id
+        }
+        self._scatter_metrics = self._focus_scatter_metrics()
+
+    def _conditional_line_ev(self, term, window):
+        line, _, cache = term
+        if window not in cache:
+            cache[window] = _exact_line_ev(self.evaluator, self.strips, line, self.focus_reel, window)
+        return cache[window]
+
+    def _focus_scatter_metrics(self):
+        """Exact scatter RTP and trigger rates; only the focus reel's count distribution is recomputed."""
+        evaluator = self.evaluator
+        strip = self.strips[self.focus_reel]
+
+        def full_dist(symbol_id):
+            return _convolve(self._other_count_dists[symbol_id], _count_distribution(strip, evaluator.rows, symbol_id))
+
+        metrics = {"scatter_rtp": 0.0, "free_spins_trigger_rate": 0.0, "bombardino_trigger_rate": 0.0}
+        if evaluator.scatter_mult_symbol_id:
+            table = evaluator.paytable[evaluator.scatter_mult_symbol_id]
+            metrics["scatter_rtp"] = sum(p * table.get(k, 0) for k, p in full_dist(evaluator.scatter_mult_symbol_id).items())
+        if evaluator.free_spins_symbol_id:
+            metrics["free_spins_trigger_rate"] = sum(
+                p for k, p in full_dist(evaluator.free_spins_symbol_id).items() if k >= evaluator.free_spins_trigger_count)
+        if evaluator.bonus_symbol_id:
+            metrics["bombardino_trigger_rate"] = sum(
+                p for k, p in full_dist(evaluator.bonus_symbol_id).items() if k >= evaluator.bonus_trigger_count)
+        return metrics
+
+    def current_metrics(self):
+        """Exact RTP and trigger rates with sampled hit rate and volatility; this is what the objective scores."""
+        sampled = self.sampled_metrics()
+        return {
+            "rtp": self._line_rtp + self._scatter_metrics["scatter_rtp"],
+            "hit_rate": sampled["hit_rate"],
+            "volatility": sampled["volatility"],
+            "free_spins_trigger_rate": self._scatter_metrics["free_spins_trigger_rate"],
+            "bombardino_trigger_rate": self._scatter_metrics["bombardino_trigger_rate"],
+        }
+
+    def objective(self, metrics=None):
+        metrics = metrics or self.current_metrics()
+        score = 0.0
+        for name, target in self.targets.items():
+            if target:
+                score += self.target_weights.get(name, 1.0) * ((metrics[name] - target) / target) ** 2
+        return score
+
+    # --- Moves ---
+
+    def _propose_move(self):
+        """Returns {position: new_symbol} for the focus reel, or None if no legal move was drawn."""
+        strip = self.strips[self.focus_reel]
+        if self.rng.random() < self.composition_move_rate:
+            pos = self.rng.randrange(len(strip))
+            old_symbol = strip[pos]
+            if strip.count(old_symbol) <= self.min_symbol_count:
+                return None
+            new_symbol = self.rng.choice(self.symbol_ids)
+            if new_symbol == old_symbol:
+                return None
+            return {pos: new_symbol}
+        pos_a = self.rng.randrange(len(strip))
+        pos_b = self.rng.randrange(len(strip))
+        if strip[pos_a] == strip[pos_b]:
+            return None
+        return {pos_a: strip[pos_b], pos_b: strip[pos_a]}
+
+    def _apply_move(self, changes):
+        """Applies changes to the focus reel, patching exact and sampled metrics. Returns the undo record."""
+        c = self.focus_reel
+        strip = self.strips[c]
+        length = len(strip)
+        rows = self.evaluator.rows
+        undo = (dict((pos, strip[pos]) for pos in changes), self._line_rtp, self._scatter_metrics, [])
+
+        # Exact line RTP: only stops whose window covers a changed position move
+        affected_stops = {(pos - r) % length for pos in changes for r in range(rows)}
+        before = sum(self._conditional_line_ev(term, _window_tuple(strip, stop, term[1]))
+                     for term in self._line_terms for stop in affected_stops)
+        for pos, symbol in changes.items():
+            strip[pos] = symbol
+        after = sum(self._conditional_line_ev(term, _window_tuple(strip, stop, term[1]))
+                    for term in self._line_terms for stop in affected_stops)
+        self._line_rtp += (after - before) / length
+        self._scatter_metrics = self._focus_scatter_metrics()
+
+        # Sampled metrics: only samples whose window on reel c covers a changed position
+        affected_samples = set()
+        for pos in changes:
+            affected_samples.update(self.coverage[c][pos])
+        previous_results = undo[3]
+        for n in affected_samples:
+            previous_results.append((n, self.payouts[n], self.fs_flags[n], self.bonus_flags[n]))
+            self._store_sample(n, *self.evaluator.evaluate(self._sample_grid(n)))
+        return undo
+
+    def _undo_move(self, undo):
+        previous_symbols, line_rtp, scatter_metrics, previous_results = undo
+        for pos, symbol in previous_symbols.items():
+            self.strips[self.focus_reel][pos] = symbol
+        self._line_rtp = line_rtp
+        self._scatter_metrics = scatter_metrics
+        for n, payout, fs_triggered, bonus_triggered in previous_results:
+            self._store_sample(n, payout, fs_triggered, bonus_triggered)
+
+    # --- Search ---
+
+    def optimize(self, iterations=5000, start_temperature=0.05, end_temperature=1e-4, report_every=0):
+        """
+        Runs simulated annealing and returns the best strip set found:
+        {"reel_strips": {reel_id: tuple}, "metrics": ..., "exact_metrics": ..., "objective": ...}
+        """
+        current_score = self.objective()
+        best_score = current_score
+        best_strips = [strip[:] for strip in self.strips]
+        best_metrics = self.current_metrics()
+        accepted = 0
+        cooling = (end_temperature / start_temperature) ** (1.0 / max(iterations - 1, 1))
+        temperature = start_temperature
+
+        for it in range(iterations):
+            if it and it % self.block_size == 0:
+                self._begin_block(self.rng.randrange(len(self.strips)))
+                current_score = self.objective() # Re-anchored on freshly summed exact terms
+            move = self._propose_move()
+            if move is not None:
+                undo = self._apply_move(move)
+                new_score = self.objective()
+                delta = new_score - current_score
+                if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                    current_score = new_score
+                    accepted += 1
+                    if new_score < best_score:
+                        best_score = new_score
+                        best_strips = [strip[:] for strip in self.strips]
+                        best_metrics = self.current_metrics()
+                else:
+                    self._undo_move(undo)
+            temperature *= cooling
+            if report_every and (it + 1) % report_every == 0:
+                print(f"  iter {it + 1}: objective={current_score:.5f} best={best_score:.5f} "
+                      f"accepted={accepted} T={temperature:.2e}")
+
+        frozen = {rid: tuple(strip) for rid, strip in zip(self.reel_ids, best_strips)}
+        return {
+            "reel_strips": frozen,
+            "objective": best_score,
+            "metrics": best_metrics,
+            "exact_metrics": compute_exact_base_metrics(frozen, self.game_params),
+            "iterations": iterations,
+            "accepted_moves": accepted,
+        }
+
+def format_reel_strips(reel_strips):
+    """Formats a frozen strip set as Python source for pasting into GameParams._define_reel_strips."""
+    lines = ["{"]
+    for rid in win_calculations.reel_ids(reel_strips):
+        symbols = ", ".join(f'"{s}"' for s in reel_strips[rid])
+        lines.append(f'    "{rid}": [{symbols}], # Length {len(reel_strips[rid])}')
+    lines.append("}")
+    return "\n".join(lines)
+
+# Example usage (for running this module directly)
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from game_config import GameParams
+
+    params = GameParams()
+    optimizer = ReelStripOptimizer(params, num_samples=5000, seed=7)
+    print("\nStarting metrics:", optimizer.current_metrics())
+    print("Starting exact metrics:", compute_exact_base_metrics(params.REEL_STRIPS, params))
+
+    start = time.time()
+    result = optimizer.optimize(iterations=2000, report_every=500)
+    print(f"\nOptimization finished in {time.time() - start:.1f}s (objective {result['objective']:.5f})")
+    print("Metrics:", result["metrics"])
+    print("Exact metrics:", result["exact_metrics"])
+    print(format_reel_strips(result["reel_strips"]))
@@ -0,0 +1,218 @@
+# session_simulator.py
+# Player-session analysis on top of the mode lookup tables (id,weight,payoutMultiplier).
+# Per-spin outcomes are sampled from the base lookup table (weighted); base rounds that triggered a feature
+# add a round sampled from that feature's lookup table. Millions of player balances evolve in parallel as
+# NumPy arrays, with stop-loss / stop-win rules, and the run reports bust probability, session lengths,
+# survival curves and balance percentiles.
+import csv
+
+import numpy as np
+
+# triggered_features "feature_type" (base_game_calculations) -> lookup table mode
+FEATURE_MODES = {
+    "TRALALERO_FREE_SPINS": "tralalero_free_spins",
+    "BOMBAROAT_BONUS": "bombardino_bonus",
+}
+
+DEFAULT_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+class LookupTable:
+    """Weighted per-round outcomes of one mode as parallel arrays (ids, weights, payout multipliers)."""
+    def __init__(self, ids, weights, payouts):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.payouts = np.asarray(payouts, dtype=np.float64)
+        if len(self.ids) == 0 or self.weights.sum() <= 0:
+            raise ValueError("A lookup table needs at least one row with positive weight.")
+        self._alias_probability, self._alias = _alias_table(self.weights)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """From "id,weight,payoutMultiplier" strings (as in run.py's lookups); a header line is skipped."""
+        ids, weights, payouts = [], [], []
+        for entry in entries:
+            fields = entry.strip().split(",")
+            if len(fields) != 3 or not fields[0].strip().lstrip("-").isdigit():
+                continue # Header or blank line
+            ids.append(int(fields[0]))
+            weights.append(float(fields[1]))
+            payouts.append(float(fields[2]))
+        return cls(ids, weights, payouts)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline="") as f:
+            return cls.from_entries(",".join(row) for row in csv.reader(f))
+
+    @property
+    def rtp(self):
+        return float(self.weights @ self.payouts / self.weights.sum())
+
+    def sample_indices(self, rng, size):
+        """Weighted row indices in O(1) each (alias method)."""
+        indices = rng.integers(0, len(self.ids), size)
+        use_alias = rng.random(size) >= self._alias_probability[indices]
+        indices[use_alias] = self._alias[indices[use_alias]]
+        return indices
+
+def _alias_table(weights):
+    """Vose's alias table: row i is kept with probability[i], otherwise replaced by alias[i]."""
+    n = len(weights)
+    scaled = weights * n / weights.sum()
+    probability = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    scaled = scaled.tolist()
+    while small and large:
+        s, l = small.pop(), large.pop()
+        probability[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return probability, alias # Leftovers (rounding) keep probability 1
+
+def base_feature_flags(base_books):
+    """{feature mode: set of base round ids that triggered it} from run.py base book entries."""
+    flags = {mode: set() for mode in FEATURE_MODES.values()}
+    for book in base_books:
+        for event in book.get("events", []):
+            if event.get("type") == "feature_triggers":
+                for feature in event.get("features", []):
+                    mode = FEATURE_MODES.get(feature.get("feature_type"))
+                    if mode:
+                        flags[mode].add(book["id"])
+    return flags
+
+class SessionSimulator:
+    """
+    Vectorized player sessions over a base LookupTable, optionally with feature LookupTables
+    ({mode: LookupTable}) and the base round ids that trigger each feature ({mode: ids}, see base_feature_flags).
+    A triggered base round pays its own multiplier plus one sampled round of each triggered feature.
+    """
+    def __init__(self, base_table, feature_tables=None, feature_trigger_ids=None):
+        self.base_table = base_table
+        self.feature_tables = {}
+        self.feature_flags = {}
+        for mode, table in (feature_tables or {}).items():
+            trigger_ids = (feature_trigger_ids or {}).get(mode)
+            if not trigger_ids:
+                continue # Feature never triggered from these base rounds
+            self.feature_tables[mode] = table
+            self.feature_flags[mode] = np.isin(base_table.ids, np.fromiter(trigger_ids, dtype=np.int64))
+
+    def spin_rtp(self):
+        """Expected payout multiplier of one spin including triggered features (what sessions drift with)."""
+        base = self.base_table
+        expected = base.weights @ base.payouts
+        for mode, table in self.feature_tables.items():
+            expected += base.weights[self.feature_flags[mode]].sum() * table.rtp
+        return float(expected / base.weights.sum())
+
+    def sample_payouts(self, rng, size):
+        """Payout multipliers of size independent spins."""
+        indices = self.base_table.sample_indices(rng, size)
+        payouts = self.base_table.payouts[indices]
+        for mode, table in self.feature_tables.items():
+            triggered = np.flatnonzero(self.feature_flags[mode][indices])
+            if len(triggered):
+                payouts[triggered] += table.payouts[table.sample_indices(rng, len(triggered))]
+        return payouts
+
+    def simulate(self, num_players, bankroll, bet, max_spins, stop_loss=None, stop_win=None,
+                 checkpoints=None, percentiles=DEFAULT_PERCENTILES, seed=None):
+        """
+        Plays num_players sessions of up to max_spins spins, starting from bankroll at a fixed bet.
+        A session ends when the balance no longer covers the bet (bust), when the player has lost stop_loss
+        (balance <= bankroll - stop_loss) or won stop_win (balance >= bankroll + stop_win), or at max_spins.
+        checkpoints: spin counts at which the balance distribution is reported (stopped players keep their
+        final balance). Returns probabilities per end reason, session length and final balance percentiles,
+        and survival_curve[n] = share of players still playing after n spins.
+        """
+        rng = np.random.default_rng(seed)
+        checkpoints = sorted(set(checkpoints or [max_spins]))
+        balances = np.full(num_players, float(bankroll))
+        lengths = np.full(num_players, max_spins, dtype=np.int64)
+        reasons = np.zeros(num_players, dtype=np.int8) # 0 reached max spins, 1 bust, 2 stop loss, 3 stop win
+        # Only the players still in session are kept, as compact arrays; finished ones are written back once
+        active = np.arange(num_players)
+        active_balances = balances.copy()
+        survival = np.empty(max_spins + 1)
+        survival[0] = 1.0
+        at_checkpoint = {}
+
+        loss_floor = bankroll - stop_loss if stop_loss is not None else -np.inf
+        win_ceiling = bankroll + stop_win if stop_win is not None else np.inf
+        for spin in range(1, max_spins + 1):
+            if len(active):
+                active_balances += bet * self.sample_payouts(rng, len(active)) - bet
+                reason = np.where(active_balances < bet, 1,
+                                  np.where(active_balances <= loss_floor, 2, np.where(active_balances >= win_ceiling, 3, 0)))
+                stopped = reason > 0
+                if stopped.any():
+                    finished = active[stopped]
+                    balances[finished] = active_balances[stopped]
+                    lengths[finished] = spin
+                    reasons[finished] = reason[stopped]
+                    active = active[~stopped]
+                    active_balances = active_balances[~stopped]
+            survival[spin] = len(active) / num_players
+            if spin in checkpoints:
+                balances[active] = active_balances
+                at_checkpoint[spin] = {
+                    "mean_balance": float(balances.mean()),
+                    "balance_percentiles": dict(zip(percentiles, np.percentile(balances, percentiles).tolist())),
+                    "still_playing": len(active) / num_players,
+                }
+        balances[active] = active_balances
+
+        return {
+            "players": num_players,
+            "bankroll": bankroll,
+            "bet": bet,
+            "max_spins": max_spins,
+            "spin_rtp": self.spin_rtp(),
+            "bust_probability": float(np.mean(reasons == 1)),
+            "stop_loss_probability": float(np.mean(reasons == 2)),
+            "stop_win_probability": float(np.mean(reasons == 3)),
+            "max_spins_probability": float(np.mean(reasons == 0)),
+            "mean_session_length": float(lengths.mean()),
+            "session_length_percentiles": dict(zip(percentiles, np.percentile(lengths, percentiles).tolist())),
+            "mean_final_balance": float(balances.mean()),
+            "final_balance_percentiles": dict(zip(percentiles, np.percentile(balances, percentiles).tolist())),
+            "checkpoints": at_checkpoint,
+            "survival_curve": survival,
+        }
+
+def format_session_results(results):
+    """Human-readable summary of SessionSimulator.simulate() results."""
+    lines = [f"{results['players']} players, bankroll {results['bankroll']}, bet {results['bet']}, "
+             f"up to {results['max_spins']} spins (spin RTP {results['spin_rtp']:.4f}x)",
+             f"  Bust: {results['bust_probability']:.2%}  Stop-loss: {results['stop_loss_probability']:.2%}  "
+             f"Stop-win: {results['stop_win_probability']:.2%}  Reached max spins: {results['max_spins_probability']:.2%}",
+             f"  Session length: mean {results['mean_session_length']:.1f}, "
+             + ", ".join(f"p{p} {v:.0f}" for p, v in results["session_length_percentiles"].items()),
+             f"  Final balance: mean {results['mean_final_balance']:.2f}, "
+             + ", ".join(f"p{p} {v:.2f}" for p, v in results["final_balance_percentiles"].items())]
+    for spin, checkpoint in results["checkpoints"].items():
+        lines.append(f"  After {spin} spins: mean balance {checkpoint['mean_balance']:.2f}, "
+                     f"still playing {checkpoint['still_playing']:.2%}, median {checkpoint['balance_percentiles'].get(50, float('nan')):.2f}")
+    return "\n".join(lines)
+
+# Example usage (for testing this module directly)
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    # Synthetic lookup tables: mostly small base wins, rare triggers into large feature rounds
+    base_payouts = np.round(rng.exponential(0.6, 50000) * (rng.random(50000) < 0.3), 2)
+    base = LookupTable(np.arange(1, 50001), np.ones(50000), base_payouts)
+    free_spins = LookupTable(np.arange(50001, 52001), np.ones(2000), np.round(rng.exponential(60.0, 2000), 2))
+    triggers = {"tralalero_free_spins": set(range(1, 50001, 150))}
+
+    simulator = SessionSimulator(base, {"tralalero_free_spins": free_spins}, triggers)
+    start = time.time()
+    results = simulator.simulate(num_players=1_000_000, bankroll=100, bet=1, max_spins=500,
+                                 stop_loss=80, stop_win=100, checkpoints=[50, 100, 250, 500], seed=7)
+    print(format_session_results(results))
+    print(f"({time.time() - start:.1f}s)")
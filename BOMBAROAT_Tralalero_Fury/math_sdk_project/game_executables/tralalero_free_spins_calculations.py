@@ -1,7 +1,8 @@
 # tralalero_free_spins_calculations.py
 import random # For random transformations and placeholder grid generation
 # Assume win_calculations.py and game_config.py are accessible in the SDK's environment
-import win_calculations 
+import win_calculations
+from outcome_types import FeatureResult
 # from .. import game_config # This relative import would be typical if run by SDK as part of a package
 
 # For standalone testing, we'll mock or pass game_params
@@ -24,9 +25,11 @@ def generate_grid_for_free_spin(game_params):
     # print("Warning: Free spin grid generation is using random.choice (placeholder).")
     return grid
 
-def apply_symbol_transformations(grid, game_params):
+def apply_symbol_transformations(grid, game_params, changed_cells=None):
     """
     Applies random symbol transformations based on config.
+    - changed_cells: optional list; the (row, col) of every transformed cell is appended to it, so line results
+      of the untransformed grid can be updated with win_calculations.IncrementalLineEvaluator.
     """
     transformed_grid = [row[:] for row in grid] # Create a copy
     
@@ -57,21 +60,27 @@ def apply_symbol_transformations(grid, game_params):
         if candidates:
             r, c = random.choice(candidates)
             transformed_grid[r][c] = target_symbol
+            if changed_cells is not None:
+                changed_cells.append((r, c))
             # print(f"Debug: Transformed symbol at ({r},{c}) to {target_symbol}")
             
     return transformed_grid
 
-def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params, initial_grid=None):
+def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params, initial_grid=None, hit_recorder=None,
+                                          grid_generator=None):
     """
     Simulates the entire Tralalero Free Spins feature.
     - triggering_scatter_count: Number of scatters that triggered the feature.
     - game_params: Instance of GameParams.
     - initial_grid: The grid that triggered the feature (optional, for context).
+    - hit_recorder: Optional HitCountRecorder; every evaluated grid is added to its round in progress.
+    - grid_generator: Optional replacement for generate_grid_for_free_spin (same signature), e.g. an
+      importance sampler that biases the drawn symbols and tracks the likelihood ratio.
     """
     if not hasattr(game_params, 'tralalero_free_spins_config') or \
        not isinstance(game_params.tralalero_free_spins_config, dict):
         print("Error: tralalero_free_spins_config missing or invalid in game_params.")
-        return {"total_feature_payout": 0, "spins_played": 0, "events": ["FS config error."]}
+        return FeatureResult(0, 0, ["FS config error."])
         
     fs_config = game_params.tralalero_free_spins_config
     spins_awarded_map = fs_config.get("spins_awarded_by_scatter_count", {})
@@ -85,7 +94,7 @@ def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params,
             num_initial_spins = spins_awarded_map[max_defined_scatters]
 
     if num_initial_spins == 0:
-        return {"total_feature_payout": 0, "spins_played": 0, "events": ["No spins awarded due to scatter count."]}
+        return FeatureResult(0, 0, ["No spins awarded due to scatter count."])
 
     current_spins_remaining = num_initial_spins
     total_feature_payout = 0
@@ -99,7 +108,7 @@ def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params,
         spins_played_count += 1
         current_spins_remaining -= 1
         
-        spin_grid = generate_grid_for_free_spin(game_params) 
+        spin_grid = (grid_generator or generate_grid_for_free_spin)(game_params)
         transformed_grid = apply_symbol_transformations(spin_grid, game_params)
         
         feature_events.append({
@@ -109,9 +118,9 @@ def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params,
             # "transformed_grid_segment_if_needed": transformed_grid[0]
         })
         
-        line_wins, line_payout = win_calculations.calculate_line_wins(
-            transformed_grid, game_params.PAYLINES, game_params.PAYTABLE, game_params.SYMBOLS
-        )
+        line_wins, line_payout = win_calculations.calculate_grid_wins(transformed_grid, game_params) # Lines or ways
+        if hit_recorder is not None:
+            hit_recorder.record_grid(transformed_grid, include_scatter=True)
         
         scatter_mult_id = getattr(game_params, 'SCATTER_MULT_SYMBOL_ID', "SCATTER_MULT") # Use a default or get from params
         scatter_wins, scatter_payout = win_calculations.calculate_scatter_wins(
@@ -157,13 +166,8 @@ def simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params,
             feature_events.append("All free spins complete.")
             break
             
-    return {
-        "total_feature_payout": total_feature_payout,
-        "spins_played": spins_played_count,
-        "retriggered_times": retrigger_count,
-        "events": feature_events,
-        "final_grid_example_if_needed": transformed_grid # Example of what could be returned
-    }
+    return FeatureResult(total_feature_payout, spins_played_count, feature_events, retriggered_times=retrigger_count,
+                         final_grid_example_if_needed=transformed_grid) # Example of what could be returned
 
 # Example Usage (for testing this module directly)
 if __name__ == "__main__":
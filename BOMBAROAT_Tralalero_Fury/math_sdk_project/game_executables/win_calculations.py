@@ -1,4 +1,9 @@
 # win_calculations.py
+import numpy as np
+
+from outcome_types import LineWin, ScatterWin, WaysWin
+
+WIN_EVALUATION_MODES = ("lines", "ways")
 
 def get_symbol_type(symbol_id, symbols_data):
     """Helper to get symbol type, e.g., 'wild'."""
@@ -6,6 +11,69 @@ def get_symbol_type(symbol_id, symbols_data):
         return symbols_data[symbol_id].get("type", "normal") # Assuming 'type' field in symbol definition
     return "normal"
 
+def find_wild_symbol_id(symbols_data):
+    """Returns the WILD symbol ID (Crocodrillo by name, then by type/name/ID fallbacks), or None."""
+    for sid, sdata in symbols_data.items():
+        if sdata.get("name", "").lower() == "crocodrillo": # Assuming Crocodrillo is WILD
+            return sid
+    for sid, sdata in symbols_data.items(): # Fallback if not found by name
+        # Check for 'type' field if 'name' logic fails or isn't specific enough
+        if sdata.get("type", "").lower() == "wild" or \
+           "wild" in sdata.get("name","").lower() or \
+           sid.upper() == "WILD":
+            return sid
+    return None
+
+def reel_ids(reel_strips):
+    """Reel IDs of reel_strips ({"reel_1": [...], ...}) in reel order (by their numeric suffix)."""
+    return sorted(reel_strips.keys(), key=lambda rid: int(rid.split("_")[-1]))
+
+def find_scatter_mult_symbol_id(symbols_data):
+    """Returns the SCATTER_MULT symbol ID (Lirili Larila by name, then the SCATTER_MULT ID), or None."""
+    for sid, sdata in symbols_data.items():
+        if sdata.get("name", "").lower() == "lirili larila":
+            return sid
+    return "SCATTER_MULT" if "SCATTER_MULT" in symbols_data else None
+
+def evaluate_payline(grid, line_index, line_coords, paytable, wild_symbol_id):
+    """
+    The LineWin of one payline (calculate_line_wins' rule for a single line), or None when it does not pay.
+    Lets callers that know which cells changed (e.g. cascade_calculations) re-evaluate only the lines through them.
+    """
+    line_symbols_ids = []
+    try:
+        for r, c in line_coords:
+            line_symbols_ids.append(grid[r][c])
+    except IndexError:
+        # print(f"Warning: Payline {line_index} coordinates out of bounds for grid {grid}")
+        return None
+
+    # Determine the symbol to check for wins (first non-wild from left)
+    # or if all wilds, take the wild symbol.
+    line_eval_symbol_id = None
+    for sym_id in line_symbols_ids:
+        if sym_id != wild_symbol_id:
+            line_eval_symbol_id = sym_id
+            break
+    if line_eval_symbol_id is None and wild_symbol_id in line_symbols_ids: # All wilds on the line
+        line_eval_symbol_id = wild_symbol_id
+    
+    if not line_eval_symbol_id or line_eval_symbol_id not in paytable:
+        return None # Not a paying symbol or no symbol to evaluate
+
+    # Count matches from left
+    match_count = 0
+    for sym_id in line_symbols_ids:
+        if sym_id == line_eval_symbol_id or sym_id == wild_symbol_id:
+            match_count += 1
+        else:
+            break # Streak broken
+
+    if match_count > 0 and line_eval_symbol_id in paytable and match_count in paytable[line_eval_symbol_id]:
+        payout = paytable[line_eval_symbol_id][match_count]
+        return LineWin(line_index, line_eval_symbol_id, match_count, payout, line_coords)
+    return None
+
 def calculate_line_wins(grid, paylines, paytable, symbols_data):
     """
     Calculates wins based on paylines.
@@ -21,65 +89,226 @@ def calculate_line_wins(grid, paylines, paytable, symbols_data):
         print("Error: Missing critical data for win calculation.")
         return [], 0
 
-    wild_symbol_id = None
-    for sid, sdata in symbols_data.items():
-        if sdata.get("name", "").lower() == "crocodrillo": # Assuming Crocodrillo is WILD
-             wild_symbol_id = sid
-             break
-    if not wild_symbol_id: # Fallback if not found by name
-        for sid, sdata in symbols_data.items():
-            # Check for 'type' field if 'name' logic fails or isn't specific enough
-            if sdata.get("type", "").lower() == "wild" or \
-               "wild" in sdata.get("name","").lower() or \
-               sid.upper() == "WILD":
-                wild_symbol_id = sid
-                break
+    wild_symbol_id = find_wild_symbol_id(symbols_data)
     # print(f"Debug: Wild symbol identified as: {wild_symbol_id}")
 
 
     for i, line_coords in enumerate(paylines):
-        line_symbols_ids = []
+        line_win = evaluate_payline(grid, i, line_coords, paytable, wild_symbol_id)
+        if line_win is not None:
+            line_wins.append(line_win)
+            total_payout_multiplier += line_win.payout_multiplier
+            
+    return line_wins, total_payout_multiplier
+
+def calculate_line_payout(grid, paylines, paytable, symbols_data):
+    """
+    Total payout of calculate_line_wins(...) without building its LineWin records (lean evaluation for RTP runs
+    and lookup tables; the records can be rebuilt later with calculate_line_wins / base_game_calculations.explain).
+    """
+    if not grid or not paylines or not paytable or not symbols_data:
+        print("Error: Missing critical data for win calculation.")
+        return 0
+    wild_symbol_id = find_wild_symbol_id(symbols_data)
+    total_payout_multiplier = 0
+    for line_coords in paylines:
         try:
-            for r, c in line_coords:
-                line_symbols_ids.append(grid[r][c])
+            line_symbols_ids = [grid[r][c] for r, c in line_coords]
         except IndexError:
-            # print(f"Warning: Payline {i} coordinates out of bounds for grid {grid}")
-            continue
-
-        # Determine the symbol to check for wins (first non-wild from left)
-        # or if all wilds, take the wild symbol.
-        line_eval_symbol_id = None
+            continue # Skipped by calculate_line_wins too
+        line_eval_symbol_id = wild_symbol_id # Stays WILD only for an all-WILD line
         for sym_id in line_symbols_ids:
             if sym_id != wild_symbol_id:
                 line_eval_symbol_id = sym_id
                 break
-        if line_eval_symbol_id is None and wild_symbol_id in line_symbols_ids: # All wilds on the line
-            line_eval_symbol_id = wild_symbol_id
-        
-        if not line_eval_symbol_id or line_eval_symbol_id not in paytable:
-            continue # Not a paying symbol or no symbol to evaluate
-
-        # Count matches from left
+        payouts = paytable.get(line_eval_symbol_id) if line_eval_symbol_id else None
+        if not payouts:
+            continue
         match_count = 0
         for sym_id in line_symbols_ids:
             if sym_id == line_eval_symbol_id or sym_id == wild_symbol_id:
                 match_count += 1
             else:
-                break # Streak broken
-
-        if match_count > 0 and line_eval_symbol_id in paytable and match_count in paytable[line_eval_symbol_id]:
-            payout = paytable[line_eval_symbol_id][match_count]
-            win_info = {
-                "line_index": i,
-                "symbol_id": line_eval_symbol_id,
-                "match_count": match_count,
-                "payout_multiplier": payout,
-                "line_coordinates": line_coords
-            }
-            line_wins.append(win_info)
+                break
+        total_payout_multiplier += payouts.get(match_count, 0)
+    return total_payout_multiplier
+
+def payline_cell_index(paylines, rows, cols):
+    """Inverted payline index: index[r][c] lists the paylines through cell (r, c)."""
+    index = [[[] for _ in range(cols)] for _ in range(rows)]
+    for line_index, line_coords in enumerate(paylines):
+        for r, c in line_coords:
+            if 0 <= r < rows and 0 <= c < cols:
+                index[r][c].append(line_index)
+    return index
+
+class IncrementalLineEvaluator:
+    """
+    Payline wins of grids that change a few cells at a time (cascades, symbol transformations, added WILDs).
+    Line results are kept as {line_index: LineWin} (paying lines only); after a mutation, update() re-evaluates
+    just the paylines through the changed cells (payline_cell_index) with calculate_line_wins' rule.
+    """
+    def __init__(self, paylines, paytable, symbols_data, rows, cols):
+        self.paylines = paylines
+        self.paytable = paytable
+        self.wild_symbol_id = find_wild_symbol_id(symbols_data)
+        self.cell_lines = payline_cell_index(paylines, rows, cols)
+
+    def lines_through(self, cells):
+        """Sorted indices of the paylines through any of these (row, col) cells."""
+        lines = set()
+        for r, c in cells:
+            lines.update(self.cell_lines[r][c])
+        return sorted(lines)
+
+    def evaluate(self, grid):
+        """Line results of a whole grid."""
+        line_results = {}
+        for line_index, line_coords in enumerate(self.paylines):
+            line_win = evaluate_payline(grid, line_index, line_coords, self.paytable, self.wild_symbol_id)
+            if line_win is not None:
+                line_results[line_index] = line_win
+        return line_results
+
+    def update(self, grid, line_results, changed_cells):
+        """
+        Brings line_results (of the grid before the mutation) up to date with grid, in place.
+        Returns the number of paylines re-evaluated.
+        """
+        lines = self.lines_through(changed_cells)
+        for line_index in lines:
+            line_win = evaluate_payline(grid, line_index, self.paylines[line_index], self.paytable, self.wild_symbol_id)
+            if line_win is not None:
+                line_results[line_index] = line_win
+            else:
+                line_results.pop(line_index, None)
+        return len(lines)
+
+    @staticmethod
+    def line_wins(line_results):
+        """(line_wins, total_payout_multiplier) in calculate_line_wins' order."""
+        line_wins = [line_results[line_index] for line_index in sorted(line_results)]
+        return line_wins, sum(line_win.payout_multiplier for line_win in line_wins)
+
+def calculate_ways_wins(grid, paytable, symbols_data):
+    """
+    Calculates ways wins: a symbol pays for every left-to-right combination of one matching cell per reel,
+    starting on the first reel (1024 ways on a 4x5 grid), instead of along fixed paylines.
+    - WILD substitutes for every paying symbol. Ways made only of WILDs are not paid for each symbol; they pay
+      as WILD when they cover every reel, as an all-WILD payline does in calculate_line_wins.
+    - Per symbol, with m_c = symbol + WILD cells and w_c = WILD cells on reel c, the ways of the run over the
+      first L reels that contain at least one real symbol are prod(m_c) - prod(w_c), so each grid costs
+      O(symbols x reels) and no way is enumerated.
+    Returns (ways_wins, total_payout_multiplier) like calculate_line_wins.
+    """
+    if not grid or not paytable or not symbols_data:
+        print("Error: Missing critical data for win calculation.")
+        return [], 0
+
+    wild_symbol_id = find_wild_symbol_id(symbols_data)
+    num_reels = len(grid[0])
+    reel_counts = [{} for _ in range(num_reels)] # Per reel: {symbol_id: cells}
+    for row in grid:
+        for c, symbol_id in enumerate(row):
+            reel_counts[c][symbol_id] = reel_counts[c].get(symbol_id, 0) + 1
+    wild_counts = [counts.get(wild_symbol_id, 0) for counts in reel_counts]
+
+    ways_wins = []
+    total_payout_multiplier = 0
+    for symbol_id, payouts in paytable.items():
+        if symbol_id == wild_symbol_id:
+            continue
+        matching_ways = wild_ways = 1
+        match_count = 0
+        for c in range(num_reels):
+            matching = reel_counts[c].get(symbol_id, 0) + wild_counts[c]
+            if not matching:
+                break
+            matching_ways *= matching
+            wild_ways *= wild_counts[c]
+            match_count += 1
+        ways = matching_ways - wild_ways
+        if match_count and ways and match_count in payouts:
+            payout = payouts[match_count] * ways
+            ways_wins.append(WaysWin(symbol_id, match_count, ways, payout))
             total_payout_multiplier += payout
-            
-    return line_wins, total_payout_multiplier
+
+    if wild_symbol_id in paytable and num_reels in paytable[wild_symbol_id] and all(wild_counts):
+        wild_ways = 1
+        for count in wild_counts:
+            wild_ways *= count
+        payout = paytable[wild_symbol_id][num_reels] * wild_ways
+        ways_wins.append(WaysWin(wild_symbol_id, num_reels, wild_ways, payout))
+        total_payout_multiplier += payout
+
+    return ways_wins, total_payout_multiplier
+
+def calculate_ways_payouts_batch(grids, paytable, symbols_data):
+    """
+    Total ways payout (calculate_ways_wins(...)[1]) of many grids at once, vectorised with NumPy.
+    grids: a sequence of same-sized grids or an (N, rows, reels) array of symbol IDs. Returns a float64 array.
+    """
+    symbol_grid = np.asarray(grids)
+    if symbol_grid.ndim != 3:
+        raise ValueError("grids must be a sequence of 2D grids (N, rows, reels).")
+    num_reels = symbol_grid.shape[2]
+    symbol_ids, codes = np.unique(symbol_grid, return_inverse=True)
+    codes = codes.reshape(symbol_grid.shape)
+    code_of = {symbol_id: code for code, symbol_id in enumerate(symbol_ids.tolist())}
+    totals = np.zeros(len(codes))
+    if not len(codes):
+        return totals
+
+    wild_symbol_id = find_wild_symbol_id(symbols_data)
+    wild_code = code_of.get(wild_symbol_id, -1)
+    wild_counts = (codes == wild_code).sum(axis=1) # (N, reels)
+    wild_ways = np.cumprod(wild_counts, axis=1)
+    for symbol_id, payouts in paytable.items(): # Same order as calculate_ways_wins, so totals add up identically
+        if symbol_id == wild_symbol_id:
+            continue
+        matching = (codes == code_of.get(symbol_id, -1)).sum(axis=1) + wild_counts
+        match_counts = np.cumprod(matching > 0, axis=1).sum(axis=1)
+        run_ways = np.cumprod(matching, axis=1) - wild_ways # Ways of the first L reels not made only of WILDs
+        ways = np.take_along_axis(run_ways, np.maximum(match_counts - 1, 0)[:, None], axis=1)[:, 0]
+        pay_by_count = np.zeros(num_reels + 1) # pay_by_count[L]: pay of one L-reel way (0 when unpaid, and for L=0)
+        for match_count, payout in payouts.items():
+            if 1 <= match_count <= num_reels:
+                pay_by_count[match_count] = payout
+        pay = pay_by_count[match_counts]
+        totals += np.where((ways > 0) & (pay != 0), pay * ways, 0)
+    if wild_symbol_id in paytable and num_reels in paytable[wild_symbol_id]:
+        totals += np.where(wild_ways[:, -1] > 0, paytable[wild_symbol_id][num_reels] * wild_ways[:, -1], 0)
+    return totals
+
+def calculate_grid_wins(grid, game_params):
+    """
+    Line or ways wins of a grid, per game_params.WIN_EVALUATION ("lines" when not set).
+    Returns (wins, total_payout_multiplier); the wins are LineWin or WaysWin records.
+    """
+    win_evaluation = getattr(game_params, "WIN_EVALUATION", "lines")
+    if win_evaluation == "lines":
+        return calculate_line_wins(grid, game_params.PAYLINES, game_params.PAYTABLE, game_params.SYMBOLS)
+    if win_evaluation == "ways":
+        return calculate_ways_wins(grid, game_params.PAYTABLE, game_params.SYMBOLS)
+    raise ValueError(f"Unknown WIN_EVALUATION {win_evaluation!r}; expected one of {WIN_EVALUATION_MODES}.")
+
+def calculate_grid_payout(grid, game_params):
+    """Payout-only counterpart of calculate_grid_wins (lines or ways, per game_params.WIN_EVALUATION)."""
+    win_evaluation = getattr(game_params, "WIN_EVALUATION", "lines")
+    if win_evaluation == "lines":
+        return calculate_line_payout(grid, game_params.PAYLINES, game_params.PAYTABLE, game_params.SYMBOLS)
+    if win_evaluation == "ways":
+        # At most one WaysWin per paying symbol, so the full evaluation is already cheap
+        return calculate_ways_wins(grid, game_params.PAYTABLE, game_params.SYMBOLS)[1]
+    raise ValueError(f"Unknown WIN_EVALUATION {win_evaluation!r}; expected one of {WIN_EVALUATION_MODES}.")
+
+def require_line_evaluation(game_params, tool):
+    """Raises ValueError for ways or cascading configurations in tools that model single-grid payline wins only."""
+    if getattr(game_params, "WIN_EVALUATION", "lines") != "lines":
+        raise ValueError(f"{tool} models payline wins only; this configuration uses WIN_EVALUATION="
+                         f"{game_params.WIN_EVALUATION!r}.")
+    if getattr(game_params, "CASCADE_REELS", False):
+        raise ValueError(f"{tool} models single-grid wins only; this configuration uses CASCADE_REELS.")
 
 def calculate_scatter_wins(grid, paytable, scatter_mult_symbol_id, symbols_data):
     """
@@ -106,13 +335,7 @@ def calculate_scatter_wins(grid, paytable, scatter_mult_symbol_id, symbols_data)
     
     if count > 0 and count in paytable[scatter_mult_symbol_id]:
         payout = paytable[scatter_mult_symbol_id][count]
-        scatter_win_info = {
-            "symbol_id": scatter_mult_symbol_id,
-            "count": count,
-            "payout_multiplier": payout,
-            "positions": positions
-        }
-        scatter_wins_list.append(scatter_win_info)
+        scatter_wins_list.append(ScatterWin(scatter_mult_symbol_id, count, payout, positions))
         total_scatter_payout_multiplier = payout # Assuming one type of scatter_mult win at a time
 
     return scatter_wins_list, total_scatter_payout_multiplier
@@ -197,10 +420,27 @@ if __name__ == "__main__":
     print("Test Grid 5 Total Line Payout:", total_line_payout_5) # Expected: 0
     scatter_wins_5, total_scatter_payout_5 = calculate_scatter_wins(test_grid_5, mock_paytable, "SCATTER_MULT", mock_symbols)
     print("Test Grid 5 Scatter Wins:", scatter_wins_5) # Expected: []
-    print("Test Grid 5 Total Scatter Payout:", total_scatter_payout_5) # Expected: 0`win_calculations.py` has been updated. I've made a few minor adjustments to the provided code for robustness:
-- Added a more comprehensive fallback for `wild_symbol_id` detection, checking for a `type: "wild"` in `symbols_data` or "wild" in the name/ID as fallbacks.
-- Ensured `line_eval_symbol_id` is in `paytable` before attempting to access `paytable[line_eval_symbol_id]`.
-- Added more checks in `calculate_scatter_wins` to ensure `scatter_mult_symbol_id` is valid and present in `symbols_data` and `paytable` before proceeding.
-- Added `type: "wild"` to the "WILD" symbol in the `if __name__ == "__main__":` mock data for testing the improved wild detection.
+    print("Test Grid 5 Total Scatter Payout:", total_scatter_payout_5) # Expected: 0
+
+    # Test grid 6: Ways - H1 on reels 1-3 (2 x 1 x 2 cells, one reel-2 cell a WILD) = 4 ways of 3
+    test_grid_6 = [
+        ["H1", "WILD", "H1", "M1", "L1"],
+        ["H1", "M1", "L1", "M1", "L1"],
+        ["M1", "L1", "H1", "L1", "M1"],
+        ["L1", "M1", "L1", "M1", "L1"],
+    ]
+    ways_wins_6, total_ways_payout_6 = calculate_ways_wins(test_grid_6, mock_paytable, mock_symbols)
+    print("\nTest Grid 6 (Ways) Wins:", ways_wins_6)
+    print("Test Grid 6 Total Ways Payout:", total_ways_payout_6) # Expected: 1300 (4 H1 ways x 25 + 12 L1 ways of 5 x 100)
+    print("Test Grid 6 Batch Ways Payout:", calculate_ways_payouts_batch([test_grid_6], mock_paytable, mock_symbols)[0])
 
-Now, I will update `BOMBAROAT_Tralalero_Fury/math_sdk_project/game_executables/base_game_calculations.py`.
+    # Test grid 7: Incremental re-evaluation after turning two cells into WILDs
+    evaluator = IncrementalLineEvaluator(mock_paylines, mock_paytable, mock_symbols, 4, 5)
+    line_results_7 = evaluator.evaluate(test_grid_1)
+    mutated_grid_7 = [row[:] for row in test_grid_1]
+    mutated_grid_7[0][3] = mutated_grid_7[1][0] = "WILD"
+    lines_evaluated_7 = evaluator.update(mutated_grid_7, line_results_7, [(0, 3), (1, 0)])
+    print("\nTest Grid 7 Incremental Line Wins:", evaluator.line_wins(line_results_7),
+          f"({lines_evaluated_7} of {len(mock_paylines)} lines re-evaluated)")
+    print("Test Grid 7 Matches Full Evaluation:",
+          evaluator.line_wins(line_results_7) == calculate_line_wins(mutated_grid_7, mock_paylines, mock_paytable, mock_symbols))
@@ -1,6 +1,7 @@
 # run.py for BOMBAROAT™: Tralalero Fury
 import json
 import random
+from array import array
 
 # Assuming game_config and game_executables are in the same package or PYTHONPATH is set up
 # For the subtask environment, we hope these imports work directly.
@@ -9,10 +10,28 @@ import random
 # from .game_executables.base_game_calculations import evaluate_base_spin_outcome
 # etc.
 # However, given it's in the same directory as game_config.py for this project:
+import os
+import sys
+# The game_executables modules import each other flat (e.g. `import win_calculations`), so their folder must be on the path.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_executables"))
+
 from game_config import GameParams
-from game_executables.base_game_calculations import evaluate_base_spin_outcome
+from game_executables.base_game_calculations import (evaluate_base_spin_outcome, evaluate_base_spin_payout, explain,
+                                                     triggered_features)
+from game_executables.cascade_calculations import CascadeEngine
+from game_executables.outcome_types import to_dicts
 from game_executables.tralalero_free_spins_calculations import simulate_tralalero_free_spins_feature
 from game_executables.bombardino_bonus_calculations import simulate_bombardino_bonus_feature
+from game_executables.hit_counts import HitCountRecorder
+from game_executables.importance_sampling import run_importance_sampling, format_tail_estimates
+from game_executables.stratified_sampling import StratifiedStopSampler, stratified_estimate
+from game_executables.session_simulator import LookupTable, SessionSimulator, base_feature_flags, format_session_results
+from game_executables.book_encoder import BookEncoder, write_books
+from game_executables.distributed import run_distributed
+from game_executables.book_bundle import bundle_book_files, write_book_bundle
+from game_executables.payout_classes import PayoutClassCompactor, write_payout_classes
+from game_executables.checkpoint import (PayoutStatistics, StreamingOutput, load_checkpoint, read_books,
+                                         read_lookup_entries, remove_checkpoint, save_checkpoint)
 
 # --- SDK-like Simulation Parameters ---
 NUM_SIM_ARGS = {
@@ -26,14 +45,76 @@ RUN_CONDITIONS = {
     "run_optimization": True, # Set to True for the conceptual RTP tuning stage
     "run_analysis": True,     # Set to True for PAR sheet generation
     "compression": True,      # Production runs would use compression
+    "record_hit_counts": False, # Record payout-independent hit counts so paytables can be repriced without re-simulating
+    "importance_sampling": False, # Estimate tail win probabilities from biased (likelihood-ratio weighted) simulations
+    "stratified_sampling": False, # Base game stops drawn one per stratum of the joint stop space (tighter RTP estimate)
+    "session_analysis": False, # Player-session analysis (bust probability, session length, balances) from the lookup tables
+    "write_books": False, # Write books_<mode>.jsonl (.jsonl.gz with compression) to BOOKS_OUTPUT_DIR
+    "checkpoint": False, # Stream books/lookups to files and checkpoint periodically; an interrupted run resumes on restart
+    "distributed": False, # Simulate in leases on DISTRIBUTED_ARGS["workers"] local worker processes (see distributed.py)
+    "payout_classes": False, # Compact the lookup tables into one row per payout (see payout_classes.py)
+    "book_bundle": False, # Pack the books into range-fetchable bundles for the frontend (see book_bundle.py)
+}
+
+BOOKS_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "library", "books")
+
+# --- Checkpointing Parameters (see game_executables/checkpoint.py) ---
+CHECKPOINT_ARGS = {
+    "path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "library", "checkpoint.pkl"),
+    "output_dir": BOOKS_OUTPUT_DIR, # Streamed books_<mode>.jsonl[.gz] and lookUpTable_<mode>.csv
+    "every_rounds": int(1e4),
+}
+
+# --- Payout Class Compaction Parameters (see game_executables/payout_classes.py) ---
+PAYOUT_CLASS_ARGS = {
+    "reservoir_size": 64, # Representative book ids kept per payout
+    "output_dir": BOOKS_OUTPUT_DIR, # lookUpTable_<mode>_compact.csv and payoutClasses_<mode>.json
+}
+
+# --- Frontend Book Bundle Parameters (see game_executables/book_bundle.py) ---
+BUNDLE_ARGS = {
+    "output_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "public", "books"),
+    "block_books": 64, # Books per gzip block, i.e. per range request
+}
+
+# --- Distributed Simulation Parameters (see game_executables/distributed.py) ---
+# Rounds are seeded per (seed, mode, round index), so the books do not depend on the worker count or lease size.
+# For several hosts, start a distributed.Coordinator with host="0.0.0.0" and run
+# `python game_executables/distributed.py worker <coordinator host> <port>` on each machine.
+DISTRIBUTED_ARGS = {
+    "num_workers": os.cpu_count() or 4,
+    "seed": 0,
+    "lease_rounds": {"base": int(1e4), "tralalero_free_spins": 200, "bombardino_bonus": 1000},
+}
+
+# --- Importance Sampling Parameters (tail win estimation, see game_executables/importance_sampling.py) ---
+# Only modes whose proposal measurably beats a plain run are listed. Variance of P(win > t) over repeated runs,
+# plain / importance-sampled: base (t=1000, 20 x 20000 rounds) ~1.9x, ESS ~160 of 20000. The feature samplers
+# (defensive mixture 0.5, bias 1.2) measured ~0.8x for free spins (t=15000, ESS ~290 of 500) and ~0.9x for the
+# Bombardino bonus (t=4000, ESS ~880 of 1000): no gain, so those modes are left to the plain simulation, e.g.
+# "tralalero_free_spins": {"num_rounds": int(2e3), "tail_thresholds": [15000]} once a proposal beats it.
+IMPORTANCE_SAMPLING_ARGS = {
+    "base": {"num_rounds": int(1e5), "tail_thresholds": [1000, 2000]},
+}
+
+# --- Player Session Parameters (see game_executables/session_simulator.py) ---
+SESSION_ARGS = {
+    "num_players": int(1e6),
+    "bankroll": 100,      # In bet units of 1
+    "bet": 1,
+    "max_spins": 500,
+    "stop_loss": None,    # e.g. 80: stop after losing 80
+    "stop_win": None,     # e.g. 100: stop after winning 100
+    "checkpoints": [50, 100, 250, 500],
 }
 
 # --- Placeholder for SDK's Reel/Grid Generation ---
-def sdk_generate_grid_from_reels(game_params_obj):
+def sdk_generate_grid_from_reels(game_params_obj, stops=None):
     """
     Placeholder: Simulates generating a grid from reel strips.
     The real SDK would use its own PRNG and reel strip definitions.
     Output is a 4x5 grid of symbol IDs.
+    stops: optional per-reel start positions (e.g. from StratifiedStopSampler) instead of uniform random ones.
     """
     grid = [[None for _ in range(game_params_obj.GRID_COLS)] for _ in range(game_params_obj.GRID_ROWS)]
     for c in range(game_params_obj.GRID_COLS):
@@ -56,88 +137,356 @@ def sdk_generate_grid_from_reels(game_params_obj):
              continue
 
 
-        start_pos = random.randint(0, len(strip) - 1)
+        start_pos = stops[c] if stops is not None else random.randint(0, len(strip) - 1)
         for r in range(game_params_obj.GRID_ROWS):
             pos = (start_pos + r) % len(strip) # Ensure wrap-around for reel effect
             grid[r][c] = strip[pos]
     return grid
 
+# --- Tail Win Estimation ---
+def run_tail_estimation(game_params_obj, seed=None):
+    """
+    Importance-sampled tail estimates per mode: P(win > threshold) and the RTP from those wins, with
+    confidence intervals and the variance reduction versus plain simulation. These runs produce no books.
+    """
+    tail_results = {}
+    for mode, args in IMPORTANCE_SAMPLING_ARGS.items():
+        print(f"\n--- Importance Sampling: {mode} ({args['num_rounds']} rounds) ---")
+        tail_results[mode] = run_importance_sampling(game_params_obj, mode, args["num_rounds"], args["tail_thresholds"],
+                                                     confidence=args.get("confidence", 0.95), seed=seed)
+        print(format_tail_estimates(tail_results[mode]))
+    return tail_results
+
+# --- Player Session Analysis ---
+def run_session_analysis(simulation_output, seed=None):
+    """Player sessions sampled from the generated lookup tables; base rounds that triggered a feature
+    add a round drawn from that feature's lookup table."""
+    lookups = simulation_output["lookups"]
+    base_books = simulation_output["books"]["base"]
+    if "lookup_paths" in simulation_output: # Streamed (checkpointed) run: read the full tables back from disk
+        lookups = {mode: read_lookup_entries(path) if os.path.exists(path) else []
+                   for mode, path in simulation_output["lookup_paths"].items()}
+        base_books = read_books(simulation_output["book_paths"]["base"]) if lookups.get("base") else []
+    if not lookups.get("base"):
+        print("Session analysis skipped: no base lookup entries.")
+        return None
+    simulator = SessionSimulator(
+        LookupTable.from_entries(lookups["base"]),
+        {mode: LookupTable.from_entries(entries) for mode, entries in lookups.items() if mode != "base" and entries},
+        base_feature_flags(base_books),
+    )
+    print(f"\n--- Player Session Analysis ({SESSION_ARGS['num_players']} players) ---")
+    results = simulator.simulate(seed=seed, **SESSION_ARGS)
+    print(format_session_results(results))
+    return results
+
+# --- Payout Class Compaction ---
+def run_payout_compaction(simulation_output, seed=0):
+    """Groups each mode's lookup rows by payout and writes the compact tables plus their class sidecars."""
+    results = {}
+    print("\n--- Payout Class Compaction ---")
+    for mode in SIM_MODES:
+        compactor = PayoutClassCompactor(PAYOUT_CLASS_ARGS["reservoir_size"], seed=f"{seed}-{mode}")
+        lookup_path = simulation_output.get("lookup_paths", {}).get(mode)
+        if lookup_path is not None: # Streamed run: the full table is only on disk
+            if os.path.exists(lookup_path):
+                compactor.add_csv(lookup_path)
+        else:
+            compactor.add_entries(simulation_output["lookups"][mode])
+        if not compactor.rows:
+            continue
+        summary = compactor.summary()
+        results[mode] = dict(summary, **write_payout_classes(compactor, PAYOUT_CLASS_ARGS["output_dir"], mode))
+        print(f"  {mode}: {summary['rows']} rows -> {summary['classes']} payout classes "
+              f"({summary['compression_ratio']:.0f}x smaller), mean payout {summary['rtp']:.4f}x, "
+              f"written to {results[mode]['lookup_path']}")
+    return results
+
+# --- Frontend Book Bundles ---
+def run_book_bundling(simulation_output, game_params_obj):
+    """
+    Packs the run's books into BUNDLE_ARGS["output_dir"] (manifest.json, books_<mode>.bundle / .index).
+    Lean base books are expanded with explain_book first, so the frontend always receives full books.
+    """
+    lean = getattr(game_params_obj, "LEAN_BASE_BOOKS", False)
+    if "book_paths" in simulation_output and not lean: # Streamed or distributed run: bundle the files on disk
+        manifest = bundle_book_files(simulation_output["book_paths"], BUNDLE_ARGS["output_dir"], BUNDLE_ARGS["block_books"])
+    else:
+        if "book_paths" in simulation_output: # Lean streamed run: only the base file needs expanding
+            books = {mode: path for mode, path in simulation_output["book_paths"].items() if os.path.exists(path)}
+            base_books = read_books(books["base"]) if "base" in books else None
+        else:
+            books = {mode: entries for mode, entries in simulation_output["books"].items() if entries}
+            base_books = books.get("base")
+        if base_books is not None and lean:
+            books["base"] = (explain_book(entry, game_params_obj) for entry in base_books)
+        manifest = write_book_bundle(books, BUNDLE_ARGS["output_dir"], BookEncoder(game_params_obj), BUNDLE_ARGS["block_books"])
+    print("\n--- Frontend Book Bundles ---")
+    for mode, info in manifest["modes"].items():
+        print(f"  {mode}: {info['books']} books in {info['blocks']} blocks, {info['bytes']} bytes -> "
+              f"{os.path.join(BUNDLE_ARGS['output_dir'], info['bundle'])}")
+    return manifest
+
 # --- Main Simulation Logic ---
+SIM_MODES = ("base", "tralalero_free_spins", "bombardino_bonus")
+
+def _cascade_engine(game_params_obj):
+    """
+    The CascadeEngine of this GameParams, cached on the instance and rebuilt whenever a setting it captures changes.
+    PAYTABLE is read live, so in-place edits need no rebuild; PAYLINES and SYMBOLS are compared by identity, so
+    assign new ones rather than editing them in place.
+    """
+    key = (game_params_obj.WIN_EVALUATION, game_params_obj.MAX_CASCADES, game_params_obj.GRID_ROWS,
+           game_params_obj.GRID_COLS, id(game_params_obj.PAYTABLE), id(game_params_obj.PAYLINES), id(game_params_obj.SYMBOLS))
+    cached_key, engine = getattr(game_params_obj, "_cascade_engine", (None, None))
+    if cached_key != key: # The engine holds the objects behind the ids, so they cannot be reused by others meanwhile
+        engine = CascadeEngine(game_params_obj)
+        game_params_obj._cascade_engine = (key, engine) # Private: not a setting (see game_params_settings)
+    return engine
+
+def simulate_cascade_round(game_params_obj, sim_id, grid_stops=None):
+    """One cascading base game spin -> (book entry, payout multiplier). Each tumble is one compact "tumble" event."""
+    outcome = _cascade_engine(game_params_obj).spin(stops=grid_stops)
+    book_entry = {
+        "id": sim_id,
+        "mode": "base",
+        "payoutMultiplier": outcome["total_payout_multiplier"],
+        "events": [
+            {"type": "grid_reveal", "grid": outcome["grid_played"]},
+            {"type": "wins_info", "line_wins": to_dicts(outcome["line_wins"]), "scatter_wins": to_dicts(outcome["scatter_wins"])},
+            *({"type": "tumble", **step} for step in outcome["cascades"]),
+            {"type": "feature_triggers", "features": outcome["triggered_features"]}
+        ]
+    }
+    return book_entry, outcome["total_payout_multiplier"]
+
+def simulate_base_round(game_params_obj, sim_id, grid_stops=None, hit_recorder=None):
+    """One base game spin -> (book entry, payout multiplier)."""
+    if getattr(game_params_obj, "CASCADE_REELS", False):
+        return simulate_cascade_round(game_params_obj, sim_id, grid_stops=grid_stops)
+    grid = sdk_generate_grid_from_reels(game_params_obj, stops=grid_stops)
+    if hit_recorder is not None:
+        hit_recorder.record_spin(sim_id, grid)
+    if getattr(game_params_obj, "LEAN_BASE_BOOKS", False):
+        total_payout, fs_scatter_count, bonus_symbol_count = evaluate_base_spin_payout(grid, game_params_obj)
+        book_entry = {
+            "id": sim_id,
+            "mode": "base",
+            "payoutMultiplier": total_payout,
+            "events": [
+                {"type": "grid_reveal", "grid": grid},
+                {"type": "feature_triggers", "features": triggered_features(fs_scatter_count, bonus_symbol_count, game_params_obj)}
+            ]
+        }
+        return book_entry, total_payout
+    base_game_outcome = evaluate_base_spin_outcome(grid, game_params_obj)
+
+    # Construct book entry (simplified for this subtask)
+    book_entry = {
+        "id": sim_id,
+        "mode": "base",
+        "payoutMultiplier": base_game_outcome["total_payout_multiplier"],
+        "events": [
+            {"type": "grid_reveal", "grid": grid}, # Changed from "reveal"
+            {"type": "wins_info", "line_wins": to_dicts(base_game_outcome["line_wins"]), # Changed from "winsInfo"
+             "scatter_wins": to_dicts(base_game_outcome["scatter_wins"])},
+            {"type": "feature_triggers", "features": base_game_outcome["triggered_features"]} # Changed from "triggers"
+        ]
+    }
+    return book_entry, base_game_outcome["total_payout_multiplier"]
+
+def explain_book(book_entry, game_params_obj):
+    """
+    The full book of a lean base book (LEAN_BASE_BOOKS): its wins_info event is rebuilt from the grid, giving the
+    entry simulate_base_round writes without the lean setting. Any other book is returned unchanged.
+    """
+    events = book_entry.get("events")
+    if book_entry.get("mode") != "base" or not events or any(event["type"] == "wins_info" for event in events):
+        return book_entry
+    outcome = explain(events[0]["grid"], game_params_obj)
+    if outcome["total_payout_multiplier"] != book_entry["payoutMultiplier"]:
+        raise ValueError(f"Book {book_entry['id']} pays {book_entry['payoutMultiplier']}x but its grid pays "
+                         f"{outcome['total_payout_multiplier']}x with these game parameters.")
+    return {**book_entry, "events": [
+        events[0],
+        {"type": "wins_info", "line_wins": to_dicts(outcome["line_wins"]), "scatter_wins": to_dicts(outcome["scatter_wins"])},
+        *events[1:]
+    ]}
+
+def simulate_free_spins_round(game_params_obj, sim_id, hit_recorder=None):
+    """One full Tralalero Free Spins feature -> (book entry, payout multiplier)."""
+    # Assume triggered by 3 scatters for simulation purposes
+    triggering_scatter_count = 3
+    fs_outcome = simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params_obj, hit_recorder=hit_recorder)
+    if hit_recorder is not None:
+        hit_recorder.end_round(sim_id)
+
+    book_entry = {
+        "id": sim_id,
+        "mode": "tralalero_free_spins",
+        "triggering_scatters": triggering_scatter_count,
+        "payoutMultiplier": fs_outcome["total_feature_payout"],
+        "spins_played": fs_outcome["spins_played"],
+        "retriggered_times": fs_outcome["retriggered_times"],
+        "detailed_events": fs_outcome["events"] # Contains log from feature
+    }
+    return book_entry, fs_outcome["total_feature_payout"]
+
+def simulate_bonus_round(game_params_obj, sim_id, hit_recorder=None):
+    """One full Bombardino Bonus feature -> (book entry, payout multiplier)."""
+    # Assume triggered by 3 bonus symbols
+    triggering_bonus_count = 3
+    bonus_outcome = simulate_bombardino_bonus_feature(game_params_obj, triggering_bonus_count=triggering_bonus_count,
+                                                      hit_recorder=hit_recorder)
+    if hit_recorder is not None:
+        hit_recorder.end_round(sim_id)
+
+    book_entry = {
+        "id": sim_id,
+        "mode": "bombardino_bonus",
+        "triggering_bonus_symbols": triggering_bonus_count,
+        "payoutMultiplier": bonus_outcome["total_feature_payout"],
+        "spins_played": bonus_outcome["spins_played"],
+        "detailed_events": bonus_outcome["events"]
+    }
+    return book_entry, bonus_outcome["total_feature_payout"]
+
+# Run conditions that change what a run writes; a checkpoint only resumes under the ones it was made with
+CHECKPOINT_RUN_CONDITIONS = ("stratified_sampling", "record_hit_counts", "compression")
+
+def _run_key(game_params_obj):
+    """
+    What a checkpoint must match to be resumed: NUM_SIM_ARGS, CHECKPOINT_RUN_CONDITIONS and every GameParams
+    setting (PAYTABLE, WIN_EVALUATION, CASCADE_REELS, LEAN_BASE_BOOKS, ...; not private caches such as the cascade
+    engine) except the reel strips, which are
+    shuffled per instance and restored from the checkpoint.
+    """
+    return {
+        "num_sim_args": dict(NUM_SIM_ARGS),
+        "run_conditions": {condition: RUN_CONDITIONS.get(condition, False) for condition in CHECKPOINT_RUN_CONDITIONS},
+        "game_params": {name: value for name, value in vars(game_params_obj).items()
+                        if name != "REEL_STRIPS" and not name.startswith("_")},
+    }
+
+def _checkpoint_state(game_params_obj, mode, next_index, sim_id_counter, statistics, hit_recorders, base_payouts, offsets):
+    return {
+        "run_key": _run_key(game_params_obj),
+        "reel_strips": game_params_obj.REEL_STRIPS,
+        "mode": mode,
+        "next_index": next_index,
+        "sim_id_counter": sim_id_counter,
+        "random_state": random.getstate(),
+        "statistics": statistics,
+        "hit_recorders": hit_recorders,
+        "stratified_base_payouts": base_payouts,
+        "output_offsets": offsets,
+    }
+
 def run_simulations(game_params_obj):
-    all_book_entries = {"base": [], "tralalero_free_spins": [], "bombardino_bonus": []}
-    all_lookup_entries = {"base": [], "tralalero_free_spins": [], "bombardino_bonus": []}
+    """
+    Simulates NUM_SIM_ARGS rounds per mode into books and lookup entries.
+    With RUN_CONDITIONS["checkpoint"] the books and lookup tables are streamed to CHECKPOINT_ARGS["output_dir"]
+    instead of being kept in memory, and a checkpoint is saved every CHECKPOINT_ARGS["every_rounds"] rounds.
+    If a checkpoint from an interrupted run exists, the run resumes from it (restoring the reel strips it was
+    made with) and finishes with the same files and statistics an uninterrupted run would have produced.
+    """
+    all_book_entries = {mode: [] for mode in SIM_MODES}
+    all_lookup_entries = {mode: [] for mode in SIM_MODES}
+    statistics = {mode: PayoutStatistics() for mode in SIM_MODES}
     sim_id_counter = 1 # Ensure unique IDs across all simulation types for this run
+    hit_recorders = {}
+    if RUN_CONDITIONS.get("record_hit_counts"):
+        hit_recorders = {mode: HitCountRecorder(game_params_obj) for mode in SIM_MODES}
+    base_payouts = array("d") # Base payouts in sim order, kept for the stratified estimate
+    book_encoder = BookEncoder(game_params_obj) # Same bytes as json.dumps, assembled from precomputed fragments
+
+    checkpointing = RUN_CONDITIONS.get("checkpoint", False)
+    checkpoint_path = CHECKPOINT_ARGS["path"]
+    state = load_checkpoint(checkpoint_path) if checkpointing else None
+    stream = None
+    if state is not None:
+        run_key = _run_key(game_params_obj)
+        if state["run_key"] != run_key:
+            differing = [f"{part}[{name!r}]" for part in run_key
+                         for name in sorted(set(run_key[part]) | set(state["run_key"][part]), key=str)
+                         if state["run_key"][part].get(name) != run_key[part].get(name)]
+            raise ValueError(f"Checkpoint {checkpoint_path} was written with different settings ({', '.join(differing)}); "
+                             "remove it or restore those settings to resume.")
+        print(f"\nResuming from checkpoint {checkpoint_path}: mode {state['mode']}, round {state['next_index']}")
+        game_params_obj.REEL_STRIPS = state["reel_strips"] # The strips are shuffled per GameParams instance
+        statistics, hit_recorders, base_payouts = state["statistics"], state["hit_recorders"], state["stratified_base_payouts"]
+        sim_id_counter = state["sim_id_counter"]
+        random.setstate(state["random_state"])
+    if checkpointing:
+        stream = StreamingOutput(CHECKPOINT_ARGS["output_dir"], book_encoder, SIM_MODES, compression=RUN_CONDITIONS["compression"],
+                                 offsets=state["output_offsets"] if state is not None else None)
 
-    # 1. Base Game Simulations
-    if RUN_CONDITIONS["run_sims"] and NUM_SIM_ARGS.get("base", 0) > 0:
-        print(f"\n--- Simulating Base Game ({NUM_SIM_ARGS['base']} spins) ---")
-        for i in range(NUM_SIM_ARGS["base"]):
+    stop_sampler = None
+    if RUN_CONDITIONS.get("stratified_sampling") and NUM_SIM_ARGS.get("base", 0) > 0:
+        stop_sampler = StratifiedStopSampler(game_params_obj, NUM_SIM_ARGS["base"])
+    headers = {
+        "base": "Simulating Base Game ({} spins)",
+        "tralalero_free_spins": "Simulating Tralalero Free Spins ({} features)",
+        "bombardino_bonus": "Simulating Bombardino Bonus ({} features)",
+    }
+
+    # 1. Base Game, 2. Tralalero Free Spins, 3. Bombardino Bonus simulations
+    for mode_position, mode in enumerate(SIM_MODES):
+        num_rounds = NUM_SIM_ARGS.get(mode, 0)
+        if not RUN_CONDITIONS["run_sims"] or num_rounds <= 0:
+            continue
+        first_index = 0
+        if state is not None:
+            resume_position = SIM_MODES.index(state["mode"])
+            if mode_position < resume_position:
+                continue # Finished before the checkpoint; sim_id_counter already accounts for it
+            if mode_position == resume_position:
+                first_index = state["next_index"]
+        print(f"\n--- {headers[mode].format(num_rounds)} ---")
+        hit_recorder = hit_recorders.get(mode)
+        for i in range(first_index, num_rounds):
             current_sim_id = sim_id_counter + i
-            grid = sdk_generate_grid_from_reels(game_params_obj)
-            base_game_outcome = evaluate_base_spin_outcome(grid, game_params_obj)
-            
-            # Construct book entry (simplified for this subtask)
-            book_entry = {
-                "id": current_sim_id,
-                "mode": "base",
-                "payoutMultiplier": base_game_outcome["total_payout_multiplier"],
-                "events": [
-                    {"type": "grid_reveal", "grid": grid}, # Changed from "reveal"
-                    {"type": "wins_info", "line_wins": base_game_outcome["line_wins"], "scatter_wins": base_game_outcome["scatter_wins"]}, # Changed from "winsInfo"
-                    {"type": "feature_triggers", "features": base_game_outcome["triggered_features"]} # Changed from "triggers"
-                ]
-            }
-            all_book_entries["base"].append(book_entry)
-            
+            if mode == "base":
+                book_entry, payout = simulate_base_round(game_params_obj, current_sim_id,
+                                                         grid_stops=stop_sampler.stops_for(i) if stop_sampler else None,
+                                                         hit_recorder=hit_recorder)
+                if stop_sampler:
+                    base_payouts.append(payout)
+            elif mode == "tralalero_free_spins":
+                book_entry, payout = simulate_free_spins_round(game_params_obj, current_sim_id, hit_recorder=hit_recorder)
+            else:
+                book_entry, payout = simulate_bonus_round(game_params_obj, current_sim_id, hit_recorder=hit_recorder)
+            statistics[mode].add(payout)
+
             # Construct lookup entry (weight is 1 before optimization)
-            lookup_entry = f"{current_sim_id},1,{base_game_outcome['total_payout_multiplier']}"
-            all_lookup_entries["base"].append(lookup_entry)
-        sim_id_counter += NUM_SIM_ARGS["base"]
-
-    # 2. Tralalero Free Spins Feature Simulations
-    if RUN_CONDITIONS["run_sims"] and NUM_SIM_ARGS.get("tralalero_free_spins", 0) > 0:
-        print(f"\n--- Simulating Tralalero Free Spins ({NUM_SIM_ARGS['tralalero_free_spins']} features) ---")
-        for i in range(NUM_SIM_ARGS["tralalero_free_spins"]):
-            current_sim_id = sim_id_counter + i
-            # Assume triggered by 3 scatters for simulation purposes
-            triggering_scatter_count = 3 
-            fs_outcome = simulate_tralalero_free_spins_feature(triggering_scatter_count, game_params_obj)
-            
-            book_entry = {
-                "id": current_sim_id,
-                "mode": "tralalero_free_spins",
-                "triggering_scatters": triggering_scatter_count,
-                "payoutMultiplier": fs_outcome["total_feature_payout"],
-                "spins_played": fs_outcome["spins_played"],
-                "retriggered_times": fs_outcome["retriggered_times"],
-                "detailed_events": fs_outcome["events"] # Contains log from feature
-            }
-            all_book_entries["tralalero_free_spins"].append(book_entry)
-            lookup_entry = f"{current_sim_id},1,{fs_outcome['total_feature_payout']}"
-            all_lookup_entries["tralalero_free_spins"].append(lookup_entry)
-        sim_id_counter += NUM_SIM_ARGS["tralalero_free_spins"]
-
-    # 3. Bombardino Bonus Feature Simulations
-    if RUN_CONDITIONS["run_sims"] and NUM_SIM_ARGS.get("bombardino_bonus", 0) > 0:
-        print(f"\n--- Simulating Bombardino Bonus ({NUM_SIM_ARGS['bombardino_bonus']} features) ---")
-        for i in range(NUM_SIM_ARGS["bombardino_bonus"]):
-            current_sim_id = sim_id_counter + i
-            # Assume triggered by 3 bonus symbols
-            triggering_bonus_count = 3 
-            bonus_outcome = simulate_bombardino_bonus_feature(game_params_obj, triggering_bonus_count=triggering_bonus_count)
-            
-            book_entry = {
-                "id": current_sim_id,
-                "mode": "bombardino_bonus",
-                "triggering_bonus_symbols": triggering_bonus_count,
-                "payoutMultiplier": bonus_outcome["total_feature_payout"],
-                "spins_played": bonus_outcome["spins_played"],
-                "detailed_events": bonus_outcome["events"]
-            }
-            all_book_entries["bombardino_bonus"].append(book_entry)
-            lookup_entry = f"{current_sim_id},1,{bonus_outcome['total_feature_payout']}"
-            all_lookup_entries["bombardino_bonus"].append(lookup_entry)
-        # sim_id_counter += NUM_SIM_ARGS["bombardino_bonus"] # Not needed after last loop
+            lookup_entry = f"{current_sim_id},1,{payout}"
+            if stream is not None:
+                stream.add(mode, book_entry, lookup_entry)
+                if (i + 1) % CHECKPOINT_ARGS["every_rounds"] == 0 and i + 1 < num_rounds:
+                    save_checkpoint(checkpoint_path, _checkpoint_state(game_params_obj, mode, i + 1, sim_id_counter, statistics,
+                                                                       hit_recorders, base_payouts, stream.flush()))
+            else:
+                all_book_entries[mode].append(book_entry)
+                all_lookup_entries[mode].append(lookup_entry)
+        sim_id_counter += num_rounds
+        if stream is not None and mode_position + 1 < len(SIM_MODES): # Mode boundary: the next mode starts at round 0
+            save_checkpoint(checkpoint_path, _checkpoint_state(game_params_obj, SIM_MODES[mode_position + 1], 0, sim_id_counter,
+                                                               statistics, hit_recorders, base_payouts, stream.flush()))
+
+    if stop_sampler and base_payouts:
+        estimate = stratified_estimate(base_payouts)
+        print(f"\nStratified base RTP estimate: {estimate['mean_payout']:.4f}x "
+              f"(95% CI {estimate['ci'][0]:.4f} - {estimate['ci'][1]:.4f}), "
+              f"variance reduction vs uniform stops: {estimate['variance_reduction']:.2f}x (conservative)")
+
+    if stream is not None:
+        stream.close()
+        remove_checkpoint(checkpoint_path) # Outputs are complete; the next run starts fresh
+        # Streamed runs keep only the first entry per mode in memory, for the samples below
+        for mode in SIM_MODES:
+            if statistics[mode].rounds:
+                all_book_entries[mode] = [next(read_books(stream.book_paths[mode]))]
+                all_lookup_entries[mode] = read_lookup_entries(stream.lookup_paths[mode])[:1]
 
     # Outputting (Conceptual - real SDK would write to files)
     print("\n--- Conceptual Output ---")
@@ -146,7 +495,15 @@ def run_simulations(game_params_obj):
         for mode, entries in all_book_entries.items():
             if entries:
                 print(f"--- {mode} mode (first entry) ---")
-                print(json.dumps(entries[0])) 
+                print(book_encoder.encode(entries[0]).decode())
+    if stream is not None:
+        for mode in SIM_MODES:
+            if statistics[mode].rounds:
+                print(f"Wrote {statistics[mode].rounds} {mode} books to {stream.book_paths[mode]} and lookups to {stream.lookup_paths[mode]}")
+    elif RUN_CONDITIONS.get("write_books"):
+        book_paths = write_books(book_encoder, all_book_entries, BOOKS_OUTPUT_DIR, compression=RUN_CONDITIONS["compression"])
+        for mode, path in book_paths.items():
+            print(f"Wrote {len(all_book_entries[mode])} {mode} books to {path}")
     
     print("\nLookup Table Entries (CSV format - first entry sample per mode):")
     for mode, entries in all_lookup_entries.items():
@@ -155,8 +512,29 @@ def run_simulations(game_params_obj):
             print(f"id,probability_weight,payoutMultiplier") # Header
             print(entries[0])
 
-    print("\nTODO: Implement actual SDK file writing for books and lookup tables.")
+    print("\nPayout statistics per mode:")
+    for mode, mode_statistics in statistics.items():
+        if mode_statistics.rounds:
+            summary = mode_statistics.summary()
+            print(f"  {mode}: {summary['rounds']} rounds, mean payout {summary['rtp']:.4f}x, hit rate {summary['hit_rate']:.4f}, "
+                  f"std dev {summary['std_dev']:.2f}, max {summary['max_payout_multiplier']}x")
+
+    if hit_recorders:
+        print("\nHit counts recorded (repriced with the current paytable as a check):")
+        for mode, recorder in hit_recorders.items():
+            if recorder.num_rounds:
+                repriced = recorder.reprice(game_params_obj.PAYTABLE)
+                print(f"  {mode}: {repriced['rounds']} rounds, {repriced['distinct_signatures']} distinct signatures, "
+                      f"mean payout {repriced['rtp']:.4f}x, hit rate {repriced['hit_rate']:.4f}")
+
+    if stream is None:
+        print("\nTODO: Implement actual SDK file writing for lookup tables.")
     print("TODO: Integrate SDK's optimization and analysis phases (e.g., PAR sheet generation).")
+    output = {"books": all_book_entries, "lookups": all_lookup_entries, "hit_counts": hit_recorders,
+              "statistics": {mode: mode_statistics.summary() for mode, mode_statistics in statistics.items()}}
+    if stream is not None:
+        output["book_paths"], output["lookup_paths"] = stream.book_paths, stream.lookup_paths
+    return output
 
 if __name__ == "__main__":
     print("Starting BOMBAROAT Math SDK project simulation run...")
@@ -168,11 +546,30 @@ if __name__ == "__main__":
     print(f"Simulating with: {NUM_SIM_ARGS}")
     print(f"Run conditions (conceptual for SDK): {RUN_CONDITIONS}")
     
-    if RUN_CONDITIONS["run_sims"]:
-        run_simulations(game_params) # This generates the initial books/lookups
+    if RUN_CONDITIONS["run_sims"] and RUN_CONDITIONS.get("distributed"):
+        simulation_output = run_distributed(game_params, NUM_SIM_ARGS, BOOKS_OUTPUT_DIR, compression=RUN_CONDITIONS["compression"],
+                                            stratified=RUN_CONDITIONS.get("stratified_sampling", False), **DISTRIBUTED_ARGS)
+        print(f"\nDistributed run wrote {simulation_output['book_paths']} ({simulation_output['reissued_leases']} leases re-issued)")
+        if RUN_CONDITIONS.get("session_analysis"):
+            run_session_analysis(simulation_output)
+        if RUN_CONDITIONS.get("payout_classes"):
+            run_payout_compaction(simulation_output)
+        if RUN_CONDITIONS.get("book_bundle"):
+            run_book_bundling(simulation_output, game_params)
+    elif RUN_CONDITIONS["run_sims"]:
+        simulation_output = run_simulations(game_params) # This generates the initial books/lookups
+        if RUN_CONDITIONS.get("session_analysis"):
+            run_session_analysis(simulation_output)
+        if RUN_CONDITIONS.get("payout_classes"):
+            run_payout_compaction(simulation_output)
+        if RUN_CONDITIONS.get("book_bundle"):
+            run_book_bundling(simulation_output, game_params)
     else:
         print("Simulations skipped as per RUN_CONDITIONS.")
 
+    if RUN_CONDITIONS.get("importance_sampling"):
+        run_tail_estimation(game_params)
+
     print("\n--- SDK Post-Simulation Steps (Conceptual) ---")
     print("1. The generated 'lookup_tables/*.csv' would now be processed by the Math SDK's optimization tool.")
     print("2. The optimization tool adjusts symbol/event probabilities (weights in lookup tables) to meet the target RTP.")